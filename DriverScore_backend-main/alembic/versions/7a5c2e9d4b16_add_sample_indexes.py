@@ -0,0 +1,152 @@
+"""Add spatial and covering indexes, optionally partition the sample tables
+
+Revision ID: 7a5c2e9d4b16
+Revises: 0f8e3c6b5a92
+Create Date: 2026-10-18 19:05:43.602117
+
+gps_sample and imu_sample are left as they are unless partitioning is requested with an -x argument:
+
+    alembic -x sample_partitioning=hash:16 upgrade head    # 16 partitions by hash of run_id
+    alembic -x sample_partitioning=range:month upgrade head  # one partition per month of timestamp
+
+Hash partitions spread the runs evenly and prune the per-run reads to one partition. Range partitions are created
+for the months of the samples already stored and the next MONTHS_AHEAD months, later samples go to a DEFAULT
+partition. PostgreSQL rejects creating the partition of a month whose samples are already in the DEFAULT partition,
+so later partitions are created ahead of time with `python -m driver_score.core.partitions`, which also moves such
+samples out of the DEFAULT partition (see driver_score/core/partitions.py). The rows are copied into the partitioned
+tables, which takes a while on large tables. The downgrade turns partitioned tables back into plain ones.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a5c2e9d4b16'
+down_revision: Union[str, None] = '0f8e3c6b5a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SAMPLE_TABLES = ['gps_sample', 'imu_sample']
+# Number of months after the current one whose range partitions are created ahead of their samples
+MONTHS_AHEAD = 12
+
+
+def upgrade() -> None:
+    partitioning = context.get_x_argument(as_dictionary=True).get('sample_partitioning')
+    if partitioning:
+        scheme, _, parameter = partitioning.partition(':')
+        for table in SAMPLE_TABLES:
+            if scheme == 'hash':
+                _partition_by_hash(table, modulus=int(parameter or 16))
+            elif scheme == 'range' and parameter in ('', 'month'):
+                _partition_by_month(table)
+            else:
+                raise ValueError(f"Unknown sample partitioning {partitioning}, expected hash:<n> or range:month")
+
+    op.create_index('ix_dissolved_route_geometry', 'dissolved_route', ['geometry'], unique=False, postgresql_using='gist')
+    op.create_index('ix_curve_inventory_geometry', 'curve_inventory', ['geometry'], unique=False, postgresql_using='gist')
+    op.create_index('ix_gps_sample_geometry', 'gps_sample', ['geometry'], unique=False, postgresql_using='gist')
+    op.create_index('ix_run_driver_id', 'run', ['driver_id'], unique=False)
+    op.create_index('ix_score_run_id_timestamp', 'score', ['run_id', 'timestamp'], unique=False, postgresql_include=['score'])
+    op.create_index('ix_road_characteristic_run_id_timestamp', 'road_characteristic', ['run_id', 'timestamp'], unique=False, postgresql_include=['gps_lrs', 'driving_direction', 'curvature'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_road_characteristic_run_id_timestamp', table_name='road_characteristic')
+    op.drop_index('ix_score_run_id_timestamp', table_name='score')
+    op.drop_index('ix_run_driver_id', table_name='run')
+    op.drop_index('ix_gps_sample_geometry', table_name='gps_sample')
+    op.drop_index('ix_curve_inventory_geometry', table_name='curve_inventory')
+    op.drop_index('ix_dissolved_route_geometry', table_name='dissolved_route')
+
+    for table in SAMPLE_TABLES:
+        if _is_partitioned(table):
+            _rebuild(table, partition_by=None, partitions=[])
+
+
+def _partition_by_hash(table: str, modulus: int) -> None:
+    _rebuild(
+        table,
+        partition_by='HASH (run_id)',
+        partitions=[
+            (f'{table}_p{remainder}', f'FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})')
+            for remainder in range(modulus)
+        ],
+    )
+
+
+def _partition_by_month(table: str) -> None:
+    months = op.get_bind().execute(sa.text(
+        f"SELECT date_trunc('month', \"timestamp\")::date AS month FROM {table} "
+        "UNION SELECT generate_series("
+        "date_trunc('month', now()), date_trunc('month', now()) + make_interval(months => :months_ahead), "
+        "interval '1 month')::date "
+        "ORDER BY month"
+    ), {'months_ahead': MONTHS_AHEAD}).scalars().all()
+    _rebuild(
+        table,
+        partition_by='RANGE ("timestamp")',
+        partitions=[
+            (
+                f'{table}_y{month:%Y}m{month:%m}',
+                f"FOR VALUES FROM ('{month}') TO ('{month}'::date + interval '1 month')",
+            )
+            for month in months
+        ] + [(f'{table}_default', 'DEFAULT')],
+    )
+
+
+def _is_partitioned(table: str) -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {'table': table}).scalar()
+
+
+def _rebuild(table: str, partition_by: str | None, partitions: list[tuple[str, str]]) -> None:
+    """
+    Replace a table by a copy of it, partitioned by `partition_by` or not partitioned if None.
+
+    The secondary indexes, the foreign keys of the table and the foreign keys referencing it are recreated with the
+    same names on the copy.
+    """
+    connection = op.get_bind()
+    previous = f'{table}_previous'
+
+    indexes = connection.execute(sa.text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table AND indexname <> :pkey"
+    ), {'table': table, 'pkey': f'{table}_pkey'}).all()
+    foreign_keys = connection.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), {'table': table}).all()
+    referencing_foreign_keys = connection.execute(sa.text(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE confrelid = to_regclass(:table) AND contype = 'f'"
+    ), {'table': table}).all()
+
+    for referencing_table, name, _ in referencing_foreign_keys:
+        op.execute(f'ALTER TABLE {referencing_table} DROP CONSTRAINT {name}')
+    for name, _ in indexes:
+        op.execute(f'DROP INDEX {name}')
+    op.execute(f'ALTER TABLE {table} RENAME TO {previous}')
+    op.execute(f'ALTER TABLE {previous} RENAME CONSTRAINT {table}_pkey TO {previous}_pkey')
+
+    partition_clause = f' PARTITION BY {partition_by}' if partition_by else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {previous} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_clause}')
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (run_id, "timestamp")')
+    for name, bounds in partitions:
+        op.execute(f'CREATE TABLE {name} PARTITION OF {table} {bounds}')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {previous}')
+    op.execute(f'DROP TABLE {previous}')
+
+    for _, definition in indexes:
+        op.execute(definition)
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    for referencing_table, name, definition in referencing_foreign_keys:
+        op.execute(f'ALTER TABLE {referencing_table} ADD CONSTRAINT {name} {definition}')
+    op.execute(f'ANALYZE {table}')
@@ -0,0 +1,271 @@
+"""
+Generate synthetic AllGather archives, laid out like the ones uploaded by the app:
+
+    <timestamp>/<driver_id>/<imei>/acceleration/<timestamp>_acc.csv
+    <timestamp>/<driver_id>/<imei>/location/<timestamp>_loc.csv
+    <timestamp>/<driver_id>/<imei>/calibration/<timestamp>_cal.csv
+
+The vehicle drives north-east from Atlanta with a slowly varying speed, and the phone is mounted with a fixed tilt,
+which the calibration file measures. CSV files are written a chunk of rows at a time, so recordings of any duration
+can be generated with bounded memory.
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.archive_generator --duration 3600 --imu-rate 100 --gps-rate 1 -o /tmp
+"""
+
+import argparse
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.transform import Rotation
+
+from driver_score.settings import settings
+
+# Columns written by the app, a superset of the ones read by the parsers
+ACCELERATION_CSV_COLUMNS = [
+    "timestamp_nanosecond",
+    "sensor_timestamp_milliseconds",
+    "local_timestamp_milliseconds",
+    "accel_x_mps2",
+    "accel_y_mps2",
+    "accel_z_mps2",
+    "angvelocity_x_radps",
+    "angvelocity_y_radps",
+    "angvelocity_z_radps",
+    "rotation_x_sin_theta_by_2",
+    "rotation_y_sin_theta_by_2",
+    "rotation_z_sin_theta_by_2",
+    "rotation_cos_theta_by_2",
+    "yaw",
+    "pitch",
+    "roll",
+]
+LOCATION_CSV_COLUMNS = [
+    "timestamp_utc_local",
+    "timestamp_utc_gps",
+    "latitude_dd",
+    "longitude_dd",
+    "altitude_m",
+    "bearing_deg",
+    "accuracy_m",
+    " speed_ms",
+    " speed_accuracy_ms",
+]
+CALIBRATION_CSV_COLUMNS = [
+    "timestamp_nanosecond",
+    "local_timestamp_milliseconds",
+    "gravity_x",
+    "gravity_y",
+    "gravity_z",
+]
+
+ARCHIVE_FORMATS = {"zip": "zip", "tar": "tar", "tar.gz": "gztar"}
+
+GRAVITY_MS2 = 9.80665
+METERS_PER_DEGREE = 111_320.0
+START_LATITUDE, START_LONGITUDE = 33.7756, -84.3963
+HEADING_DEG = 45.0
+
+# Number of rows generated and written to a CSV file at once
+GENERATED_CHUNK_ROWS = 500_000
+
+# Number of samples of the calibration recording, made before the run starts
+CALIBRATION_SAMPLES = 200
+
+
+def generate_archive(
+    output_dir: str | Path,
+    duration_s: float = 600.0,
+    imu_rate_hz: float = 100.0,
+    gps_rate_hz: float = 1.0,
+    driver_id: int = 42,
+    imei: str = "nan",
+    archive_format: str = "zip",
+    start_time: datetime = datetime(2022, 5, 25, 20, 19, 6, 302000),
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic AllGather archive.
+
+    Parameters:
+        output_dir: Folder the archive is written to.
+        duration_s: Duration of the recording, in seconds.
+        imu_rate_hz: Number of IMU samples per second.
+        gps_rate_hz: Number of GPS fixes per second.
+        driver_id: ID of the driver, name of the second level folder.
+        imei: IMEI of the phone, name of the third level folder.
+        archive_format: "zip", "tar" or "tar.gz".
+        start_time: Local time the recording starts at, name of the top level folder.
+        seed: Seed of the random noise added to the measurements.
+
+    Returns:
+        Path: The archive, named after the timestamp folder.
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Archive format must be one of {list(ARCHIVE_FORMATS)}, found {archive_format}")
+
+    rng = np.random.default_rng(seed)
+    timestamp = start_time.strftime(settings.COLLECTED_DATA_FOLDER_FORMAT)[:-3]
+    start_ms = round(start_time.timestamp() * 1000)
+    # The phone is mounted with a fixed tilt, which calibration is meant to remove
+    mount = Rotation.from_euler("xyz", rng.uniform(-0.3, 0.3, size=3))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        data_dir = root / timestamp / str(driver_id) / imei
+        for data_type in ("acceleration", "location", "calibration"):
+            (data_dir / data_type).mkdir(parents=True)
+
+        n_imu_samples = int(duration_s * imu_rate_hz)
+        _write_csv_chunks(
+            data_dir / "acceleration" / f"{timestamp}_acc.csv",
+            ACCELERATION_CSV_COLUMNS,
+            n_imu_samples,
+            lambda start, stop: _acceleration_rows(np.arange(start, stop), imu_rate_hz, start_ms, mount, rng),
+        )
+        n_gps_fixes = int(duration_s * gps_rate_hz)
+        _write_csv_chunks(
+            data_dir / "location" / f"{timestamp}_loc.csv",
+            LOCATION_CSV_COLUMNS,
+            n_gps_fixes,
+            lambda start, stop: _location_rows(np.arange(start, stop), gps_rate_hz, start_ms, rng),
+        )
+        _write_csv_chunks(
+            data_dir / "calibration" / f"{timestamp}_cal.csv",
+            CALIBRATION_CSV_COLUMNS,
+            CALIBRATION_SAMPLES,
+            lambda start, stop: _calibration_rows(np.arange(start, stop), start_ms, mount, rng),
+        )
+
+        archive = shutil.make_archive(
+            str(Path(output_dir) / timestamp), ARCHIVE_FORMATS[archive_format], root_dir=root, base_dir=timestamp
+        )
+
+    return Path(archive)
+
+
+def _write_csv_chunks(path: Path, columns: list[str], n_rows: int, make_rows) -> None:
+    with path.open("w", newline="") as csv_file:
+        csv_file.write(",".join(columns) + "\n")
+        for start in range(0, n_rows, GENERATED_CHUNK_ROWS):
+            rows = make_rows(start, min(start + GENERATED_CHUNK_ROWS, n_rows))
+            pd.DataFrame(rows, columns=columns).to_csv(csv_file, header=False, index=False, float_format="%.6f")
+
+
+def _speed_ms(t_s: np.ndarray) -> np.ndarray:
+    return 20.0 + 5.0 * np.sin(2 * np.pi * t_s / 120.0)
+
+
+def _acceleration_ms2(t_s: np.ndarray) -> np.ndarray:
+    return 5.0 * 2 * np.pi / 120.0 * np.cos(2 * np.pi * t_s / 120.0)
+
+
+def _distance_m(t_s: np.ndarray) -> np.ndarray:
+    return 20.0 * t_s - 5.0 * 120.0 / (2 * np.pi) * (np.cos(2 * np.pi * t_s / 120.0) - 1)
+
+
+def _acceleration_rows(
+    index: np.ndarray, rate_hz: float, start_ms: int, mount: Rotation, rng: np.random.Generator
+) -> dict[str, np.ndarray]:
+    n = len(index)
+    t_s = index / rate_hz
+    local_ms = start_ms + np.round(t_s * 1000).astype(np.int64)
+
+    # Longitudinal acceleration and gravity in the vehicle frame, measured in the phone frame
+    vehicle_acceleration = np.column_stack([np.zeros(n), _acceleration_ms2(t_s), np.full(n, GRAVITY_MS2)])
+    acceleration = mount.inv().apply(vehicle_acceleration) + rng.normal(scale=0.05, size=(n, 3))
+    angular_velocity = rng.normal(scale=0.01, size=(n, 3))
+    orientation = mount.inv().as_quat()
+    yaw, pitch, roll = mount.inv().as_euler("zyx")
+
+    return {
+        "timestamp_nanosecond": local_ms * 1_000_000,
+        "sensor_timestamp_milliseconds": local_ms - start_ms,
+        "local_timestamp_milliseconds": local_ms,
+        "accel_x_mps2": acceleration[:, 0],
+        "accel_y_mps2": acceleration[:, 1],
+        "accel_z_mps2": acceleration[:, 2],
+        "angvelocity_x_radps": angular_velocity[:, 0],
+        "angvelocity_y_radps": angular_velocity[:, 1],
+        "angvelocity_z_radps": angular_velocity[:, 2],
+        "rotation_x_sin_theta_by_2": np.full(n, orientation[0]),
+        "rotation_y_sin_theta_by_2": np.full(n, orientation[1]),
+        "rotation_z_sin_theta_by_2": np.full(n, orientation[2]),
+        "rotation_cos_theta_by_2": np.full(n, orientation[3]),
+        "yaw": np.full(n, yaw),
+        "pitch": np.full(n, pitch),
+        "roll": np.full(n, roll),
+    }
+
+
+def _location_rows(index: np.ndarray, rate_hz: float, start_ms: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+    n = len(index)
+    t_s = index / rate_hz
+    local_ms = start_ms + np.round(t_s * 1000).astype(np.int64)
+
+    distance_m = _distance_m(t_s)
+    heading = np.radians(HEADING_DEG)
+    latitude = START_LATITUDE + distance_m * np.cos(heading) / METERS_PER_DEGREE
+    longitude = START_LONGITUDE + distance_m * np.sin(heading) / (
+        METERS_PER_DEGREE * np.cos(np.radians(START_LATITUDE))
+    )
+
+    return {
+        "timestamp_utc_local": local_ms,
+        "timestamp_utc_gps": local_ms - rng.integers(0, 500, size=n),
+        "latitude_dd": latitude + rng.normal(scale=2e-5, size=n),
+        "longitude_dd": longitude + rng.normal(scale=2e-5, size=n),
+        "altitude_m": 300.0 + rng.normal(scale=1.0, size=n),
+        "bearing_deg": HEADING_DEG + rng.normal(scale=2.0, size=n),
+        "accuracy_m": rng.uniform(3.0, 8.0, size=n),
+        " speed_ms": _speed_ms(t_s) + rng.normal(scale=0.2, size=n),
+        " speed_accuracy_ms": rng.uniform(0.2, 1.0, size=n),
+    }
+
+
+def _calibration_rows(
+    index: np.ndarray, start_ms: int, mount: Rotation, rng: np.random.Generator
+) -> dict[str, np.ndarray]:
+    n = len(index)
+    # Calibration is recorded at rest before the run starts, at 100 Hz
+    local_ms = start_ms - (CALIBRATION_SAMPLES - index) * 10
+    gravity = mount.inv().apply([0.0, 0.0, GRAVITY_MS2]) + rng.normal(scale=0.02, size=(n, 3))
+
+    return {
+        "timestamp_nanosecond": local_ms * 1_000_000,
+        "local_timestamp_milliseconds": local_ms,
+        "gravity_x": gravity[:, 0],
+        "gravity_y": gravity[:, 1],
+        "gravity_z": gravity[:, 2],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path(tempfile.gettempdir()))
+    parser.add_argument("--duration", type=float, default=600.0, help="Duration of the recording in seconds")
+    parser.add_argument("--imu-rate", type=float, default=100.0, help="IMU samples per second")
+    parser.add_argument("--gps-rate", type=float, default=1.0, help="GPS fixes per second")
+    parser.add_argument("--driver-id", type=int, default=42)
+    parser.add_argument("--format", choices=list(ARCHIVE_FORMATS), default="zip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    archive = generate_archive(
+        args.output_dir,
+        duration_s=args.duration,
+        imu_rate_hz=args.imu_rate,
+        gps_rate_hz=args.gps_rate,
+        driver_id=args.driver_id,
+        archive_format=args.format,
+        seed=args.seed,
+    )
+    print(archive)
+
+
+if __name__ == "__main__":
+    main()
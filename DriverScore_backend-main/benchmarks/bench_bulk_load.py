@@ -0,0 +1,103 @@
+"""
+Compare rows per second of the COPY bulk loader against `to_sql`/`to_postgis` for imu_sample and gps_sample.
+
+Requires a PostGIS database migrated to head (see `make setup-db`). Every measurement runs in its own
+transaction which is rolled back, so the database is left untouched.
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.bench_bulk_load --imu-rows 200000 --gps-rows 2000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Connection
+
+from driver_score.core.bulk import copy_dataframe
+from driver_score.core.database import db_engine
+from driver_score.core.models import Driver, GpsSample, ImuSample, Run
+
+BENCHMARK_RUN_ID = "benchmark-bulk-load"
+BENCHMARK_DRIVER_ID = -1
+
+
+def make_imu_df(n_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    columns = [column.name for column in ImuSample.__table__.columns if column.name not in {"run_id", "timestamp"}]
+    df = pd.DataFrame(rng.normal(size=(n_rows, len(columns))).astype(np.float32), columns=columns)
+    df.insert(0, "timestamp", pd.date_range("2022-05-25 20:19:06", periods=n_rows, freq="10ms"))
+    df.insert(0, "run_id", BENCHMARK_RUN_ID)
+    return df
+
+
+def make_gps_gdf(n_rows: int) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(
+        {
+            "run_id": BENCHMARK_RUN_ID,
+            "timestamp": pd.date_range("2022-05-25 20:19:06", periods=n_rows, freq="1s"),
+            "latitude": 33.7 + rng.random(n_rows) * 0.01,
+            "longitude": -84.4 + rng.random(n_rows) * 0.01,
+            "altitude": rng.random(n_rows) * 300,
+            "pos_accuracy": rng.random(n_rows) * 5,
+            "heading": rng.random(n_rows) * 360,
+            "velocity": rng.random(n_rows) * 30,
+            "vel_accuracy": rng.random(n_rows),
+        }
+    )
+    return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs=4326)
+
+
+def measure(label: str, n_rows: int, load: Callable[[Connection], None]) -> float:
+    with db_engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(Driver.__table__.insert().values(driver_id=BENCHMARK_DRIVER_ID))
+            connection.execute(Run.__table__.insert().values(run_id=BENCHMARK_RUN_ID, driver_id=BENCHMARK_DRIVER_ID))
+
+            start = time.perf_counter()
+            load(connection)
+            elapsed = time.perf_counter() - start
+        finally:
+            transaction.rollback()
+
+    rows_per_second = n_rows / elapsed
+    print(f"{label:<28} {n_rows:>10} rows {elapsed:>8.2f} s {rows_per_second:>12,.0f} rows/s")
+    return rows_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imu-rows", type=int, default=200_000)
+    parser.add_argument("--gps-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    imu_df = make_imu_df(args.imu_rows)
+    gps_gdf = make_gps_gdf(args.gps_rows)
+
+    to_sql_imu = measure(
+        "imu_sample to_sql",
+        len(imu_df),
+        lambda connection: imu_df.to_sql(ImuSample.__tablename__, con=connection, if_exists="append", index=False),
+    )
+    copy_imu = measure(
+        "imu_sample COPY", len(imu_df), lambda connection: copy_dataframe(connection, ImuSample.__table__, imu_df)
+    )
+    to_postgis_gps = measure(
+        "gps_sample to_postgis",
+        len(gps_gdf),
+        lambda connection: gps_gdf.to_postgis(GpsSample.__tablename__, connection, if_exists="append", index=False),
+    )
+    copy_gps = measure(
+        "gps_sample COPY", len(gps_gdf), lambda connection: copy_dataframe(connection, GpsSample.__table__, gps_gdf)
+    )
+
+    print(f"\nimu_sample speed-up: {copy_imu / to_sql_imu:.1f}x, gps_sample speed-up: {copy_gps / to_postgis_gps:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Time every stage of the ingestion of an AllGather archive by AllGatherService, and the whole upload end to end.
+
+Stages:
+    extract    open the archive and validate its folder layout
+    parse      read the acceleration and location CSV files
+    reformat   rename columns, convert timestamps and validate them
+    calibrate  compute the calibration rotation and apply it to the IMU samples
+    write      COPY the IMU and GPS samples into the database
+    upload     `upload_smartphone_data` end to end, as run by the upload workers (chunked IMU ingestion)
+
+Peak RSS is the high-water mark of the process once the stage is done, so a stage only shows up there if it raised
+it. The write and upload stages require a PostGIS database migrated to head (see `make setup-db`), and the upload
+stage the route the GPS samples are segmented along (SR11). They run in transactions which are rolled back, so the
+database is left untouched. Use `--no-db` to skip them.
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.bench_ingestion --duration 3600 --imu-rate 100 --gps-rate 1
+    poetry run python -m benchmarks.bench_ingestion --archive data/2022_05_25_20_19_06_302.zip
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from driver_score.core.bulk import copy_dataframe
+from driver_score.core.database import db_engine
+from driver_score.core.models import Driver, GpsSample, ImuSample, Run
+from driver_score.domains.allgather.archive import AllGatherArchive
+from driver_score.domains.allgather.constant import CollectedDataType
+from driver_score.domains.allgather.parsers import read_acceleration_csv, read_location_csv
+from driver_score.domains.allgather.service import AllGatherService
+
+from .archive_generator import ARCHIVE_FORMATS, generate_archive
+
+BENCHMARK_RUN_ID = "benchmark-ingestion"
+
+
+@dataclass
+class StageResult:
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1 << 20) if sys.platform == "darwin" else max_rss / (1 << 10)
+
+
+@contextmanager
+def stage(results: list[StageResult], name: str) -> Iterator[StageResult]:
+    result = StageResult(name=name)
+    start = time.perf_counter()
+    yield result
+    result.seconds = time.perf_counter() - start
+    result.peak_rss_mb = peak_rss_mb()
+    results.append(result)
+
+
+def run_stages(archive_path: Path, with_db: bool) -> list[StageResult]:
+    results: list[StageResult] = []
+    service = AllGatherService(run_id=BENCHMARK_RUN_ID)
+
+    with archive_path.open("rb") as fileobj:
+        with stage(results, "extract") as result:
+            archive = AllGatherArchive(fileobj)
+            driver_id = int(archive.driver_id_folder)
+            data_folders = service._check_uploaded_folder_structure(archive, driver_id, archive_path.name)
+            result.rows = len(archive.members)
+
+        timestamp = archive.timestamp_folder
+        acc_csv = data_folders[CollectedDataType.ACCELERATION.value][0].with_name(f"{timestamp}_acc.csv")
+        gps_csv = data_folders[CollectedDataType.LOCATION.value][0].with_name(f"{timestamp}_loc.csv")
+
+        with stage(results, "parse") as result:
+            with archive.open_member(acc_csv) as stream:
+                acc_df = read_acceleration_csv(stream)
+            with archive.open_member(gps_csv) as stream:
+                gps_df = read_location_csv(stream)
+            result.rows = n_samples = len(acc_df) + len(gps_df)
+
+        with stage(results, "reformat") as result:
+            imu_df = service._reformat_phone_imu(acc_df, file_id=None)
+            service._validate_data(imu_df)
+            imu_df["run_id"] = BENCHMARK_RUN_ID
+            gdf = service._reformat_phone_gps(gps_df)
+            result.rows = len(imu_df) + len(gdf)
+        del acc_df, gps_df
+
+        with stage(results, "calibrate") as result:
+            if CollectedDataType.CALIBRATION.value in data_folders:
+                with archive.open_member(data_folders[CollectedDataType.CALIBRATION.value][0]) as stream:
+                    transform, _ = AllGatherService._reformat_phone_calib_data(stream)
+                imu_df = service._apply_calibration_transform(transform, imu_df)
+            result.rows = len(imu_df)
+
+        if with_db:
+            with db_engine.connect() as connection:
+                transaction = connection.begin()
+                try:
+                    connection.execute(Driver.__table__.insert().values(driver_id=driver_id))
+                    connection.execute(Run.__table__.insert().values(run_id=BENCHMARK_RUN_ID, driver_id=driver_id))
+
+                    with stage(results, "write") as result:
+                        result.rows = copy_dataframe(connection, ImuSample.__table__, imu_df)
+                        result.rows += copy_dataframe(connection, GpsSample.__table__, gdf)
+                finally:
+                    transaction.rollback()
+            del imu_df, gdf
+
+            with db_engine.connect() as connection:
+                transaction = connection.begin()
+                session = Session(bind=connection)
+                try:
+                    with stage(results, "upload") as result:
+                        upload_service = AllGatherService(run_id=BENCHMARK_RUN_ID, session=session)
+                        asyncio.run(upload_service.upload_smartphone_data(filename=archive_path.name, archive=archive))
+                        session.flush()
+                        result.rows = n_samples
+                finally:
+                    session.close()
+                    transaction.rollback()
+
+        archive.close()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", type=Path, help="Benchmark an existing archive instead of a generated one")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Duration of the generated recording (s)")
+    parser.add_argument("--imu-rate", type=float, default=100.0, help="IMU samples per second")
+    parser.add_argument("--gps-rate", type=float, default=1.0, help="GPS fixes per second")
+    parser.add_argument("--format", choices=list(ARCHIVE_FORMATS), default="zip")
+    parser.add_argument("--no-db", action="store_true", help="Skip the stages writing to the database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = args.archive
+        if archive_path is None:
+            start = time.perf_counter()
+            archive_path = generate_archive(
+                tmp_dir,
+                duration_s=args.duration,
+                imu_rate_hz=args.imu_rate,
+                gps_rate_hz=args.gps_rate,
+                archive_format=args.format,
+            )
+            print(f"Generated {archive_path.name} in {time.perf_counter() - start:.1f} s")
+
+        size_mb = archive_path.stat().st_size / (1 << 20)
+        print(f"Archive: {archive_path.name} ({size_mb:.1f} MB), baseline peak RSS {peak_rss_mb():.0f} MB\n")
+        results = run_stages(archive_path, with_db=not args.no_db)
+
+    print(f"{'stage':<12} {'rows':>10} {'seconds':>9} {'rows/s':>12} {'peak RSS (MB)':>14}")
+    for result in results:
+        rows_per_second = result.rows / result.seconds if result.seconds else float("nan")
+        print(
+            f"{result.name:<12} {result.rows:>10} {result.seconds:>9.2f} {rows_per_second:>12,.0f}"
+            f" {result.peak_rss_mb:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Query plans and timings of the read endpoints on a database holding many samples (10M IMU samples by default).
+
+Synthetic runs are loaded with COPY (IMU samples at 100 Hz, GPS samples, scores and road characteristics at 1 Hz),
+then every endpoint below is called through its service. The queries it runs are recorded and explained with
+`EXPLAIN (ANALYZE, BUFFERS)`, which shows whether they use the indexes of the sample tables:
+
+    GET /runs/{run_id}/scores          RunService.get_scores_by_direction
+    GET /runs/{run_id}/gps_samples     RunService.get_gps_samples_by_direction
+    GET /runs/{run_id}/imu_samples     RunService.get_imu_samples_by_direction
+    GET /drivers/{driver_id}/runs      DriverService.get_runs
+    GET /summary/range                 SummaryService.get_summary_by_RC_range
+
+The endpoints open their own sessions, so the samples are committed, and deleted at the end unless `--keep` is
+given; a later execution with `--keep` reuses them. Requires a PostGIS database migrated to head (see
+`make setup-db`), optionally with partitioned sample tables (see alembic/versions/7a5c2e9d4b16_add_sample_indexes.py).
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.bench_read_plans --imu-rows 10000000 --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, event, select
+
+from driver_score.core.bulk import copy_dataframe
+from driver_score.core.database import db_engine
+from driver_score.core.models import Driver, GpsSample, ImuSample, RoadCharacteristic, Run, Score
+from driver_score.domains.driver.service import DriverService
+from driver_score.domains.run.service import RunService
+from driver_score.domains.summary.service import SummaryService
+
+BENCHMARK_RUN_PREFIX = "benchmark-read-plans"
+BENCHMARK_DRIVER_ID = -2
+IMU_RATE_HZ = 100
+
+
+def run_ids(n_runs: int) -> list[str]:
+    return [f"{BENCHMARK_RUN_PREFIX}-{i}" for i in range(n_runs)]
+
+
+def seed(n_imu_rows: int, n_runs: int) -> None:
+    """Load the synthetic runs, one transaction per run."""
+    imu_columns = [column.name for column in ImuSample.__table__.columns if column.name not in {"run_id", "timestamp"}]
+    imu_rows_per_run = n_imu_rows // n_runs
+    gps_rows_per_run = imu_rows_per_run // IMU_RATE_HZ
+    rng = np.random.default_rng(0)
+
+    with db_engine.begin() as connection:
+        connection.execute(Driver.__table__.insert().values(driver_id=BENCHMARK_DRIVER_ID, name="benchmark"))
+
+    for i, run_id in enumerate(run_ids(n_runs)):
+        start = pd.Timestamp("2022-05-25 20:19:06") + pd.Timedelta(days=i)
+        imu_df = pd.DataFrame(
+            rng.normal(size=(imu_rows_per_run, len(imu_columns))).astype(np.float32), columns=imu_columns
+        )
+        imu_df.insert(0, "timestamp", pd.date_range(start, periods=imu_rows_per_run, freq="10ms"))
+        imu_df.insert(0, "run_id", run_id)
+
+        timestamps = pd.date_range(start, periods=gps_rows_per_run, freq="1s")
+        lrs = np.abs(np.linspace(-1, 1, gps_rows_per_run))
+        half = gps_rows_per_run // 2
+        gps_gdf = gpd.GeoDataFrame(
+            {
+                "run_id": run_id,
+                "timestamp": timestamps,
+                "latitude": 33.77 + 0.03 * lrs,
+                "longitude": -84.40 + 0.05 * lrs,
+                "velocity": rng.random(gps_rows_per_run) * 30,
+                "lrs": lrs,
+                "direction": ["decreasing 1"] * half + ["increasing 1"] * (gps_rows_per_run - half),
+            },
+            geometry=gpd.points_from_xy(-84.40 + 0.05 * lrs, 33.77 + 0.03 * lrs),
+            crs=4326,
+        )
+        score_df = pd.DataFrame(
+            {"run_id": run_id, "timestamp": timestamps, "score": rng.random(gps_rows_per_run) * 100}
+        )
+        rc_df = pd.DataFrame(
+            {
+                "run_id": run_id,
+                "timestamp": timestamps,
+                "dissolved_id": None,
+                "gps_lrs": lrs * 10_000,
+                "driving_direction": gps_gdf["direction"],
+                "curvature": rng.random(gps_rows_per_run) / 1000,
+            }
+        )
+
+        started = time.perf_counter()
+        with db_engine.begin() as connection:
+            connection.execute(
+                Run.__table__.insert().values(
+                    run_id=run_id, driver_id=BENCHMARK_DRIVER_ID, start_time=timestamps[0], end_time=timestamps[-1]
+                )
+            )
+            copy_dataframe(connection, ImuSample.__table__, imu_df)
+            copy_dataframe(connection, GpsSample.__table__, gps_gdf)
+            copy_dataframe(connection, Score.__table__, score_df)
+            copy_dataframe(connection, RoadCharacteristic.__table__, rc_df)
+        print(f"Loaded {run_id}: {imu_rows_per_run} IMU samples in {time.perf_counter() - started:.1f} s")
+
+    with db_engine.connect() as connection:
+        for table in ("imu_sample", "gps_sample", "score", "road_characteristic", "run"):
+            connection.exec_driver_sql(f"ANALYZE {table}")
+
+
+def clean_up(n_runs: int) -> None:
+    ids = run_ids(n_runs)
+    with db_engine.begin() as connection:
+        for model in (RoadCharacteristic, Score, GpsSample, ImuSample, Run):
+            connection.execute(delete(model).where(model.run_id.in_(ids)))
+        connection.execute(delete(Driver).where(Driver.driver_id == BENCHMARK_DRIVER_ID))
+
+
+def is_seeded(n_runs: int) -> bool:
+    with db_engine.connect() as connection:
+        return connection.execute(select(Run.run_id).where(Run.run_id == run_ids(n_runs)[-1])).first() is not None
+
+
+def plan_nodes(plan: dict) -> list[str]:
+    """Scans and joins of a JSON plan, e.g. "Index Only Scan on score using ix_score_run_id_timestamp"."""
+    node = plan["Node Type"]
+    if "Relation Name" in plan:
+        node += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        node += f" using {plan['Index Name']}"
+    nodes = [node] if "Scan" in node or "Join" in node or "Nested Loop" in node else []
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def explain_endpoint(label: str, call: Callable[[], Awaitable[object]]) -> None:
+    statements: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    try:
+        started = time.perf_counter()
+        asyncio.run(call())
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+
+    print(f"\n{label}: {elapsed * 1000:.0f} ms end to end, {len(statements)} queries")
+    with db_engine.connect() as connection:
+        for statement, parameters in statements:
+            explained = connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+            ).scalar()
+            result = (json.loads(explained) if isinstance(explained, str) else explained)[0]
+            print(
+                f"  {result['Execution Time']:>10.1f} ms  {result['Plan'].get('Actual Rows', 0):>9} rows  "
+                f"{' > '.join(plan_nodes(result['Plan']))}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imu-rows", type=int, default=10_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic runs for later executions")
+    args = parser.parse_args()
+
+    if not is_seeded(args.runs):
+        seed(args.imu_rows, args.runs)
+
+    run_id = run_ids(args.runs)[args.runs // 2]
+    try:
+        explain_endpoint("GET /runs/{run_id}/scores", lambda: RunService(run_id).get_scores_by_direction())
+        explain_endpoint("GET /runs/{run_id}/gps_samples", lambda: RunService(run_id).get_gps_samples_by_direction())
+        explain_endpoint("GET /runs/{run_id}/imu_samples", lambda: RunService(run_id).get_imu_samples_by_direction())
+        explain_endpoint("GET /drivers/{driver_id}/runs", lambda: DriverService(BENCHMARK_DRIVER_ID).get_runs())
+        explain_endpoint("GET /summary/range", lambda: SummaryService().get_summary_by_RC_range())
+    finally:
+        if not args.keep:
+            clean_up(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the vectorized densification of a route and location of its curves (see
+driver_score/domains/route/geometry.py) against the original shapely object per vertex and per point loops, on a
+synthetic route with as many vertices as the routes of a statewide network. No database is required.
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.bench_route_geometry --vertices 300000 --curves 20000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import LineString, Point
+
+from driver_score.domains.route.geometry import densify, locate_points
+from driver_score.domains.route.segmentation import POINTS_PER_EDGE
+
+
+def make_route(n_vertices: int) -> LineString:
+    # About 10 m between vertices, with a slowly changing heading like a road
+    rng = np.random.default_rng(0)
+    heading = np.cumsum(rng.normal(scale=0.02, size=n_vertices))
+    x = -85.0 + np.cumsum(1e-4 * np.cos(heading))
+    y = 33.0 + np.cumsum(1e-4 * np.sin(heading))
+    return LineString(np.column_stack([x, y, np.zeros(n_vertices)]))
+
+
+def make_curves(route: LineString, n_curves: int) -> gpd.GeoDataFrame:
+    # PC of the curves along the route, slightly off it
+    rng = np.random.default_rng(1)
+    coordinates = shapely.get_coordinates(route)
+    edges = rng.integers(0, len(coordinates) - 1, n_curves)
+    fractions = rng.uniform(0, 1, (n_curves, 1))
+    pc = coordinates[edges] + fractions * (coordinates[edges + 1] - coordinates[edges])
+    pc += rng.normal(scale=1e-6, size=pc.shape)
+    return gpd.GeoDataFrame({"c_pc_x": pc[:, 0], "c_pc_y": pc[:, 1]})
+
+
+def densify_point_by_point(line: LineString, num_points: int) -> LineString:
+    # RouteService._interpolate_points, before it was vectorized
+    distances = [i / (num_points + 1) for i in range(1, num_points + 1)]
+    interpolated_points = []
+    for i in range(len(line.coords) - 1):
+        segment = LineString([line.coords[i], line.coords[i + 1]])
+        segment_length = segment.length
+        segment_distances = [dist * segment_length for dist in distances]
+        segment_points = [segment.interpolate(dist) for dist in segment_distances]
+        interpolated_points.extend(segment_points)
+    interpolated_points.append(line.coords[-1])
+    return LineString(interpolated_points)
+
+
+def measure(label: str, run: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:>8.3f} s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vertices", type=int, default=300_000)
+    parser.add_argument("--curves", type=int, default=20_000)
+    args = parser.parse_args()
+
+    route = make_route(args.vertices)
+    curve_gdf = make_curves(route, args.curves)
+    print(f"{args.vertices} vertices, {args.curves} curves\n")
+
+    loop = measure("densify, point by point", lambda: densify_point_by_point(route, POINTS_PER_EDGE))
+    vectorized = measure("densify, vectorized", lambda: densify(route, POINTS_PER_EDGE))
+    print(f"speed-up: {loop / vectorized:.0f}x\n")
+
+    loop = measure(
+        "locate curves, row by row",
+        lambda: curve_gdf.apply(lambda x: route.project(Point(x.c_pc_x, x.c_pc_y)), axis=1),
+    )
+    vectorized = measure(
+        "locate curves, spatial index of edges", lambda: locate_points(route, curve_gdf["c_pc_x"], curve_gdf["c_pc_y"])
+    )
+    print(f"speed-up: {loop / vectorized:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
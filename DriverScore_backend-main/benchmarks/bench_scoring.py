@@ -0,0 +1,73 @@
+"""
+Compare samples per second of the vectorized scoring of `DriverScoreModelService` against the original sample by
+sample scoring loop, on synthetic GPS and IMU columns. No database is required.
+
+Usage (from the backend folder):
+    poetry run python -m benchmarks.bench_scoring --samples 100000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from driver_score.domains.model.schemas import DriverScoreInSchema
+from driver_score.domains.model.service import DriverScoreModelService
+
+
+def make_columns(n_samples: int) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    rng = np.random.default_rng(0)
+    gps = {
+        "timestamp": np.datetime64("2022-05-25T20:19:06", "us") + np.arange(n_samples) * np.timedelta64(1, "s"),
+        "velocity": rng.uniform(0, 35, n_samples),
+    }
+    imu = {
+        "acceleration_x_ms2": rng.normal(scale=3, size=n_samples),
+        "acceleration_y_ms2": rng.normal(scale=3, size=n_samples),
+        "acceleration_z_ms2": rng.normal(loc=9.81, scale=0.2, size=n_samples),
+    }
+    return gps, imu
+
+
+def score_sample_by_sample(gps: dict[str, np.ndarray], imu: dict[str, np.ndarray], window_length: int = 10) -> list:
+    # The scoring loop DriverScoreModelService.calculate_scores used before it was vectorized
+    timestamps = gps["timestamp"].tolist()
+    velocities = gps["velocity"]
+    accelerations = np.column_stack([imu["acceleration_x_ms2"], imu["acceleration_y_ms2"], imu["acceleration_z_ms2"]])
+    scores = [None] * len(timestamps)
+    for i in range(window_length, len(timestamps)):
+        score = DriverScoreModelService._calculate_score(vel=velocities[i - 10 : i], acc=accelerations[i - 10 : i])
+        scores[i] = DriverScoreInSchema(timestamp=timestamps[i], score=score)
+    for i in range(window_length):
+        scores[i] = DriverScoreInSchema(timestamp=timestamps[i], score=scores[window_length].score)
+    return scores
+
+
+def measure(label: str, n_samples: int, score: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    score()
+    elapsed = time.perf_counter() - start
+
+    samples_per_second = n_samples / elapsed
+    print(f"{label:<28} {n_samples:>10} samples {elapsed:>8.3f} s {elapsed / n_samples * 1e6:>8.3f} us/sample")
+    return samples_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=100_000)
+    args = parser.parse_args()
+
+    gps, imu = make_columns(args.samples)
+    service = DriverScoreModelService()
+
+    loop = measure("sample by sample", args.samples, lambda: score_sample_by_sample(gps, imu))
+    columns = measure("vectorized, columns", args.samples, lambda: service.calculate_score_columns(gps, imu))
+    schemas = measure("vectorized, schemas", args.samples, lambda: service.calculate_scores(gps, imu))
+
+    print(f"\nspeed-up: {columns / loop:.0f}x (columns), {schemas / loop:.0f}x (schemas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
+from driver_score.core.request_cache import request_scope
+from driver_score.domains.allgather.jobs import UploadJobWorkerPool
+from driver_score.domains.route.cache import route_cache
 from driver_score.domains.router import v1_api_router
 from driver_score.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
@@ -27,6 +34,40 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count"],
 )
 
+
+@app.middleware("http")
+async def cache_request_lookups(request: Request, call_next):
+    """Share database lookups between the services of a request, and report how many queries it ran."""
+    with request_scope() as scope:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(scope.query_count)
+    return response
+
+
 app.include_router(v1_api_router)
+
+upload_worker_pool = UploadJobWorkerPool(
+    n_workers=settings.UPLOAD_WORKERS, poll_interval=settings.UPLOAD_JOB_POLL_INTERVAL
+)
+
+
+@app.on_event("startup")
+def start_upload_workers() -> None:
+    upload_worker_pool.start()
+
+
+@app.on_event("startup")
+def warm_up_route_cache() -> None:
+    try:
+        route_cache.warm_up()
+    except Exception:
+        # Routes are loaded on their first lookup instead
+        logger.exception("Could not load the routes into the route cache")
+
+
+@app.on_event("shutdown")
+def stop_upload_workers() -> None:
+    upload_worker_pool.stop(timeout=settings.UPLOAD_JOB_POLL_INTERVAL)
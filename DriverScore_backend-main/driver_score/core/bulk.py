@@ -0,0 +1,123 @@
+"""
+Bulk loading of DataFrames into PostgreSQL with `COPY ... FROM STDIN`.
+
+Rows are rendered as CSV a chunk at a time and streamed to the server through the DBAPI cursor of the given
+SQLAlchemy connection, so the COPY takes part in the connection's transaction and several tables can be loaded
+atomically:
+
+    with db_engine.begin() as connection:
+        copy_dataframe(connection, ImuSample.__table__, imu_df)
+        copy_dataframe(connection, GpsSample.__table__, gps_gdf)
+
+Derived rows that are computed again when a run is processed again (scores, road characteristics) are written with
+`replace_dataframe`, which deletes the rows of the run and COPYs the new ones in the same transaction, so that
+processing a run again leaves exactly the rows of the last pass.
+"""
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+
+# Number of rows rendered as CSV at once, bounds the memory used by a COPY on top of the DataFrame itself
+COPY_CHUNK_ROWS = 50_000
+
+# Size of the reads issued by psycopg2 on the CSV stream
+COPY_BUFFER_SIZE = 1 << 20
+
+
+def copy_dataframe(connection: Connection, table: Table, df: pd.DataFrame, chunk_rows: int = COPY_CHUNK_ROWS) -> int:
+    """
+    Append the rows of a DataFrame to a table with `COPY ... FROM STDIN`.
+
+    The DataFrame columns must be a subset of the table columns, the index is ignored. For a GeoDataFrame, the
+    active geometry column is sent as hex EWKB (with its SRID), which PostGIS parses on input.
+
+    Parameters:
+        connection: Connection whose transaction the COPY is part of.
+        table: The target table, e.g. `ImuSample.__table__`.
+        df: The rows to load.
+        chunk_rows: Number of rows rendered as CSV at once.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    unknown_columns = set(df.columns) - set(table.columns.keys())
+    if unknown_columns:
+        raise ValueError(f"Columns {sorted(unknown_columns)} do not exist in table {table.name}")
+
+    if isinstance(df, gpd.GeoDataFrame):
+        df = _with_ewkb_geometry(df)
+
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(column) for column in df.columns)
+    statement = f"COPY {preparer.format_table(table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(statement, _DataFrameCsvStream(df, chunk_rows=chunk_rows), size=COPY_BUFFER_SIZE)
+    finally:
+        cursor.close()
+
+    return len(df)
+
+
+def replace_dataframe(
+    connection: Connection, table: Table, df: pd.DataFrame, chunk_rows: int = COPY_CHUNK_ROWS, **scope
+) -> int:
+    """
+    Replace the rows of a table matching a scope, e.g. the rows of a run, with the rows of a DataFrame.
+
+    The rows matching the scope are deleted, then the rows of the DataFrame are loaded with `copy_dataframe`, in the
+    connection's transaction: rows of a previous pass missing from the new one are removed as well. The rows of the
+    DataFrame must all be within the scope.
+
+    Parameters:
+        connection: Connection whose transaction the rows are replaced in.
+        table: The target table, e.g. `Score.__table__`.
+        df: The new rows.
+        chunk_rows: Number of rows rendered as CSV at once.
+        scope: Values of the columns of the replaced rows, e.g. `run_id="..."`.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    if not scope:
+        raise ValueError(f"Replacing the rows of table {table.name} requires a scope")
+    for column, value in scope.items():
+        if column in df and not (df[column] == value).all():
+            raise ValueError(f"Rows with {column} other than {value!r} cannot replace the rows of table {table.name}")
+
+    connection.execute(table.delete().where(*(table.c[column] == value for column, value in scope.items())))
+    return copy_dataframe(connection, table, df, chunk_rows=chunk_rows)
+
+
+def _with_ewkb_geometry(gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+    geometry_column = gdf.geometry.name
+    srid = gdf.crs.to_epsg() if gdf.crs is not None else 0
+    geometries = shapely.set_srid(gdf.geometry.to_numpy(), srid)
+
+    return pd.DataFrame(gdf).assign(**{geometry_column: shapely.to_wkb(geometries, hex=True, include_srid=True)})
+
+
+class _DataFrameCsvStream:
+    """Read-only file-like object rendering a DataFrame as CSV one chunk at a time, as consumed by `copy_expert`."""
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int) -> None:
+        self._chunks = (
+            df.iloc[start : start + chunk_rows].to_csv(header=False, index=False).encode()
+            for start in range(0, len(df), chunk_rows)
+        )
+        self._chunk = b""
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self._position >= len(self._chunk):
+            self._chunk = next(self._chunks, b"")
+            self._position = 0
+
+        end = len(self._chunk) if size < 0 else self._position + size
+        data = self._chunk[self._position : end]
+        self._position += len(data)
+        return data
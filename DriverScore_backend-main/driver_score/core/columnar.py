@@ -0,0 +1,90 @@
+"""
+Columnar reads of the per-run sample tables (gps_sample, imu_sample, score and road_characteristic).
+
+The rows of a Core `select` are turned into one NumPy array per selected column, without hydrating an ORM object
+and a Pydantic model per row, which dominates the read path of long runs:
+
+    with get_db_session() as session:
+        gps = read_run_columns(session, GpsSample, run_id, ["timestamp", "velocity"])
+    gps["velocity"].mean()
+
+Timestamps are `datetime64[us]` (the precision of PostgreSQL), floats are `float64` with NULL as NaN, and other
+types are left as inferred by pandas.
+"""
+
+from collections.abc import Iterable
+from typing import TypeVar
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from sqlalchemy import DateTime, Float, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def read_columns(session: Session, statement: Select) -> dict[str, np.ndarray]:
+    """
+    Run a Core select and return its result as columns.
+
+    Parameters:
+        session: Session the select runs in.
+        statement: The select, its columns are named after their labels.
+
+    Returns:
+        dict[str, np.ndarray]: One array per selected column, in the order of the select.
+    """
+    selected_columns = list(statement.selected_columns)
+    names = [column.key for column in selected_columns]
+    rows = session.execute(statement).all()
+
+    df = pd.DataFrame.from_records(rows, columns=names)
+    return {
+        name: df[name].to_numpy(dtype=_numpy_dtype(column.type))
+        for name, column in zip(names, selected_columns, strict=True)
+    }
+
+
+def read_run_columns(
+    session: Session, model: type, run_id: str, columns: list[str], filters: Iterable = ()
+) -> dict[str, np.ndarray]:
+    """
+    Read columns of the samples of a run from a per-run table, sorted by timestamp.
+
+    Parameters:
+        session: Session the select runs in.
+        model: Mapped class of a table keyed by (run_id, timestamp), e.g. `GpsSample`.
+        run_id: The run to read the samples of.
+        columns: Names of the columns to read.
+        filters: Additional criteria on the samples, e.g. `[GpsSample.direction == "increasing 1"]`.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column.
+    """
+    statement = (
+        select(*(getattr(model, column) for column in columns))
+        .where(model.run_id == run_id, *filters)
+        .order_by(model.timestamp)
+    )
+    return read_columns(session, statement)
+
+
+def columns_to_models(schema: type[ModelT], columns: dict[str, np.ndarray]) -> list[ModelT]:
+    """
+    Build one schema per row of columns, for API responses.
+
+    The values come from the database and are not validated again.
+    """
+    names = list(columns)
+    values = [column.tolist() for column in columns.values()]
+    return [schema.model_construct(**dict(zip(names, row, strict=True))) for row in zip(*values, strict=True)]
+
+
+def _numpy_dtype(column_type) -> str | None:
+    if isinstance(column_type, DateTime):
+        return "datetime64[us]"
+    if isinstance(column_type, Float):
+        return "float64"
+    return None
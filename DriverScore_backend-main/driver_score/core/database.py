@@ -2,7 +2,7 @@ from contextlib import contextmanager
 
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from driver_score.settings import settings
 
@@ -17,15 +17,28 @@ Base = declarative_base()
 
 
 @contextmanager
-def get_db_session():
+def get_db_session(session: Session | None = None):
     """
     Context manager to obtain a database session.
     Automatically handles transactions and session closing.
+
+    An existing session can be passed to run in its transaction instead (unit of work): it is flushed
+    on exit so the next statements see the changes, but committing, rolling back and closing it is
+    left to its owner.
     
     Usage:
         with get_db_session() as session:
             # Database operations
+
+        with get_db_session() as session:
+            with get_db_session(session) as same_session:
+                # Database operations, committed with the outer session
     """
+    if session is not None:
+        yield session
+        session.flush()
+        return
+
     session = SessionLocal()
     try:
         yield session
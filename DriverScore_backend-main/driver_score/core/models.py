@@ -7,10 +7,14 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     ForeignKeyConstraint,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Text,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from driver_score.core.database import Base
@@ -19,6 +23,9 @@ metadata = Base.metadata
 
 class DissolvedRoute(Base):
     __tablename__ = "dissolved_route"
+    __table_args__ = (
+        Index("ix_dissolved_route_geometry", "geometry", postgresql_using="gist"),
+    )
 
     dissolved_id = Column(Text, primary_key=True)
     geometry = Column(Geometry("LINESTRINGZ", 4326, spatial_index=False))
@@ -26,6 +33,9 @@ class DissolvedRoute(Base):
 
 class CurveInventory(Base):
     __tablename__ = "curve_inventory"
+    __table_args__ = (
+        Index("ix_curve_inventory_geometry", "geometry", postgresql_using="gist"),
+    )
 
     curve_id = Column(BigInteger, primary_key=True, autoincrement=True)
     dissolved_id = Column(ForeignKey("dissolved_route.dissolved_id"))
@@ -44,6 +54,51 @@ class CurveInventory(Base):
     dissolved_route = relationship("DissolvedRoute")
 
 
+class RouteSplineFit(Base):
+    __tablename__ = "route_spline_fit"
+
+    # SHA-256 of the projected route geometry the spline is fitted to (WKB)
+    geometry_hash = Column(Text, primary_key=True)
+    spline_order = Column(Integer, primary_key=True)
+    smoothing_factor = Column(Float, primary_key=True)
+    dissolved_id = Column(Text, index=True)
+    # B-spline fitted by splprep: knots and coefficients as little-endian float64 arrays, and degree
+    knots = Column(LargeBinary, nullable=False)
+    coefficients = Column(LargeBinary, nullable=False)
+    degree = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class RouteCurvatureProfile(Base):
+    __tablename__ = "route_curvature_profile"
+
+    dissolved_id = Column(Text, ForeignKey("dissolved_route.dissolved_id"), primary_key=True)
+    # Index of the point along the route, its LRS is bucket * spacing, except for the last point (end of the route)
+    bucket = Column(Integer, primary_key=True)
+    # SHA-256 of the projected route geometry the profile is computed on (WKB)
+    geometry_hash = Column(Text, nullable=False)
+    # LRS along the projected centerline and radius in feet, curvature in 1/ft
+    lrs = Column(Float, nullable=False)
+    curvature = Column(Float, nullable=False)
+    radius = Column(Float, nullable=False)
+
+
+class RouteSegment(Base):
+    __tablename__ = "route_segment"
+
+    dissolved_id = Column(Text, ForeignKey("dissolved_route.dissolved_id"), primary_key=True)
+    # "curve" or "tangent", and number of the segment among the segments of its type along the route, from 1
+    segment_type = Column(Text, primary_key=True)
+    segment_id = Column(Integer, primary_key=True)
+    # SHA-256 of the projected route geometry the segment is computed on (WKB)
+    geometry_hash = Column(Text, nullable=False)
+    # LRS interval of the segment along the projected centerline in feet, like road_characteristic.gps_lrs
+    start_lrs = Column(Float, nullable=False)
+    end_lrs = Column(Float, nullable=False)
+    # Simplified geometry of the segment
+    geometry = Column(Geometry("LINESTRING", 4326, spatial_index=False), nullable=False)
+
+
 class Driver(Base):
     __tablename__ = "driver"
 
@@ -60,15 +115,23 @@ class Run(Base):
     __tablename__ = "run"
 
     run_id = Column(Text, primary_key=True)
-    driver_id = Column(Integer, ForeignKey("driver.driver_id"))
+    driver_id = Column(Integer, ForeignKey("driver.driver_id"), index=True)
     start_time = Column(DateTime)
     end_time = Column(DateTime)
+    # Route the run was driven on, matched at ingestion (see domains/route/matching.py), None if none is near it
+    dissolved_id = Column(Text, ForeignKey("dissolved_route.dissolved_id"))
 
     driver = relationship("Driver")
 
 
+# gps_sample and imu_sample can be partitioned by run_id hash or by timestamp range when they are migrated (see
+# alembic/versions/7a5c2e9d4b16_add_sample_indexes.py), which is transparent to the models.
 class GpsSample(Base):
     __tablename__ = "gps_sample"
+    __table_args__ = (
+        Index("ix_gps_sample_run_id_direction", "run_id", "direction"),
+        Index("ix_gps_sample_geometry", "geometry", postgresql_using="gist"),
+    )
 
     run_id = Column(Text, ForeignKey("run.run_id"), primary_key=True)
     timestamp = Column(DateTime, primary_key=True)
@@ -80,6 +143,9 @@ class GpsSample(Base):
     velocity = Column(Float)
     vel_accuracy = Column(Float)
     geometry = Column(Geometry("POINT", 4326, spatial_index=False))
+    # Normalized LRS along the route and direction stretch label (e.g. "increasing 2"), computed at ingestion
+    lrs = Column(Float)
+    direction = Column(Text)
 
     run = relationship("Run")
 
@@ -111,6 +177,13 @@ class RoadCharacteristic(Base):
         ForeignKeyConstraint(
             ["run_id", "timestamp"], ["gps_sample.run_id", "gps_sample.timestamp"]
         ),
+        # Covers the joins of the samples with their RCs, which then read the index only
+        Index(
+            "ix_road_characteristic_run_id_timestamp",
+            "run_id",
+            "timestamp",
+            postgresql_include=["gps_lrs", "driving_direction", "curvature"],
+        ),
     )
 
     run_id = Column(Text, primary_key=True)
@@ -134,6 +207,8 @@ class Score(Base):
         ForeignKeyConstraint(
             ["run_id", "timestamp"], ["gps_sample.run_id", "gps_sample.timestamp"]
         ),
+        # Covers the joins of the samples with their scores, which then read the index only
+        Index("ix_score_run_id_timestamp", "run_id", "timestamp", postgresql_include=["score"]),
     )
 
     run_id = Column(Text, primary_key=True)
@@ -163,5 +238,37 @@ class CollectedDataFile(Base):
     file_name = Column(Text)
     collected_by = Column(BigInteger, ForeignKey("driver.driver_id"), nullable=False)
     collected_on = Column(DateTime)
+    # SHA-256 of the uploaded file, used to reject duplicate uploads
+    content_digest = Column(Text, unique=True, index=True)
+    run_id = Column(Text, ForeignKey("run.run_id"))
+
+    driver = relationship("Driver")
+    run = relationship("Run")
+
 
-    driver = relationship("Driver")
\ No newline at end of file
+class UploadJob(Base):
+    __tablename__ = "upload_job"
+    __table_args__ = (
+        # A file is queued or processed once at a time, concurrent uploads of the same file conflict on insert
+        Index(
+            "ux_upload_job_content_digest_in_progress",
+            "content_digest",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    run_id = Column(Text, primary_key=True)
+    file_name = Column(Text)
+    archive_path = Column(Text, nullable=False)
+    content_digest = Column(Text, index=True)
+    status = Column(Text, nullable=False, index=True)
+    current_stage = Column(Text)
+    stages = Column(JSONB, nullable=False, default=dict)
+    error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    # Set by the worker claiming the job: only that worker records its progress and outcome
+    claim_token = Column(Text)
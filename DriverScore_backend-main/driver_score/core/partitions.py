@@ -0,0 +1,130 @@
+"""
+Monthly partitions of the sample tables, when they are partitioned by range of timestamp (see
+alembic/versions/7a5c2e9d4b16_add_sample_indexes.py).
+
+The migration creates the partitions of the months already stored and of the next `MONTHS_AHEAD` months, samples
+of later months go to the DEFAULT partition. PostgreSQL rejects `CREATE TABLE ... PARTITION OF` for a month whose
+rows are already in the DEFAULT partition, so partitions are added with `extend_monthly_partitions`, which moves
+these rows out of it:
+
+    ALTER TABLE imu_sample DETACH PARTITION imu_sample_default;
+    CREATE TABLE imu_sample_y2027m11 PARTITION OF imu_sample FOR VALUES FROM ('2027-11-01') TO ('2027-12-01');
+    INSERT INTO imu_sample SELECT * FROM imu_sample_default WHERE "timestamp" >= '2027-11-01' AND ...;
+    DELETE FROM imu_sample_default WHERE "timestamp" >= '2027-11-01' AND ...;
+    ALTER TABLE imu_sample ATTACH PARTITION imu_sample_default DEFAULT;
+
+Detaching the DEFAULT partition locks the whole table until the transaction commits, so this is meant to run
+regularly (e.g. monthly from cron), ahead of the months it creates, when the DEFAULT partition is empty:
+
+    python -m driver_score.core.partitions --months-ahead 12
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from driver_score.core.database import db_engine
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_TABLES = ("gps_sample", "imu_sample")
+# Number of months after the current one whose partitions are created ahead of their samples
+MONTHS_AHEAD = 12
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` months after the month of a date."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month:%Y}m{month:%m}"
+
+
+def is_partitioned_by_range(connection: Connection, table: str) -> bool:
+    strategy = connection.execute(
+        text("SELECT partstrat FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+    return strategy == "r"
+
+
+def extend_monthly_partitions(
+    connection: Connection, table: str, months_ahead: int = MONTHS_AHEAD, today: date | None = None
+) -> list[str]:
+    """
+    Create the missing monthly partitions of a table, up to `months_ahead` months after the current one, and the ones
+    of the months of the rows stored in its DEFAULT partition, which are moved to them.
+
+    Parameters:
+        connection: Connection whose transaction the partitions are created in.
+        table: A table partitioned by range of timestamp, e.g. "imu_sample".
+        months_ahead: Number of months after the current one to create partitions for.
+        today: The current date, `date.today()` by default.
+
+    Returns:
+        list[str]: The names of the created partitions.
+    """
+    current_month = add_months(today or date.today(), 0)
+    default_partition = f"{table}_default"
+    existing = set(
+        connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:table)"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+    stranded_months = []
+    if default_partition in existing:
+        stranded_months = (
+            connection.execute(
+                text(f"SELECT DISTINCT date_trunc('month', \"timestamp\")::date AS month FROM {default_partition}")
+            )
+            .scalars()
+            .all()
+        )
+
+    months = sorted({*stranded_months, *(add_months(current_month, i) for i in range(months_ahead + 1))})
+    months = [month for month in months if partition_name(table, month) not in existing]
+    stranded_months = [month for month in months if month in set(stranded_months)]
+
+    if stranded_months:
+        # The rows of the new partitions must leave the DEFAULT partition before the partitions can be created
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default_partition}"))
+    for month in months:
+        bounds = f"FROM ('{month}') TO ('{add_months(month, 1)}')"
+        connection.execute(
+            text(f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} FOR VALUES {bounds}")
+        )
+    if stranded_months:
+        for month in stranded_months:
+            in_month = f"\"timestamp\" >= '{month}' AND \"timestamp\" < '{add_months(month, 1)}'"
+            connection.execute(text(f"INSERT INTO {table} SELECT * FROM {default_partition} WHERE {in_month}"))
+            connection.execute(text(f"DELETE FROM {default_partition} WHERE {in_month}"))
+        connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default_partition} DEFAULT"))
+
+    return [partition_name(table, month) for month in months]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the monthly partitions of the sample tables ahead of time")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with db_engine.begin() as connection:
+        for table in SAMPLE_TABLES:
+            if not is_partitioned_by_range(connection, table):
+                logger.info(f"{table} is not partitioned by month")
+                continue
+            created = extend_monthly_partitions(connection, table, months_ahead=args.months_ahead)
+            logger.info(f"Created {len(created)} partitions of {table}: {', '.join(created) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
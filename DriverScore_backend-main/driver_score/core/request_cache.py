@@ -0,0 +1,102 @@
+"""
+Request-scoped memoization of database lookups, and count of the queries run per request.
+
+A scope is opened for every API request (see `app.py`) and every upload pipeline execution (see `jobs.py`). Within
+it, the methods decorated with `request_cached` load their data at most once per key, e.g. the run metadata, the
+sample columns of a run and the route geometry, which are looked up by several services:
+
+    with request_scope() as scope:
+        await RunService(run_id).get_scores_by_direction()
+    scope.query_count
+
+The scope is held in a context variable, so it follows the request into the asyncio tasks it creates and into the
+functions it runs with `run_in_threadpool`, which copy the context. Threads started with `threading.Thread` do not:
+they run outside of the scope, uncached. Values are shared and callers must not mutate them. Code writing data read
+by cached lookups drops their results with `invalidate_request_cache`, so that the next lookups in the same scope
+load the written data. Outside of a scope, decorated methods are not cached.
+"""
+
+import functools
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+
+from driver_score.core.database import db_engine
+
+
+@dataclass
+class RequestScope:
+    cache: dict[Hashable, Any] = field(default_factory=dict)
+    query_count: int = 0
+
+
+_request_scope: ContextVar[RequestScope | None] = ContextVar("request_scope", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestScope]:
+    """Open a scope whose lookups are cached and queries counted, until exited."""
+    scope = RequestScope()
+    token = _request_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _request_scope.reset(token)
+
+
+def current_scope() -> RequestScope | None:
+    return _request_scope.get()
+
+
+def request_cached(key: Callable[..., Hashable]):
+    """
+    Cache the result of an async method in the current request scope.
+
+    Parameters:
+        key: Builds the cache key from the arguments of the method, e.g. `lambda self: self.run_id`. It is combined
+            with the qualified name of the method.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            scope = _request_scope.get()
+            if scope is None:
+                return await method(*args, **kwargs)
+
+            cache_key = (method.__qualname__, key(*args, **kwargs))
+            if cache_key not in scope.cache:
+                scope.cache[cache_key] = await method(*args, **kwargs)
+            return scope.cache[cache_key]
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_request_cache(*methods) -> None:
+    """
+    Drop the results of methods decorated with `request_cached` from the current scope, for every key, e.g. once the
+    data they read is written.
+
+    Usage:
+        invalidate_request_cache(RunService.get_run)
+    """
+    scope = _request_scope.get()
+    if scope is None:
+        return
+
+    names = {method.__qualname__ for method in methods}
+    for cache_key in [cache_key for cache_key in scope.cache if cache_key[0] in names]:
+        del scope.cache[cache_key]
+
+
+@event.listens_for(db_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    scope = _request_scope.get()
+    if scope is not None:
+        scope.query_count += 1
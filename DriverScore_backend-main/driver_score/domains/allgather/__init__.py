@@ -1,4 +1,4 @@
 """
 Responsible for receiving uploaded data from AllGather app and processing it.
-It DOES NOT contain any APIs with GET methods, only POST.
+Uploads are processed in the background, their progress is the only data exposed with GET methods.
 """
@@ -1,10 +1,10 @@
 import logging
 
-from fastapi import APIRouter, File, UploadFile, status
+from fastapi import APIRouter, File, HTTPException, UploadFile, status
 from tsidpy import TSID
 
-from ..model.service import DriverScoreModelService
-from ..run.service import RunService
+from .jobs import DuplicateUploadError, UploadJobService
+from .schemas import UploadJobSchema
 from .service import AllGatherService
 
 logger = logging.getLogger(__name__)
@@ -12,42 +12,62 @@ logger = logging.getLogger(__name__)
 router = APIRouter(dependencies=[])
 
 
-@router.post("/upload", status_code=status.HTTP_201_CREATED)
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED, response_model=UploadJobSchema)
 async def upload(file: UploadFile = File(...)):
     """
     Upload a compressed file (currently support `.zip`, `.tar` and `.tar.gz`) collected
     by AllGather app containing GPS, Calibration, Acceleration and Camera (optional)
     data for processing.
 
+    The file is queued and processed in the background, poll `GET /allgather/jobs/{run_id}` for its progress.
+
     - **file**: Compressed file collected by AllGather app (required)
 
     Returns:
-    - **filename**: Name of the uploaded file
-    - **content_type**: MIME type of the uploaded file
-    - **n_gps_samples**: Number of GPS samples processed from the file
+    - **run_id**: ID of the run created from the file
+    - **status**: Status of the upload job (`queued`)
+
+    Uploading a file again answers `409 Conflict` with the `run_id` of the previous upload, unless it failed.
     """
 
     # Generate tsid for run_id
     run_id = str(TSID.create())
 
-    # Persist smartphone data into database
     gps_service = AllGatherService(run_id=run_id)
-    timestamp_folder = await gps_service.extract_and_store_file(file=file)
-    await gps_service.upload_smartphone_data(filename=file.filename, timestamp_folder=timestamp_folder)
+    archive_path, content_digest = await gps_service.spool_uploaded_archive(file=file)
 
-    run_service = RunService(run_id=run_id)
-    gps_samples = await run_service.get_gps_samples()
-    imu_samples = await run_service.get_imu_samples()
+    # Reject a file uploaded again (e.g. a phone retrying) before it is processed. Concurrent uploads of the same
+    # file pass the check, all but the first are rejected when queued.
+    duplicate_run_id = await gps_service.find_duplicate_upload(content_digest)
+    if duplicate_run_id is None:
+        try:
+            return await UploadJobService(run_id=run_id).enqueue(
+                file_name=file.filename, archive_path=archive_path, content_digest=content_digest
+            )
+        except DuplicateUploadError as e:
+            duplicate_run_id = e.run_id
 
-    # Calculate driver scores and update database
-    ds_algo_service = DriverScoreModelService()
-    driver_scores = ds_algo_service.calculate_scores(gps_samples, imu_samples)
-    await ds_algo_service.persist_scores_into_db(run_id=run_id, scores=driver_scores)
+    archive_path.unlink(missing_ok=True)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "File already exists!", "run_id": duplicate_run_id},
+    )
 
-    # Create run-based road characteristics and update database
-    # ! TODO: run_based_RCs_to_db() must be called after persisting scores.
-    # ! This is not good and need to be fixed
-    await run_service.persist_run_based_RCs_to_db()
 
-    # Return statistics after persisting data
-    return {"filename": file.filename, "content_type": file.content_type, "n_gps_samples": len(gps_samples)}
+@router.get("/jobs/{run_id}", response_model=UploadJobSchema)
+async def get_upload_job(run_id: str):
+    """
+    Get the progress of an uploaded file.
+
+    - **run_id**: ID returned by `POST /allgather/upload` (required)
+
+    Returns:
+    - **status**: `queued`, `running`, `succeeded` or `failed`
+    - **current_stage**: Pipeline stage being run, or the last one run
+    - **stages**: Status, start and finish times and duration of every stage run so far
+    - **error**: Why the upload failed, if it did
+    """
+    job = await UploadJobService(run_id=run_id).get_job()
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No upload job for run {run_id}")
+    return job
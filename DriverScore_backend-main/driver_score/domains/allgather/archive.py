@@ -0,0 +1,186 @@
+"""
+Read-only access to uploaded AllGather archives without extracting them.
+
+The archive type is detected from its first bytes, the folder layout is read from the zip central directory or the
+tar headers, and members are opened as streams. Nothing is buffered in memory or extracted, so the cost of an upload
+does not grow with the size of the files we do not read (e.g. camera videos).
+
+A gzip stream cannot be read at random positions: indexing a `.tar.gz` decompresses it entirely, and opening a member
+located before the current position decompresses it again from the start. A `.tar.gz` is therefore decompressed once,
+into a temporary plain `.tar` file, which is then read like a `.tar` upload.
+"""
+
+import gzip
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+from typing import IO
+
+import magic
+
+from .constant import TAR_ARCHIVE_MIME_TYPES, ZIP_ARCHIVE_MIME_TYPES
+
+# Number of leading bytes handed to libmagic, enough to recognize zip, gzip and ustar headers
+ARCHIVE_HEADER_SIZE = 2048
+
+# Depth of a data file in `<timestamp>/<driver_id>/<imei>/<data_type>/<file>`
+DATA_FILE_DEPTH = 5
+
+# Size of the chunks a `.tar.gz` is decompressed by
+DECOMPRESS_BUFFER_SIZE = 1 << 20
+
+# Metadata added by archiving tools (e.g. macOS Finder) that is not part of the AllGather layout
+IGNORED_ARCHIVE_FOLDERS = {"__MACOSX"}
+
+
+class UnsupportedArchiveError(ValueError):
+    def __init__(self, mime_type: str) -> None:
+        super().__init__(f"Uploaded file is not a ZIP or TAR archive. Found {mime_type} instead!")
+        self.mime_type = mime_type
+
+
+def detect_archive_mime_type(fileobj: IO[bytes]) -> str:
+    """
+    Detect the MIME type of an archive from its first bytes, leaving the stream at its start.
+
+    Raises:
+        UnsupportedArchiveError: If the stream is not a supported zip or tar archive.
+    """
+    header = fileobj.read(ARCHIVE_HEADER_SIZE)
+    fileobj.seek(0)
+
+    mime_type = magic.from_buffer(header, mime=True)
+    if mime_type not in ZIP_ARCHIVE_MIME_TYPES and mime_type not in TAR_ARCHIVE_MIME_TYPES:
+        raise UnsupportedArchiveError(mime_type)
+    return mime_type
+
+
+class AllGatherArchive:
+    """
+    An uploaded AllGather archive (`.zip`, `.tar` or `.tar.gz`) following the
+    `<timestamp>/<driver_id>/<imei>/<data_type>/<file>.csv` layout.
+
+    Usage:
+        with AllGatherArchive(upload.file) as archive:
+            with archive.open_member(archive.data_folders["location"][0]) as stream:
+                ...
+    """
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        self.mime_type = detect_archive_mime_type(fileobj)
+
+        self._zip: zipfile.ZipFile | None = None
+        self._tar: tarfile.TarFile | None = None
+        # Decompressed copy of a `.tar.gz`
+        self._tar_file: IO[bytes] | None = None
+        if self.mime_type in ZIP_ARCHIVE_MIME_TYPES:
+            self._zip = zipfile.ZipFile(fileobj)
+            names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            if TAR_ARCHIVE_MIME_TYPES[self.mime_type] == "r:gz":
+                fileobj = self._tar_file = AllGatherArchive._decompress(fileobj)
+            # Random access mode only keeps the member headers in memory
+            self._tar = tarfile.open(fileobj=fileobj, mode="r:")
+            names = [member.name for member in self._tar.getmembers() if member.isfile()]
+
+        # Member names as stored in the archive, keyed by their normalized path (e.g. without a leading "./")
+        self._member_names = {
+            PurePosixPath(name): name for name in names if not AllGatherArchive._is_ignored(PurePosixPath(name))
+        }
+        self._data_folders: dict[str, list[PurePosixPath]] | None = None
+
+    def __enter__(self) -> "AllGatherArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the archive. The underlying upload stream is left open for its owner to close."""
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+        if self._tar_file is not None:
+            self._tar_file.close()
+
+    @property
+    def members(self) -> list[PurePosixPath]:
+        return list(self._member_names)
+
+    @property
+    def timestamp_folder(self) -> str:
+        return self._prefix.parts[0]
+
+    @property
+    def driver_id_folder(self) -> str:
+        return self._prefix.parts[1]
+
+    @property
+    def imei_folder(self) -> str:
+        return self._prefix.parts[2]
+
+    @property
+    def data_folders(self) -> dict[str, list[PurePosixPath]]:
+        """
+        Files of every `<data_type>` folder, keyed by folder name.
+
+        Raises:
+            ValueError: If the members do not share a single `<timestamp>/<driver_id>/<imei>` prefix or
+                are not located inside a data folder.
+        """
+        if self._data_folders is None:
+            prefix = self._prefix
+            data_folders: dict[str, list[PurePosixPath]] = {}
+            for member in self._member_names:
+                if len(member.parts) != DATA_FILE_DEPTH:
+                    raise ValueError(f"{member} is not located in a <timestamp>/<driver_id>/<imei>/<data_type> folder")
+                data_folders.setdefault(member.relative_to(prefix).parts[0], []).append(member)
+            self._data_folders = data_folders
+
+        return self._data_folders
+
+    def open_member(self, member: PurePosixPath) -> IO[bytes]:
+        """Open an archive member as a binary stream, without extracting it."""
+        name = self._member_names[member]
+        if self._zip is not None:
+            return self._zip.open(name)
+
+        stream = self._tar.extractfile(name)
+        if stream is None:
+            raise ValueError(f"{member} is not a regular file")
+        return stream
+
+    @property
+    def _prefix(self) -> PurePosixPath:
+        prefixes = {PurePosixPath(*member.parts[:3]) for member in self._member_names if len(member.parts) > 3}
+        if len(prefixes) != 1:
+            raise ValueError(
+                f"Expected a single <timestamp>/<driver_id>/<imei> folder, found {sorted(map(str, prefixes))}"
+            )
+        return next(iter(prefixes))
+
+    @staticmethod
+    def _decompress(fileobj: IO[bytes]) -> IO[bytes]:
+        """
+        Decompress a gzip stream into a temporary file, deleted once closed.
+
+        Raises:
+            tarfile.ReadError: If the stream is not valid gzip.
+        """
+        tar_file = tempfile.TemporaryFile()
+        try:
+            with gzip.GzipFile(fileobj=fileobj, mode="rb") as gzip_file:
+                shutil.copyfileobj(gzip_file, tar_file, DECOMPRESS_BUFFER_SIZE)
+        except (OSError, EOFError, zlib.error) as e:
+            tar_file.close()
+            raise tarfile.ReadError(f"Invalid gzip stream: {e}") from e
+        tar_file.seek(0)
+        return tar_file
+
+    @staticmethod
+    def _is_ignored(member: PurePosixPath) -> bool:
+        return any(part in IGNORED_ARCHIVE_FOLDERS or part.startswith(".") for part in member.parts)
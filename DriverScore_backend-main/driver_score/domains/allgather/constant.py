@@ -14,4 +14,35 @@ class CalibrationStatus(str, Enum):
     GOOD_CALIBRATION = "good_calibration"
 
 
-# TODO: Add supported zip format here
+# IMU columns rotated by the calibration transform, grouped by (x, y, z) triad
+CALIBRATED_IMU_TRIADS = (
+    ("acceleration_x_ms2", "acceleration_y_ms2", "acceleration_z_ms2"),
+    ("angular_velocity_x_rads", "angular_velocity_y_rads", "angular_velocity_z_rads"),
+    ("rotation_x_sin_theta_by_2", "rotation_y_sin_theta_by_2", "rotation_z_sin_theta_by_2"),
+)
+
+# Size of the chunks an upload is copied and hashed by
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Supported upload archives, detected from their leading bytes. Tar types map to their `tarfile.open` mode.
+ZIP_ARCHIVE_MIME_TYPES = {"application/zip"}
+TAR_ARCHIVE_MIME_TYPES = {
+    "application/gzip": "r:gz",
+    "application/x-gzip": "r:gz",
+    "application/x-tar": "r:",
+}
+
+
+class UploadJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class UploadStage(str, Enum):
+    """Stages of the upload pipeline, in the order they are run by the upload workers"""
+
+    INGEST = "ingest"
+    SCORE = "score"
+    ROAD_CHARACTERISTICS = "road_characteristics"
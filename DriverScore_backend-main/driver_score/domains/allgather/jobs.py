@@ -0,0 +1,402 @@
+"""
+Background processing of uploaded AllGather archives.
+
+`POST /allgather/upload` only saves the archive and queues an upload job, the pipeline (ingestion, scoring and
+run-based road characteristics) is run by the upload workers started with the application. The queue is the
+`upload_job` table: workers claim jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of API processes
+can share it without an external broker, and record the progress of every stage for `GET /allgather/jobs/{run_id}`.
+
+The worker processing a job holds a lease on it: claiming the job sets a new `claim_token`, and the worker reports a
+heartbeat every `upload_job_heartbeat_interval` seconds while it runs. A job whose heartbeat is older than
+`upload_job_stale_after` is claimed again by another worker, and its previous worker, whose token no longer matches,
+can then neither record its progress or outcome nor delete its archive.
+
+Stopping the workers cancels their jobs: a pipeline checks for cancellation before every stage, and a cancelled job is
+rolled back and queued again by its worker. A worker still inside a stage when the application exits is left to its
+lease, its job is claimed again once its heartbeat is stale.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from driver_score.core.database import get_db_session
+from driver_score.core.models import CollectedDataFile, UploadJob
+from driver_score.core.request_cache import request_scope
+from driver_score.settings import settings
+
+from ..model.service import DriverScoreModelService
+from ..run.service import RunService
+from ..tile.cache import tile_cache
+from .constant import UploadJobStatus, UploadStage
+from .schemas import UploadJobSchema, UploadStageSchema
+from .service import AllGatherService
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateUploadError(Exception):
+    def __init__(self, run_id: str) -> None:
+        super().__init__(f"File already uploaded as run {run_id}")
+        self.run_id = run_id
+
+
+class UploadJobCancelled(Exception):
+    """Raised before a pipeline stage once the processing of the job is cancelled."""
+
+
+class UploadJobService:
+    def __init__(self, run_id: str, claim_token: str | None = None, cancelled: threading.Event | None = None):
+        self.run_id = run_id
+        self.claim_token = claim_token
+        # Set to cancel the processing of the job before its next stage
+        self.cancelled = cancelled
+
+    async def enqueue(self, file_name: str, archive_path: Path, content_digest: str) -> UploadJobSchema:
+        """
+        Queue an uploaded archive for processing by the upload workers.
+
+        The duplicate check is atomic: a job of the same file queued or running meanwhile conflicts with the insert
+        (unique index `ux_upload_job_content_digest_in_progress`), and a job of the same file that succeeded
+        meanwhile has ingested it before leaving the running status.
+
+        Parameters:
+            file_name (str): The name of the uploaded file.
+            archive_path (Path): Location of the saved archive.
+            content_digest (str): SHA-256 of the uploaded file.
+
+        Returns:
+            UploadJobSchema: The queued job.
+
+        Raises:
+            DuplicateUploadError: If the file is being processed or was ingested, with the run ID of that upload.
+        """
+        try:
+            with get_db_session() as session:
+                job = UploadJob(
+                    run_id=self.run_id,
+                    file_name=file_name,
+                    archive_path=str(archive_path),
+                    content_digest=content_digest,
+                    status=UploadJobStatus.QUEUED.value,
+                    stages={},
+                    created_at=datetime.now(),
+                )
+                session.add(job)
+                session.flush()
+
+                ingested_run_id = session.execute(
+                    select(CollectedDataFile.run_id).where(CollectedDataFile.content_digest == content_digest)
+                ).scalar()
+                if ingested_run_id is not None:
+                    raise DuplicateUploadError(ingested_run_id)
+                return UploadJobSchema.model_validate(job)
+        except IntegrityError:
+            duplicate_run_id = await AllGatherService(run_id=self.run_id).find_duplicate_upload(content_digest)
+            if duplicate_run_id is None:
+                raise
+            raise DuplicateUploadError(duplicate_run_id)
+
+    async def get_job(self) -> UploadJobSchema | None:
+        with get_db_session() as session:
+            job = session.get(UploadJob, self.run_id)
+            return UploadJobSchema.model_validate(job) if job is not None else None
+
+    @staticmethod
+    def claim_next_job() -> UploadJobSchema | None:
+        """
+        Claim the oldest queued job, or a running job whose worker stopped reporting progress.
+
+        Rows locked by another worker are skipped, so concurrent workers never claim the same job.
+
+        Returns:
+            UploadJobSchema | None: The claimed job, now running with a new claim token, or None if there is nothing
+                to process.
+        """
+        stale_before = datetime.now() - timedelta(seconds=settings.UPLOAD_JOB_STALE_AFTER)
+        with get_db_session() as session:
+            job = (
+                session.query(UploadJob)
+                .filter(
+                    or_(
+                        UploadJob.status == UploadJobStatus.QUEUED.value,
+                        and_(UploadJob.status == UploadJobStatus.RUNNING.value, UploadJob.heartbeat_at < stale_before),
+                    )
+                )
+                .order_by(UploadJob.created_at)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+
+            now = datetime.now()
+            job.status = UploadJobStatus.RUNNING.value
+            job.current_stage = None
+            job.stages = {}
+            job.error = None
+            job.started_at = now
+            job.heartbeat_at = now
+            job.claim_token = uuid.uuid4().hex
+            session.flush()
+            return UploadJobSchema.model_validate(job)
+
+    @contextmanager
+    def stage(self, stage: UploadStage) -> Iterator[None]:
+        """
+        Record the progress and duration of a pipeline stage.
+
+        Raises:
+            UploadJobCancelled: If the processing of the job was cancelled, before the stage starts.
+
+        Usage:
+            with job_service.stage(UploadStage.SCORE):
+                ...
+        """
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise UploadJobCancelled(f"Upload job {self.run_id} was cancelled before stage {stage.value}")
+        started_at = datetime.now()
+        self._record_stage(stage, UploadStageSchema(status=UploadJobStatus.RUNNING, started_at=started_at))
+        try:
+            yield
+        except Exception:
+            self._record_stage(stage, UploadJobService._finished_stage(UploadJobStatus.FAILED, started_at))
+            raise
+        self._record_stage(stage, UploadJobService._finished_stage(UploadJobStatus.SUCCEEDED, started_at))
+
+    @contextmanager
+    def heartbeat(self, interval: float | None = None) -> Iterator[None]:
+        """
+        Report a heartbeat every `interval` seconds (`upload_job_heartbeat_interval` by default) from a timer thread,
+        so that the job is not considered stale while a long stage runs.
+
+        Usage:
+            with job_service.heartbeat():
+                ...
+        """
+        interval = settings.UPLOAD_JOB_HEARTBEAT_INTERVAL if interval is None else interval
+        stopped = threading.Event()
+
+        def beat() -> None:
+            while not stopped.wait(interval):
+                try:
+                    if not self._beat():
+                        logger.warning(f"Upload job {self.run_id} was claimed by another worker")
+                        return
+                except Exception:
+                    logger.exception(f"Could not report the heartbeat of upload job {self.run_id}")
+
+        thread = threading.Thread(target=beat, name=f"upload-heartbeat-{self.run_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def succeed(self) -> bool:
+        return self._finish(UploadJobStatus.SUCCEEDED)
+
+    def fail(self, error: str) -> bool:
+        return self._finish(UploadJobStatus.FAILED, error=error)
+
+    def requeue(self) -> bool:
+        """Queue the job again, e.g. when its worker is stopped before it finishes it."""
+        with get_db_session() as session:
+            job = self._get_claimed_job(session)
+            if job is None:
+                return False
+            job.status = UploadJobStatus.QUEUED.value
+            job.current_stage = None
+            job.claim_token = None
+            return True
+
+    def _beat(self) -> bool:
+        """Report a heartbeat, whether the job is still claimed by this worker."""
+        with get_db_session() as session:
+            result = session.execute(
+                update(UploadJob)
+                .where(UploadJob.run_id == self.run_id, UploadJob.claim_token == self.claim_token)
+                .values(heartbeat_at=datetime.now())
+            )
+            return result.rowcount > 0
+
+    def _get_claimed_job(self, session) -> UploadJob | None:
+        """The job, locked, if it is still claimed by this worker."""
+        return (
+            session.query(UploadJob)
+            .filter(UploadJob.run_id == self.run_id, UploadJob.claim_token == self.claim_token)
+            .with_for_update()
+            .one_or_none()
+        )
+
+    def _record_stage(self, stage: UploadStage, progress: UploadStageSchema) -> None:
+        with get_db_session() as session:
+            job = self._get_claimed_job(session)
+            if job is None:
+                logger.warning(f"Upload job {self.run_id} was claimed by another worker, its progress is not recorded")
+                return
+            # JSONB columns are not mutation-tracked, the dict is replaced for the update to be flushed
+            job.stages = {**job.stages, stage.value: progress.model_dump(mode="json")}
+            job.current_stage = stage.value
+            job.heartbeat_at = datetime.now()
+
+    def _finish(self, status: UploadJobStatus, error: str | None = None) -> bool:
+        """Record the outcome of the job, whether it was still claimed by this worker."""
+        with get_db_session() as session:
+            job = self._get_claimed_job(session)
+            if job is None:
+                logger.warning(f"Upload job {self.run_id} was claimed by another worker, its outcome is not recorded")
+                return False
+            job.status = status.value
+            job.error = error
+            job.finished_at = datetime.now()
+            job.heartbeat_at = job.finished_at
+            return True
+
+    @staticmethod
+    def _finished_stage(status: UploadJobStatus, started_at: datetime) -> UploadStageSchema:
+        finished_at = datetime.now()
+        return UploadStageSchema(
+            status=status,
+            started_at=started_at,
+            finished_at=finished_at,
+            duration_seconds=(finished_at - started_at).total_seconds(),
+        )
+
+
+async def run_upload_pipeline(job: UploadJobSchema, job_service: UploadJobService) -> None:
+    """
+    Ingest an uploaded archive, then score the run and create its run-based road characteristics.
+
+    All the stages share one session (unit of work): the run is committed once, after the last stage, and nothing
+    is left behind if a stage fails. The job progress is recorded in separate transactions to be visible meanwhile.
+    """
+    with get_db_session() as session:
+        with job_service.stage(UploadStage.INGEST):
+            gps_service = AllGatherService(run_id=job.run_id, session=session)
+            with (
+                Path(job.archive_path).open("rb") as fileobj,
+                await gps_service.open_uploaded_archive(fileobj) as archive,
+            ):
+                await gps_service.upload_smartphone_data(
+                    filename=job.file_name, archive=archive, content_digest=job.content_digest
+                )
+
+        run_service = RunService(run_id=job.run_id, session=session)
+        with job_service.stage(UploadStage.SCORE):
+            gps = await run_service.get_gps_columns()
+            imu = await run_service.get_imu_columns()
+
+            ds_algo_service = DriverScoreModelService(session=session)
+            driver_scores = ds_algo_service.calculate_score_columns(gps, imu)
+            await ds_algo_service.persist_scores_into_db(run_id=job.run_id, scores=driver_scores)
+
+        # ! TODO: run_based_RCs_to_db() must be called after persisting scores.
+        # ! This is not good and need to be fixed
+        with job_service.stage(UploadStage.ROAD_CHARACTERISTICS):
+            await run_service.persist_run_based_RCs_to_db()
+
+    # The tiles showing the samples of the run are outdated once it is committed
+    tile_cache.invalidate_run(job.run_id)
+
+
+def process_upload_job(job: UploadJobSchema, job_service: UploadJobService | None = None) -> None:
+    """
+    Run the pipeline of a claimed job and record its outcome. The saved archive is deleted afterwards, unless the job
+    was claimed by another worker meanwhile, which then processes the archive again, or it was cancelled, and is
+    queued again.
+    """
+    job_service = job_service or UploadJobService(run_id=job.run_id, claim_token=job.claim_token)
+    finished = False
+    try:
+        # Lookups shared by the stages (run, samples, route) are loaded once per execution
+        with request_scope() as scope, job_service.heartbeat():
+            asyncio.run(run_upload_pipeline(job, job_service))
+        logger.info(f"Upload job {job.run_id} ran {scope.query_count} queries")
+    except UploadJobCancelled:
+        # Nothing of the run was committed, the stages are run again by the next worker claiming the job
+        if job_service.requeue():
+            logger.info(f"Upload job {job.run_id} was cancelled and queued again")
+    except Exception as e:
+        logger.exception(f"Upload job {job.run_id} failed")
+        finished = job_service.fail(error=str(e.detail) if isinstance(e, HTTPException) else str(e))
+    else:
+        finished = job_service.succeed()
+    finally:
+        if finished:
+            Path(job.archive_path).unlink(missing_ok=True)
+
+
+class UploadJobWorkerPool:
+    """
+    Threads claiming and processing upload jobs until stopped.
+
+    Stopping the pool cancels the jobs being processed: they are queued again before their next stage, to be
+    processed from the start by the next worker claiming them. Jobs are only queued again by their own worker, once
+    their pipeline has returned, so that two workers never process a job at the same time.
+    """
+
+    def __init__(self, n_workers: int, poll_interval: float):
+        self.n_workers = n_workers
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # Jobs being processed, by worker thread
+        self._jobs: dict[str, UploadJobService] = {}
+        self._jobs_lock = threading.Lock()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"upload-worker-{i}", daemon=True) for i in range(self.n_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.n_workers} upload workers")
+
+    def stop(self, timeout: float | None = None) -> None:
+        # Also cancels the jobs being processed (see `UploadJobService.cancelled`)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        with self._jobs_lock:
+            for job_service in self._jobs.values():
+                logger.warning(
+                    f"Upload job {job_service.run_id} is still being processed, it will be queued again before its "
+                    "next stage, or claimed again once its heartbeat is stale"
+                )
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = UploadJobService.claim_next_job()
+            except Exception:
+                logger.exception("Could not claim an upload job")
+                job = None
+
+            if job is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+
+            logger.info(f"Processing upload job {job.run_id} ({job.file_name})")
+            job_service = UploadJobService(run_id=job.run_id, claim_token=job.claim_token, cancelled=self._stopping)
+            name = threading.current_thread().name
+            with self._jobs_lock:
+                self._jobs[name] = job_service
+            try:
+                process_upload_job(job, job_service)
+            finally:
+                with self._jobs_lock:
+                    self._jobs.pop(name, None)
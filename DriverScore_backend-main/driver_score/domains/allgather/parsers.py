@@ -0,0 +1,238 @@
+"""
+Typed readers for the CSV files collected by the AllGather app.
+
+Every file type has an explicit schema: only the listed columns are read, each with a fixed dtype, so pandas
+never has to infer types and unused columns are never materialized. IMU channels are stored as float32, which
+is the precision the phone sensors report them with; GPS columns stay float64.
+"""
+
+import csv
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import IO
+
+import numpy as np
+import pandas as pd
+
+from driver_score.settings import settings
+
+if settings.CSV_ENGINE == "pyarrow":
+    import pyarrow  # noqa: F401
+elif settings.CSV_ENGINE != "c":
+    raise ImportError(f"Support for CSV engine {settings.CSV_ENGINE} not implemented")
+
+ACCELERATION_CSV_DTYPES: dict[str, str] = {
+    "local_timestamp_milliseconds": "int64",
+    "accel_x_mps2": "float32",
+    "accel_y_mps2": "float32",
+    "accel_z_mps2": "float32",
+    "angvelocity_x_radps": "float32",
+    "angvelocity_y_radps": "float32",
+    "angvelocity_z_radps": "float32",
+    "rotation_x_sin_theta_by_2": "float32",
+    "rotation_y_sin_theta_by_2": "float32",
+    "rotation_z_sin_theta_by_2": "float32",
+    "yaw": "float32",
+    "pitch": "float32",
+    "roll": "float32",
+}
+
+# Note: the speed columns of the location file are written with a leading space by the app
+LOCATION_CSV_DTYPES: dict[str, str] = {
+    "timestamp_utc_local": "int64",
+    "latitude_dd": "float64",
+    "longitude_dd": "float64",
+    "altitude_m": "float64",
+    "bearing_deg": "float64",
+    "accuracy_m": "float64",
+    " speed_ms": "float64",
+    " speed_accuracy_ms": "float64",
+}
+
+# UTC offsets (time zones, DST) only change on quarter-hour boundaries
+UTC_OFFSET_BUCKET_MS = 15 * 60 * 1000
+
+# Some versions of the app write an orientation line before the acceleration CSV header
+ORIENTATION_HEADER_MARKER = "orientation"
+
+
+def read_acceleration_csv(source: str | os.PathLike | IO[bytes], engine: str | None = None) -> pd.DataFrame:
+    """
+    Read an AllGather `*_acc.csv` file with its fixed schema.
+
+    Parameters:
+        source: Path to the CSV file, or an already opened binary stream positioned at its start.
+        engine: pandas CSV engine, defaults to `settings.CSV_ENGINE`.
+
+    Returns:
+        pd.DataFrame: The columns of ACCELERATION_CSV_DTYPES, with their declared dtypes.
+    """
+    return _read_typed_csv(source, dtypes=ACCELERATION_CSV_DTYPES, engine=engine)
+
+
+def iter_acceleration_csv(source: str | os.PathLike | IO[bytes], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Read an AllGather `*_acc.csv` file with its fixed schema, `chunk_rows` rows at a time.
+
+    Only one chunk is held in memory at once, whatever the length of the recording. Chunks are always parsed
+    with the C engine, pyarrow cannot read a fixed number of rows at a time.
+
+    Parameters:
+        source: Path to the CSV file, or an already opened binary stream positioned at its start.
+        chunk_rows: Maximum number of rows of every chunk.
+
+    Yields:
+        pd.DataFrame: The columns of ACCELERATION_CSV_DTYPES, with their declared dtypes. The index continues
+            from one chunk to the next.
+    """
+    with _open_binary(source) as stream:
+        dtypes = ACCELERATION_CSV_DTYPES
+        names = _read_header(stream, dtypes=dtypes, name=_source_name(source))
+        with pd.read_csv(
+            stream, header=None, names=names, usecols=list(dtypes), engine="c", chunksize=chunk_rows
+        ) as reader:
+            for df in reader:
+                yield _cast(df, dtypes=dtypes, name=_source_name(source))
+
+
+def read_location_csv(source: str | os.PathLike | IO[bytes], engine: str | None = None) -> pd.DataFrame:
+    """
+    Read an AllGather `*_loc.csv` file with its fixed schema.
+
+    Parameters:
+        source: Path to the CSV file, or an already opened binary stream positioned at its start.
+        engine: pandas CSV engine, defaults to `settings.CSV_ENGINE`.
+
+    Returns:
+        pd.DataFrame: The columns of LOCATION_CSV_DTYPES, with their declared dtypes.
+    """
+    return _read_typed_csv(source, dtypes=LOCATION_CSV_DTYPES, engine=engine)
+
+
+def epoch_ms_to_datetime(epoch_ms: pd.Series) -> pd.Series:
+    """
+    Convert epoch milliseconds to naive local datetimes in one vectorized pass.
+
+    This is equivalent to `epoch_ms.apply(lambda x: datetime.fromtimestamp(x / 1000.0))`. The local UTC offset
+    is only looked up once per quarter hour covered by the data (offsets never change more often than that)
+    and then added to all samples at once.
+    """
+    values = epoch_ms.to_numpy(dtype=np.int64)
+    buckets, bucket_index = np.unique(values // UTC_OFFSET_BUCKET_MS, return_inverse=True)
+    offsets_ms = np.array([_local_utc_offset_ms(bucket * UTC_OFFSET_BUCKET_MS) for bucket in buckets], dtype=np.int64)
+
+    local_ms = values + offsets_ms[bucket_index.reshape(-1)]
+    return pd.Series(
+        local_ms.astype("datetime64[ms]").astype("datetime64[ns]"), index=epoch_ms.index, name=epoch_ms.name
+    )
+
+
+def _local_utc_offset_ms(epoch_ms: int) -> int:
+    timestamp = epoch_ms / 1000.0
+    local = datetime.fromtimestamp(timestamp)
+    utc = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+    return round((local - utc).total_seconds() * 1000)
+
+
+def _read_typed_csv(
+    source: str | os.PathLike | IO[bytes], dtypes: dict[str, str], engine: str | None = None
+) -> pd.DataFrame:
+    engine = engine or settings.CSV_ENGINE
+
+    with _open_binary(source) as stream:
+        names = _read_header(stream, dtypes=dtypes, name=_source_name(source))
+
+        if engine == "pyarrow":
+            return _read_csv_with_pyarrow(stream, names=names, dtypes=dtypes, name=_source_name(source))
+
+        # Casting after parsing is noticeably faster than passing the dtype mapping to the C parser
+        df = pd.read_csv(stream, header=None, names=names, usecols=list(dtypes), engine=engine)
+        return _cast(df, dtypes=dtypes, name=_source_name(source))
+
+
+def _read_header(stream: IO[bytes], dtypes: dict[str, str], name: str) -> list[str]:
+    """
+    Read the header line by hand so an optional orientation line can be skipped without reopening
+    or seeking the source, which lets the same readers consume archive member streams.
+
+    The header is parsed like the rows (quoted names may contain commas), after the byte order mark some
+    editors write at the start of the file.
+    """
+    header_line = stream.readline().decode("utf-8-sig")
+    if ORIENTATION_HEADER_MARKER in header_line:
+        header_line = stream.readline().decode("utf-8-sig")
+    names = next(csv.reader([header_line.rstrip("\r\n")]), [])
+
+    missing_columns = set(dtypes) - set(names)
+    if missing_columns:
+        raise ValueError(f"{name}: CSV file is missing required columns: {sorted(missing_columns)}")
+    return names
+
+
+def _cast(df: pd.DataFrame, dtypes: dict[str, str], name: str) -> pd.DataFrame:
+    """
+    Cast the parsed columns to their declared dtypes.
+
+    Raises:
+        ValueError: If an integer column (the timestamps) has empty or non-numeric cells, naming the file, the
+            column and the first rows concerned.
+    """
+    for column in _integer_columns(dtypes):
+        if np.issubdtype(df[column].dtype, np.integer):
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        invalid = values.isna() | (values != np.floor(values))
+        if invalid.any():
+            rows = (df.index[invalid][:5] + 1).tolist()
+            raise ValueError(
+                f"{name}: column {column.strip()} has {invalid.sum()} empty or invalid values, at data rows {rows}"
+            )
+        df[column] = values
+    return df.astype(dtypes, copy=False)
+
+
+def _integer_columns(dtypes: dict[str, str]) -> list[str]:
+    return [column for column, dtype in dtypes.items() if np.issubdtype(np.dtype(dtype), np.integer)]
+
+
+def _source_name(source: str | os.PathLike | IO[bytes]) -> str:
+    """Name of a CSV source in error messages: its path, or the name of an archive member stream."""
+    if isinstance(source, str | os.PathLike):
+        return os.fspath(source)
+    return str(getattr(source, "name", None) or "CSV file")
+
+
+def _read_csv_with_pyarrow(stream: IO[bytes], names: list[str], dtypes: dict[str, str], name: str) -> pd.DataFrame:
+    """pandas' pyarrow engine cannot combine explicit names with usecols, so pyarrow is called directly."""
+    from pyarrow import ArrowInvalid, from_numpy_dtype
+    from pyarrow import csv as pyarrow_csv
+
+    try:
+        table = pyarrow_csv.read_csv(
+            stream,
+            read_options=pyarrow_csv.ReadOptions(column_names=names),
+            convert_options=pyarrow_csv.ConvertOptions(
+                include_columns=list(dtypes),
+                column_types={column: from_numpy_dtype(np.dtype(dtype)) for column, dtype in dtypes.items()},
+            ),
+        )
+    except ArrowInvalid as e:
+        raise ValueError(f"{name}: {e}") from e
+
+    # Empty cells are null, which only the float columns can hold
+    for column in _integer_columns(dtypes):
+        if table.column(column).null_count:
+            raise ValueError(f"{name}: column {column.strip()} has {table.column(column).null_count} empty values")
+    return table.to_pandas()
+
+
+@contextmanager
+def _open_binary(source: str | os.PathLike | IO[bytes]) -> Iterator[IO[bytes]]:
+    """Yield a binary stream for a path or a stream, only closing what was opened here."""
+    if isinstance(source, str | os.PathLike):
+        with open(source, "rb") as stream:
+            yield stream
+    else:
+        yield source
@@ -1,6 +1,9 @@
 from datetime import datetime
 
+from pydantic import Field
+
 from ..common.schemas import OrmBaseModel
+from .constant import UploadJobStatus, UploadStage
 
 
 class GpsSampleSchema(OrmBaseModel):
@@ -25,3 +28,27 @@ class ImuSampleSchema(OrmBaseModel):
     pitch_rad: float
     yaw_rad: float
     roll_rad: float
+
+
+class UploadStageSchema(OrmBaseModel):
+    status: UploadJobStatus
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_seconds: float | None = None
+
+
+class UploadJobSchema(OrmBaseModel):
+    run_id: str
+    file_name: str | None = None
+    # Location of the spooled upload, only meaningful to the upload workers
+    archive_path: str = Field(exclude=True)
+    # Token of the worker processing the job, only meaningful to the upload workers
+    claim_token: str | None = Field(default=None, exclude=True)
+    content_digest: str | None = None
+    status: UploadJobStatus
+    current_stage: UploadStage | None = None
+    stages: dict[UploadStage, UploadStageSchema] = {}
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
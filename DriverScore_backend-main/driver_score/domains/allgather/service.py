@@ -1,89 +1,162 @@
+import hashlib
 import logging
 import tarfile
-import tempfile
 import zipfile
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import IO
 
 import geopandas as gpd
-import magic
 import numpy as np
 import pandas as pd
 from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from scipy.spatial.transform import Rotation
+from sqlalchemy import select, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
 
-from driver_score.core.database import db_engine, get_db_session
-from driver_score.core.models import CollectedDataFile, GpsSample, ImuSample, UploadLog
-from driver_score.settings import settings
+from driver_score.core.bulk import copy_dataframe
+from driver_score.core.database import get_db_session
+from driver_score.core.models import CollectedDataFile, GpsSample, ImuSample, UploadJob, UploadLog
+from driver_score.settings import DRIVER_SCORE_UPLOAD_DIR, settings
 
 from ..driver.service import DriverService
 from ..run.service import RunService
-from .constant import CalibrationStatus, CollectedDataType
+from .archive import AllGatherArchive, UnsupportedArchiveError, detect_archive_mime_type
+from .constant import (
+    CALIBRATED_IMU_TRIADS,
+    UPLOAD_CHUNK_SIZE,
+    CalibrationStatus,
+    CollectedDataType,
+    UploadJobStatus,
+)
+from .parsers import epoch_ms_to_datetime, iter_acceleration_csv, read_acceleration_csv, read_location_csv
 
 logger = logging.getLogger(__name__)
 
 
 class AllGatherService:
-    def __init__(self, run_id: str):
+    def __init__(self, run_id: str, session: Session | None = None):
         self.run_id = run_id
+        # Optional session whose transaction the whole upload runs in, see `upload_smartphone_data`
+        self.session = session
 
-    async def extract_and_store_file(self, file: UploadFile):
+    async def spool_uploaded_archive(self, file: UploadFile) -> tuple[Path, str]:
         """
-        Extracts and stores the contents of an uploaded file.
+        Saves an uploaded archive to the upload folder, where it waits to be processed by the upload workers.
+
+        Only the first bytes of the upload are checked here, the archive layout is validated when it is processed.
+        The SHA-256 digest of the file is computed while it is copied, to detect duplicate uploads without reading
+        it again.
 
         Args:
             file (UploadFile): The uploaded file.
 
         Returns:
-            str: The timestamp folder where the file was extracted to.
+            tuple[Path, str]: The location of the saved archive, named after the run ID, and its hex digest.
 
         Raises:
-            HTTPException: If the uploaded file is not a ZIP archive.
+            HTTPException: If the uploaded file is not a ZIP or TAR archive.
         """
-        contents = await file.read()
-
-        # Check if the MIME type is that of a ZIP file
-        mime_type = magic.from_buffer(contents, mime=True)
-        if mime_type not in [
-            "application/zip",
-            "application/gzip",
-            "application/x-gzip",
-        ]:
-            raise HTTPException(
-                status_code=400, detail=f"Uploaded file is not a ZIP archive. Found {mime_type} instead!"
-            )
+        try:
+            detect_archive_mime_type(file.file)
+        except UnsupportedArchiveError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        archive_path = DRIVER_SCORE_UPLOAD_DIR / self.run_id
+
+        def copy_upload() -> str:
+            digest = hashlib.sha256()
+            with archive_path.open("wb") as spooled_file:
+                while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    spooled_file.write(chunk)
+            return digest.hexdigest()
+
+        content_digest = await run_in_threadpool(copy_upload)
+        return archive_path, content_digest
+
+    async def find_duplicate_upload(self, content_digest: str) -> str | None:
+        """
+        Looks for a previous upload of the same file, either already ingested or still being processed.
+
+        Uploads whose processing failed are not duplicates, the file can be uploaded again.
+
+        Args:
+            content_digest (str): SHA-256 of the uploaded file, as returned by `spool_uploaded_archive`.
+
+        Returns:
+            str | None: The run ID of the previous upload, if any.
+        """
+        in_progress = [UploadJobStatus.QUEUED.value, UploadJobStatus.RUNNING.value]
+        query = union_all(
+            select(CollectedDataFile.run_id).where(CollectedDataFile.content_digest == content_digest),
+            select(UploadJob.run_id).where(
+                UploadJob.content_digest == content_digest, UploadJob.status.in_(in_progress)
+            ),
+        ).limit(1)
+
+        with get_db_session(self.session) as session:
+            return session.execute(query).scalar()
+
+    async def open_uploaded_archive(self, fileobj: IO[bytes]) -> AllGatherArchive:
+        """
+        Opens an uploaded archive for streaming ingestion, without reading it into memory or extracting it.
+
+        The archive type is detected from the first bytes of the upload and its folder layout is read from the zip
+        central directory or the tar headers.
 
-        timestamp_folder = AllGatherService._extract_zip_file(file=file, contents=contents, mime_type=mime_type)
-        return timestamp_folder
+        Args:
+            fileobj (IO[bytes]): The uploaded archive, opened in binary mode.
+
+        Returns:
+            AllGatherArchive: The opened archive, to be closed by the caller.
 
-    async def upload_smartphone_data(self, filename: str, timestamp_folder: Path) -> None:
+        Raises:
+            HTTPException: If the uploaded file is not a ZIP or TAR archive.
+        """
+        try:
+            return AllGatherArchive(fileobj)
+        except UnsupportedArchiveError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Corrupted archive. Detail: {e}")
+
+    async def upload_smartphone_data(
+        self, filename: str, archive: AllGatherArchive, content_digest: str | None = None
+    ) -> None:
         """
         Uploads smartphone data, processes it, updates the database, and logs processing status.
+        CSV files are parsed straight from the archive member streams.
+
+        When the service has a session, every row (driver, run, logs, collected file and samples) is written in its
+        transaction, so a failure leaves nothing behind once the owner of the session rolls it back.
 
         Args:
             filename (str): The name of the file being uploaded.
-            timestamp_folder (Path): The folder containing the uploaded file and its timestamp.
+            archive (AllGatherArchive): The uploaded archive.
+            content_digest (str | None): SHA-256 of the uploaded file, see `spool_uploaded_archive`.
 
         Returns:
             None
         """
         # Currently assuming user upload and collection is same, will change later
         # if collector user information is passed through zip
-        upload_file_created_on = self._get_file_created_on(timestamp_folder)
-        user_id = int(next(timestamp_folder.iterdir()).name)
+        try:
+            upload_file_created_on = self._get_file_created_on(archive.timestamp_folder)
+            user_id = int(archive.driver_id_folder)
+        except ValueError as e:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid folder structure. Detail: {e}")
 
         # Persist driver into DB
-        driver_service = DriverService(driver_id=user_id)
-        if (await driver_service.get_current_driver()) is None:
-            await driver_service.persist_driver_to_db()
+        await DriverService(driver_id=user_id, session=self.session).persist_driver_to_db()
 
         # Persist run into DB
-        run_service = RunService(run_id=self.run_id)
-        # TODO: Pass session into parameters list to have control over transaction.
-        # TODO: For example, we can rollback everything if a file is not uploaded successfully.
+        run_service = RunService(run_id=self.run_id, session=self.session)
         await run_service.persist_run_to_db(driver_id=user_id, start_time=upload_file_created_on)
 
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             db_upload_log = UploadLog(
                 uploaded_by=user_id,
                 uploaded_on=datetime.now(),
@@ -93,27 +166,16 @@ class AllGatherService:
             )
             session.add(db_upload_log)
 
-        if self._check_duplicate_upload(user_id, filename, upload_file_created_on):
-            with get_db_session() as session:
-                db_upload_log = UploadLog(
-                    uploaded_by=user_id,
-                    uploaded_on=datetime.now(),
-                    upload_status="DUPLICATE FILE",
-                    log_message="This file has already been uploaded and processed in the past",
-                    file_name=filename,
-                )
-                session.add(db_upload_log)
-
-            raise HTTPException(status.HTTP_409_CONFLICT, detail="File already exists!")
-
         # TODO: Update other fields of the Collected_Data_File table
         file_id = None
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             db_collected_file = CollectedDataFile(
                 # device_type=1,  # 1 for smartphone device
                 file_name=filename,
                 collected_by=user_id,
                 collected_on=upload_file_created_on,
+                content_digest=content_digest,
+                run_id=self.run_id,
                 # uploaded_by=user_id,
                 # uploaded_on=datetime.now(),
                 # proc_status="UPLOAD",
@@ -122,62 +184,52 @@ class AllGatherService:
             file_id = db_collected_file.file_id
 
         # ensuring uploaded zip file has correct folder structure
-        nan_imei_folder = self._check_uploaded_folder_structure(timestamp_folder, user_id, filename)
+        data_folders = self._check_uploaded_folder_structure(archive, user_id, filename)
 
         # Proccessing all of the data within the uploaded zip and calling the
-        # appropriate functions based on type of data (GPS, acceleration, etc)
+        # appropriate functions based on type of data (GPS, acceleration, etc).
+        # Calibration is read first because it is applied to the acceleration data.
         try:
-            calibration_status = CalibrationStatus.GOOD_CALIBRATION
-
-            for data_folder in nan_imei_folder.iterdir():
-                if data_folder.name == CollectedDataType.CALIBRATION.value:
-                    calibration_folder = data_folder
-                    # ! Cannot reuse timestamp because calibration is done before timer starts
-                    calibration_csv = next(calibration_folder.iterdir())
-
-                    if calibration_csv.exists():
-                        transform, flattened = AllGatherService._reformat_phone_calib_data(calibration_csv)
-                        if transform is None and flattened is None:
-                            logger.info("Improperly formatted transformation matrix")
-                            calibration_status = CalibrationStatus.IMPROPER_CALIBRATION
-                            continue
-                    else:
-                        calibration_status = CalibrationStatus.NO_CALIBRATION
-
-                if data_folder.name == CollectedDataType.CAMERA.value:
-                    continue
-
-                if data_folder.name == CollectedDataType.ACCELERATION.value:
-                    # open file and check to see if it has orientation header. If so skip the first line when uploading to pandas df
-                    acc_folder = data_folder
-                    timestamp = timestamp_folder.name
-                    acc_csv = acc_folder / f"{timestamp}_acc.csv"
-
-                    with open(acc_csv) as data_file:
-                        first_line = data_file.readline()
-                        skip_first = "orientation" in first_line
-                        df = pd.read_csv(acc_csv, skiprows=1) if skip_first else pd.read_csv(acc_csv)
-
-                    imu_df = self._reformat_phone_imu(df, file_id)
-                    imu_df["run_id"] = self.run_id
-
-                    if calibration_status == CalibrationStatus.GOOD_CALIBRATION:
-                        imu_df = self._apply_calibration_transform(transform, imu_df)
-
-                    imu_df.to_sql(ImuSample.__tablename__, con=db_engine, if_exists="append", index=False)
-
-                elif data_folder.name == CollectedDataType.LOCATION.value:
-                    location_folder = data_folder
-                    timestamp = timestamp_folder.name
-                    gps_csv = location_folder / f"{timestamp}_loc.csv"
-                    df = pd.read_csv(gps_csv)
-                    gdf = self._reformat_phone_gps(df)
-                    gdf.to_postgis(
-                        GpsSample.__tablename__,
-                        db_engine,
-                        if_exists="append",
-                        index=False,
-                    )
+            transform = None
+            calibration_status = CalibrationStatus.NO_CALIBRATION
+
+            if CollectedDataType.CALIBRATION.value in data_folders:
+                # ! Cannot reuse timestamp because calibration is done before timer starts
+                calibration_csv = data_folders[CollectedDataType.CALIBRATION.value][0]
+                with archive.open_member(calibration_csv) as stream:
+                    transform, flattened = AllGatherService._reformat_phone_calib_data(stream)
+
+                if transform is None and flattened is None:
+                    logger.info("Improperly formatted transformation matrix")
+                    calibration_status = CalibrationStatus.IMPROPER_CALIBRATION
+                else:
+                    calibration_status = CalibrationStatus.GOOD_CALIBRATION
+
+            if calibration_status != CalibrationStatus.GOOD_CALIBRATION:
+                transform = None
+
+            timestamp = archive.timestamp_folder
+            gps_csv = data_folders[CollectedDataType.LOCATION.value][0].with_name(f"{timestamp}_loc.csv")
+            with archive.open_member(gps_csv) as stream:
+                df = read_location_csv(stream)
+
+            gdf = self._reformat_phone_gps(df)
+
+            # The run is matched to its route, then directions along the route are computed once, the by-direction
+            # endpoints only filter on them
+            gdf = gdf.sort_values("timestamp")
+            await run_service.match_route(gdf)
+            segments = await run_service.segment_gps_samples(gdf.set_index("timestamp"))
+            gdf["lrs"] = segments["lrs"].to_numpy()
+            gdf["direction"] = segments["direction"].to_numpy()
+
+            # Raw samples of both sensors are loaded together, either all of them are persisted or none
+            acc_csv = data_folders[CollectedDataType.ACCELERATION.value][0].with_name(f"{timestamp}_acc.csv")
+            with get_db_session(self.session) as session, archive.open_member(acc_csv) as stream:
+                connection = session.connection()
+                self._copy_phone_imu(connection, stream, transform, file_id)
+                copy_dataframe(connection, GpsSample.__table__, gdf)
+            RunService.invalidate_lookups()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -198,43 +250,32 @@ class AllGatherService:
         # db.add(db_upload_log)
         # db.commit()
 
-    def _check_duplicate_upload(self, user_id: str, filename: str, timestamp: datetime) -> bool:
-        """Function for getting the created date of an uploaded file from the first"""
-        return False
-        with get_db_session() as session:
-            results = (
-                session.query(CollectedDataFile)
-                .filter(
-                    CollectedDataFile.collected_by == user_id,
-                    CollectedDataFile.file_name == filename,
-                    CollectedDataFile.collected_on == timestamp,
-                )
-                .all()
-            )
-            return bool(results)
-
-    def _get_file_created_on(self, folder: Path) -> datetime:
-        """Get the created date of an uploaded file from the first"""
+    def _get_file_created_on(self, timestamp_folder: str) -> datetime:
+        """Get the created date of an uploaded file from the name of its timestamp folder"""
         date_format = settings.COLLECTED_DATA_FOLDER_FORMAT
-        return datetime.strptime(str(folder.name), date_format)
+        return datetime.strptime(timestamp_folder, date_format)
 
-    def _check_uploaded_folder_structure(self, timestamp_folder: Path, user_id: str, filename: str) -> Path | None:
+    def _check_uploaded_folder_structure(
+        self, archive: AllGatherArchive, user_id: int, filename: str
+    ) -> dict[str, list[PurePosixPath]]:
+        """
+        Validates the `<timestamp>/<driver_id>/<imei>/<data_type>` layout from the archive listing.
+
+        Returns:
+            dict[str, list[PurePosixPath]]: The files of every data folder, keyed by folder name.
+        """
         try:
-            driver_id_folder = next(timestamp_folder.iterdir())
-            nan_imei_folder = next(driver_id_folder.iterdir())
+            data_folders = archive.data_folders
 
-            collected_data_folder_names = [data_folder.name for data_folder in nan_imei_folder.iterdir()]
-            if len(set(collected_data_folder_names).intersection({"acceleration", "location"})) != 2:
+            if len(set(data_folders).intersection({"acceleration", "location"})) != 2:
                 raise HTTPException(
                     status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail="Require AT LEAST acceleration and location folders!",
                 )
 
-            for data_folder in nan_imei_folder.iterdir():
-                len_data_folder = len(list(data_folder.iterdir()))
-
-                if len_data_folder != 1:
-                    with get_db_session() as session:
+            for data_folder, data_files in data_folders.items():
+                if len(data_files) != 1:
+                    with get_db_session(self.session) as session:
                         log_message = f"{data_folder} must only have EXACTLY ONE .csv file!"
                         db_upload_log = UploadLog(
                             uploaded_by=user_id,
@@ -248,20 +289,10 @@ class AllGatherService:
                     raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=log_message)
 
         except Exception as e:
-            # TODO: Replace with logger + logic seems weird, look into it later
-            print(str(e))
-            print("Error in verifying file structure of input")
-            print("Deleting collected file from DB")
+            logger.warning(f"Invalid folder structure in {filename}: {e}")
             raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid folder structure. Detail: {e}")
-            # if db_upload_log.upload_status == "Processing":
-            #     db_upload_log.upload_status = "ERROR"
-            #     db_upload_log.log_message = "An error has occured in verifying the file structure of the zip"
-            #     db.add(db_upload_log)
 
-            # db.delete(db_collected_file)
-            # db.commit()
-
-        return nan_imei_folder
+        return data_folders
 
     def _reformat_phone_gps(self, df):
         """
@@ -270,7 +301,6 @@ class AllGatherService:
         Also transforms input dataframe into geodataframe to include geometry column
         """
 
-        df = df.drop(["timestamp_utc_gps"], axis=1)
         df["run_id"] = self.run_id
         df = df.drop_duplicates(
             subset=[
@@ -297,11 +327,61 @@ class AllGatherService:
                 " speed_accuracy_ms": "vel_accuracy",
             }
         )
-        df["timestamp"] = df["timestamp"].apply(lambda x: datetime.fromtimestamp(x / 1000.0))
+        df["timestamp"] = epoch_ms_to_datetime(df["timestamp"])
         self._validate_data(df)
         gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs=4326)
         return gdf
 
+    def _copy_phone_imu(
+        self, connection: Connection, acc_csv: IO[bytes], transform: Rotation | None, file_id: int
+    ) -> int:
+        """
+        Reformats, calibrates and writes the IMU samples of an acceleration CSV file.
+
+        With `settings.IMU_CHUNK_ROWS` set, the file is processed `IMU_CHUNK_ROWS` rows at a time and every chunk
+        is written before the next one is read, so memory does not grow with the length of the recording, except
+        for the sorted timestamps already read (8 bytes per sample), carried from one chunk to the next to count
+        the duplicate timestamps of the whole file, wherever they are. The file is read at once otherwise.
+
+        Parameters:
+            connection: Connection whose transaction the samples are written in.
+            acc_csv: The acceleration CSV file, as a binary stream.
+            transform: The calibration rotation, or None to leave the samples as measured.
+            file_id: The ID of the file associated with the data.
+
+        Returns:
+            int: The number of IMU samples written.
+        """
+        chunk_rows = settings.IMU_CHUNK_ROWS
+        chunks = (
+            iter_acceleration_csv(acc_csv, chunk_rows=chunk_rows) if chunk_rows else [read_acceleration_csv(acc_csv)]
+        )
+
+        n_samples = 0
+        n_duplicates = 0
+        seen_timestamps = np.empty(0, dtype="datetime64[ns]")
+        for df in chunks:
+            imu_df = self._reformat_phone_imu(df, file_id)
+            if imu_df.empty:
+                continue
+
+            # Duplicates within the chunk, then timestamps of the chunk already read in a previous one
+            n_samples += len(imu_df)
+            timestamps = np.unique(imu_df["timestamp"].to_numpy(dtype="datetime64[ns]"))
+            n_duplicates += len(imu_df) - len(timestamps)
+            if len(seen_timestamps):
+                positions = np.minimum(np.searchsorted(seen_timestamps, timestamps), len(seen_timestamps) - 1)
+                n_duplicates += np.count_nonzero(seen_timestamps[positions] == timestamps)
+            seen_timestamps = np.union1d(seen_timestamps, timestamps)
+
+            imu_df["run_id"] = self.run_id
+            if transform is not None:
+                imu_df = self._apply_calibration_transform(transform, imu_df)
+            copy_dataframe(connection, ImuSample.__table__, imu_df)
+
+        self._validate_timestamps(n_samples, n_duplicates)
+        return n_samples
+
     def _reformat_phone_imu(self, df: pd.DataFrame, file_id: int) -> pd.DataFrame:
         """
         Formats the smartphone IMU data DataFrame by renaming columns and applying necessary conversions.
@@ -313,11 +393,6 @@ class AllGatherService:
         Returns:
         - pd.DataFrame: The formatted DataFrame after column renaming and timestamp conversion.
         """
-        df = df.drop(
-            ["timestamp_nanosecond", "sensor_timestamp_milliseconds", "bbi", "rotation_cos_theta_by_2"],
-            axis=1,
-            errors="ignore",
-        )
         # TODO: Fix file_id
         # df["file_id"] = file_id
 
@@ -336,15 +411,20 @@ class AllGatherService:
                 "roll": "roll_rad",
             }
         )
-        df["timestamp"] = df["timestamp"].apply(lambda x: datetime.fromtimestamp(x / 1000.0))
-        self._validate_data(df)
+        df["timestamp"] = epoch_ms_to_datetime(df["timestamp"])
         return df
 
     def _validate_data(self, df: pd.DataFrame) -> None:
         """
         Checking if the csv data is valid, or if it could have been corrupted by being edited in excel.
         """
-        if len(df["timestamp"]) - len(df["timestamp"].drop_duplicates()) >= len(df["timestamp"]) * 0.5:
+        self._validate_timestamps(len(df["timestamp"]), len(df["timestamp"]) - len(df["timestamp"].drop_duplicates()))
+
+    def _validate_timestamps(self, n_samples: int, n_duplicates: int) -> None:
+        """
+        Rejects data where at least half of the timestamps are duplicates, as left by editing the csv in excel.
+        """
+        if n_duplicates >= n_samples * 0.5:
             log_message = "Acceleration/IMU data or location/GPS data is not present in zip file"
             # with get_db_session() as session:
             #     # TODO: Update later. Probably will need to store user_id and file_name as attributes for log
@@ -358,12 +438,15 @@ class AllGatherService:
             #     session.add(db_upload_log)
             raise ValueError(log_message)
 
-    def _apply_calibration_transform(self, transform, imu_df):
+    def _apply_calibration_transform(self, transform: Rotation, imu_df: pd.DataFrame) -> pd.DataFrame:
         """
         Applies a calibration transform to the given inertial measurement unit (IMU) data frame.
 
+        The acceleration, angular velocity and rotation vector triads of every sample are stacked into a single
+        (3 * n_samples, 3) array so the whole run is rotated by one call to `Rotation.apply`.
+
         Parameters:
-            transform: The calibration transformation matrix.
+            transform: The calibration rotation.
             imu_df: The IMU data frame containing columns: acceleration_x_ms2, acceleration_y_ms2, acceleration_z_ms2,
                      angular_velocity_x_rads, angular_velocity_y_rads, angular_velocity_z_rads,
                      rotation_x_sin_theta_by_2, rotation_y_sin_theta_by_2, rotation_z_sin_theta_by_2.
@@ -371,50 +454,11 @@ class AllGatherService:
         Returns:
             The IMU data frame with the calibration transform applied.
         """
-        imu_df[["acceleration_x_ms2", "acceleration_y_ms2", "acceleration_z_ms2"]] = imu_df.apply(
-            lambda x: AllGatherService._matrix_transform(
-                x["acceleration_x_ms2"], x["acceleration_y_ms2"], x["acceleration_z_ms2"], transform
-            ),
-            axis=1,
-            result_type="expand",
-        )
-
-        imu_df[["angular_velocity_x_rads", "angular_velocity_y_rads", "angular_velocity_z_rads"]] = imu_df.apply(
-            lambda x: AllGatherService._matrix_transform(
-                x["angular_velocity_x_rads"], x["angular_velocity_y_rads"], x["angular_velocity_z_rads"], transform
-            ),
-            axis=1,
-            result_type="expand",
-        )
-
-        imu_df[["rotation_x_sin_theta_by_2", "rotation_y_sin_theta_by_2", "rotation_z_sin_theta_by_2"]] = imu_df.apply(
-            lambda x: AllGatherService._matrix_transform(
-                x["rotation_x_sin_theta_by_2"],
-                x["rotation_y_sin_theta_by_2"],
-                x["rotation_z_sin_theta_by_2"],
-                transform,
-            ),
-            axis=1,
-            result_type="expand",
-        )
+        columns = [column for triad in CALIBRATED_IMU_TRIADS for column in triad]
+        vectors = imu_df[columns].to_numpy(dtype=np.float64).reshape(-1, 3)
+        imu_df[columns] = transform.apply(vectors).reshape(len(imu_df), len(columns))
         return imu_df
 
-    @staticmethod
-    def _matrix_transform(x, y, z, transform):
-        """
-        Applies a matrix transformation to the input x, y, z coordinates using the provided transform matrix.
-
-        Parameters:
-            x: The x coordinate.
-            y: The y coordinate.
-            z: The z coordinate.
-            transform: The transformation matrix.
-
-        Returns:
-            A list of transformed coordinates.
-        """
-        return list(transform.apply(np.array([x, y, z])))
-
     @staticmethod
     def _reformat_phone_calib_data(calibration_csv):
         def get_local_z_vects(calibration_file: str) -> tuple[np.ndarray, np.ndarray]:
@@ -447,27 +491,3 @@ class AllGatherService:
             return None, None
 
         return transform, flattened
-
-    @staticmethod
-    def _extract_zip_file(file: UploadFile, contents: bytes, mime_type: str) -> Path:
-        temp_dir_path = Path(tempfile.mkdtemp())
-
-        # Write the uploaded file to a temporary file within the temp directory
-        temp_file_path = temp_dir_path / str(file.filename)
-        with open(str(temp_file_path), "wb") as temp_file:
-            temp_file.write(contents)
-
-        # Extract the .tar.gz file
-        if mime_type in ["application/gzip", "application/x-gzip"]:
-            with tarfile.open(str(temp_file_path), "r:gz") as tar:
-                tar.extractall(path=temp_dir_path)
-
-        if mime_type in ["application/zip"]:
-            with zipfile.ZipFile(str(temp_file_path), "r") as zip_ref:
-                zip_ref.extractall(temp_dir_path)
-
-        # Delete temp file
-        temp_file_path.unlink()
-
-        # Move up one more leve
-        return next(temp_dir_path.iterdir())
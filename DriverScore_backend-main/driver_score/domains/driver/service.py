@@ -1,3 +1,6 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
 from driver_score.core.database import get_db_session
 from driver_score.core.models import Driver, Run
 
@@ -5,12 +8,14 @@ from ..run.schemas import RunSchema
 
 
 class DriverService:
-    def __init__(self, driver_id: int) -> None:
+    def __init__(self, driver_id: int, session: Session | None = None) -> None:
         self.driver_id = driver_id
+        # Optional session whose transaction all the queries of this service run in
+        self.session = session
 
     async def persist_driver_to_db(self) -> None:
         """
-        Persist a driver to the database.
+        Persist a driver to the database, unless it already exists.
 
         Args:
             driver_id (int): The ID of the driver to be persisted.
@@ -18,15 +23,17 @@ class DriverService:
         Returns:
             None: This function does not return anything.
 
-        This function creates a new `Driver` object with the given `driver_id` and adds it to the database session.
+        This function upserts a `Driver` row with the given `driver_id` in a single statement
+        (`INSERT ... ON CONFLICT DO NOTHING`), so it does not need to be looked up first.
 
         Example:
             >>> driver_service = DriverService(12345)
             >>> await driver_service.persist_driver_to_db()
         """
-        with get_db_session() as session:
-            driver = Driver(driver_id=self.driver_id)
-            session.add(driver)
+        with get_db_session(self.session) as session:
+            session.execute(
+                insert(Driver).values(driver_id=self.driver_id).on_conflict_do_nothing(index_elements=["driver_id"])
+            )
 
     async def get_current_driver(self) -> Driver | None:
         """
@@ -43,12 +50,12 @@ class DriverService:
             >>> print(driver.name)
             John Doe
         """
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             driver = session.query(Driver).filter(Driver.driver_id == self.driver_id).first()
             return driver
 
     async def get_runs(self) -> list[RunSchema]:
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             filters = [Run.driver_id == self.driver_id]
             runs = session.query(Run).filter(*filters).all()
 
@@ -1,19 +1,22 @@
 import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
 
+from driver_score.core.bulk import replace_dataframe
+from driver_score.core.columnar import columns_to_models
 from driver_score.core.database import get_db_session
 from driver_score.core.models import Score
 
-from ..allgather.schemas import GpsSampleSchema, ImuSampleSchema
 from .schemas import DriverScoreInSchema
 
 
 class DriverScoreModelService:
-    def __init__(self, window_length: int = 10):
+    def __init__(self, window_length: int = 10, session: Session | None = None):
         self.window_length = window_length
+        # Optional session whose transaction the scores are persisted in
+        self.session = session
 
-    def calculate_scores(
-        self, gps_samples: list[GpsSampleSchema], imu_samples: list[ImuSampleSchema]
-    ) -> list[DriverScoreInSchema]:
+    def calculate_scores(self, gps: dict[str, np.ndarray], imu: dict[str, np.ndarray]) -> list[DriverScoreInSchema]:
         """
         get the run data from db
 
@@ -21,31 +24,43 @@ class DriverScoreModelService:
 
         resample and perpare data (get IMU and GPS and RC in the same frquency)
 
-        loop over all GPS points, and invoke calculate_score
-        becase calculate_score may require multiple data points (n data point)
-        each loop will provide the n data points to the function
+        score all GPS points at once, see `calculate_score_columns`
+
+        `gps` and `imu` are the columns of the GPS samples of the run and of its IMU samples resampled onto them
+        (see `RunService.get_gps_columns` and `RunService.get_imu_columns`).
         """
+        return columns_to_models(DriverScoreInSchema, self.calculate_score_columns(gps, imu))
 
-        n_samples = len(gps_samples)
-        scores: list[DriverScoreInSchema | None] = [None] * n_samples
+    def calculate_score_columns(self, gps: dict[str, np.ndarray], imu: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """
+        Score every GPS sample of a run, over whole arrays.
 
-        for i in range(self.window_length, n_samples):
-            # get input_data using a rolling window.
-            velocities_in_window = [gps_sample.velocity for gps_sample in gps_samples[i - 10 : i]]
-            acc_in_window = [
-                (imu_sample.acceleration_x_ms2, imu_sample.acceleration_y_ms2, imu_sample.acceleration_z_ms2)
-                for imu_sample in imu_samples[i - 10 : i]
-            ]
-            score = DriverScoreModelService._calculate_score(vel=velocities_in_window, acc=acc_in_window)
-            scores[i] = DriverScoreInSchema(timestamp=gps_samples[i].timestamp, score=score)
+        The score of a sample is computed from the first sample of the `window_length` samples preceding it (see
+        `_calculate_scores`), and the first `window_length` samples, which have no full window, get the score of the
+        next one.
 
+        Returns:
+            dict[str, np.ndarray]: The "timestamp" and "score" of every GPS sample.
+        """
+        timestamps = gps["timestamp"]
+        n_samples = len(timestamps)
+        if n_samples <= self.window_length:
+            raise ValueError(f"At least {self.window_length + 1} GPS samples are required to score a run")
+
+        accelerations = np.column_stack(
+            [imu["acceleration_x_ms2"], imu["acceleration_y_ms2"], imu["acceleration_z_ms2"]]
+        )
+        window_starts = slice(0, n_samples - self.window_length)
+        window_scores = DriverScoreModelService._calculate_scores(
+            vel=gps["velocity"][window_starts], acc=accelerations[window_starts]
+        )
+
+        scores = np.empty(n_samples)
+        scores[self.window_length :] = window_scores
         # ? Backfill the first window_len scores
-        nearest_score = scores[self.window_length].score
-        for i in range(self.window_length):
-            timestamp = gps_samples[i].timestamp
-            scores[i] = DriverScoreInSchema(timestamp=timestamp, score=nearest_score)
+        scores[: self.window_length] = window_scores[0]
 
-        return scores
+        return {"timestamp": timestamps, "score": scores}
 
     @staticmethod
     def _calculate_score(acc: list, vel: list, gyro: list = None, RC: list = None, VC=0.0, dt=1) -> float:
@@ -102,8 +117,58 @@ class DriverScoreModelService:
 
         return Score
 
-    async def persist_scores_into_db(self, run_id: str, scores: list[DriverScoreInSchema]) -> None:
-        with get_db_session() as session:
-            for score in scores:
-                score = Score(run_id=run_id, timestamp=score.timestamp, score=score.score)
-                session.add(score)
+    @staticmethod
+    def _calculate_scores(acc: np.ndarray, vel: np.ndarray) -> np.ndarray:
+        """
+        Vectorized `_calculate_score` of single samples, with the same results.
+
+        Parameters:
+        - acc (np.ndarray): n x 3 IMU's acceleration
+        - vel (np.ndarray): n GPS's velocity
+
+        Returns:
+        np.ndarray: n scores, NaN where the velocity is NaN.
+        """
+        # Acc limited, asssume on the horizontal plane
+        V = vel * 2.2369  # to mph
+
+        Fd_x = 4 * (10**-5) * V * V - 0.0064 * V + 0.6701  # X direction skidding Friction
+        Fs_m_x = 1 * (10**-5) * V * V - 0.0019 * V + 0.7507  # X direction maximum Friction (-2StDev)
+        Fs_M_x = -2 * (10**-6) * V * V - 0.0018 * V + 1.1391  # X direction maximum Friction (+2StDev)
+        Fd_y = 6 * (10**-6) * V * V - 0.0025 * V + 0.6449  # Y direction skidding Friction
+        Fs_m_y = -1 * (10**-6) * V * V - 0.0009 * V + 0.614  # Y direction maximum Friction (-2StDev)
+        Fs_M_y = 2 * (10**-5) * V * V - 0.0039 * V + 0.9676  # Y direction maximum Friction (+2StDev)
+
+        # Every branch is evaluated for every sample, the divisions of the branches not taken are discarded
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # No RC Input
+            ax = np.abs(acc[:, 0] / acc[:, 2])
+            ay = np.abs(acc[:, 1] / acc[:, 2])
+            # float_power calls pow() like the scalar `**` does, while `**` on arrays squares, which can round the
+            # last bit differently
+            Score_d = np.sqrt(np.float_power(ax / Fd_x, 2) + np.float_power(ay / Fd_y, 2))
+            Score_m = np.sqrt(np.float_power(ax / Fs_m_x, 2) + np.float_power(ay / Fs_m_y, 2))
+            Score_M = np.sqrt(np.float_power(ax / Fs_M_x, 2) + np.float_power(ay / Fs_M_y, 2))
+            Score = np.select(
+                [Score_d < 1, Score_m < 1, Score_M < 1],
+                [
+                    100 - 50 * Score_d,
+                    50 - 25 * (Score_d - 1) / (Score_d / Score_m - 1),
+                    25 - 25 * (Score_m - 1) / (Score_m / Score_M - 1),
+                ],
+                default=(Score_M - 1) * 100,
+            )
+
+        Score[np.isnan(V)] = np.nan
+        return Score
+
+    async def persist_scores_into_db(self, run_id: str, scores: dict[str, np.ndarray]) -> None:
+        """
+        Persist the scores of a run, as computed by `calculate_score_columns`.
+
+        The scores of a run processed again replace all the ones stored, see `replace_dataframe`. NaN scores are
+        stored as NULL, which the score columns read back as NaN.
+        """
+        score_df = pd.DataFrame({"run_id": run_id, "timestamp": scores["timestamp"], "score": scores["score"]})
+        with get_db_session(self.session) as session:
+            replace_dataframe(session.connection(), Score.__table__, score_df, run_id=run_id)
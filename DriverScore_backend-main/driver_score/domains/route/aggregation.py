@@ -0,0 +1,57 @@
+"""
+Aggregation of per-sample values (e.g. scores) over intervals of linear reference (LRS) along a route, e.g. its curves
+and the tangents between them.
+
+Samples and intervals are joined on their LRS rather than on their geometries: the samples are sorted by LRS once, and
+the samples of every interval are found with two binary searches, so that aggregating n samples over m intervals costs
+O((n + m) log n) instead of one spatial query per interval.
+
+A line and its projection have the same vertices, and LRS along a segment are proportional to its length in both, so
+LRS in degrees along a route (e.g. `pc_lrs`) are converted to feet along its projected centerline (e.g.
+`road_characteristic.gps_lrs`) by interpolating between the LRS of their vertices:
+
+    np.interp(lrs, vertex_lrs(route.geometry), vertex_lrs(route.projected_geometry))
+"""
+
+import numpy as np
+import shapely
+from shapely import LineString
+
+
+def interval_means(
+    lrs: np.ndarray, values: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of the values of the samples within every interval of LRS, bounds included.
+
+    Intervals may overlap, a sample then counts in all of them. Samples whose LRS or value is NaN are ignored.
+
+    Parameters:
+        lrs: (n,) LRS of the samples, in any order.
+        values: (n,) values of the samples.
+        starts: (m,) start LRS of the intervals.
+        ends: (m,) end LRS of the intervals, in the same unit as `lrs`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (m,) means, NaN for intervals without samples, and the (m,) sample counts.
+    """
+    known = ~(np.isnan(lrs) | np.isnan(values))
+    order = np.argsort(lrs[known], kind="stable")
+    sorted_lrs = lrs[known][order]
+    cumulative_values = np.concatenate([[0.0], np.cumsum(values[known][order])])
+
+    first = np.searchsorted(sorted_lrs, starts, side="left")
+    last = np.searchsorted(sorted_lrs, ends, side="right")
+    counts = np.maximum(last - first, 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(
+            counts > 0, (cumulative_values[np.maximum(last, first)] - cumulative_values[first]) / counts, np.nan
+        )
+    return means, counts
+
+
+def vertex_lrs(line: LineString) -> np.ndarray:
+    """(n,) LRS of the n vertices of a line, i.e. its 2D length up to every vertex."""
+    coordinates = shapely.get_coordinates(line)
+    return np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(coordinates, axis=0).T))])
@@ -22,7 +22,7 @@ async def upload(file: UploadFile):
     route_id = file.filename.split(".")[0]
     service = RouteService(route_id=route_id)
 
-    dissolved_route_file_obj = io.BytesIO(file.file.read())
+    dissolved_route_file_obj = io.BytesIO(await file.read())
     await service.persist_route_to_db(dissolved_route_file_obj)
 
 
@@ -51,7 +51,8 @@ async def get_RCs(run_id: str) -> dict[DrivingDirection, list[RouteBasedRCSchema
         list[RoadCharacteristicSchema]: A list of road characteristics for the run.
     """
     # Building a score GeoDataFrame
-    driver_scores = await RunService(run_id).get_scores_by_direction()
+    run_service = RunService(run_id)
+    driver_scores = await run_service.get_scores_by_direction()
 
     def get_score_gdf_with_direction(
         driver_scores: dict[DrivingDirection, DriverScoreOutSchema], direction: DrivingDirection
@@ -67,6 +68,8 @@ async def get_RCs(run_id: str) -> dict[DrivingDirection, list[RouteBasedRCSchema
                 "geometry": geometry,
                 "score": scores,
                 "timestamp": timestamps,
+                # LRS of the samples along the route in feet, None where unknown
+                "lrs": driver_scores_with_direction.properties.lrs,
                 "direction": [direction] * len(scores),
             },
             crs="EPSG:4326",
@@ -80,10 +83,8 @@ async def get_RCs(run_id: str) -> dict[DrivingDirection, list[RouteBasedRCSchema
         driver_scores=driver_scores, direction=DrivingDirection.DECREASING
     )
 
-    # Get road characteristics given the score GeoDataFrame
-    # TODO: Mock
-    route_id = "SR11"
-    route_service = RouteService(route_id=route_id)
+    # Get road characteristics given the score GeoDataFrame, along the route the run was matched to
+    route_service = RouteService(route_id=await run_service.get_route_id())
     inc_RCs = await route_service.get_route_based_RCs(score_gdf=scores_inc_direction_gdf)
     dec_RCs = await route_service.get_route_based_RCs(score_gdf=scores_dec_direction_gdf)
     return {DrivingDirection.INCREASING: inc_RCs, DrivingDirection.DECREASING: dec_RCs}
@@ -0,0 +1,367 @@
+"""
+In-process cache of the routes: decoded centerlines, their projected versions, their curve inventories and the
+splines fitted to them.
+
+Routes change only when `/routes/upload` or `/routes/curves/upload` is called, so every route is loaded from the
+database once, when the application starts (`warm_up`) or when it is first looked up, and then served from memory.
+The upload endpoints invalidate the route they change. The cache is per process: other API processes sharing the
+database keep serving the previous version of a changed route until they are restarted.
+
+Fitting a spline to a route is expensive, so fitted splines are also persisted in the `route_spline_fit` table, keyed
+by a hash of the projected route geometry and the fit parameters: a route is fitted once, not once per process start,
+and a changed route gets a new fit. Likewise, the curvature profile of a route (see `curve/profile.py`) is computed
+when it is uploaded, stored in the `route_curvature_profile` table, and computed again if its route changed. The
+segmentation of a route into curves and tangents (see `segmentation.py`) is computed when the route or its curves are
+uploaded, and stored in the `route_segment` table.
+
+Runs are matched to the route they were driven on with a spatial index of every route (see `matching.py`), built
+from the cached routes on its first use and again after a route is invalidated.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import geoalchemy2
+import geopandas as gpd
+import numpy as np
+import shapely
+from fastapi import HTTPException, status
+from shapely import LineString
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from driver_score.core.database import get_db_session
+from driver_score.core.models import (
+    CurveInventory,
+    DissolvedRoute,
+    RouteCurvatureProfile,
+    RouteSegment,
+    RouteSplineFit,
+)
+from driver_score.settings import settings
+
+from .curve.profile import CurvatureProfile
+from .curve.service import RouteSpline
+from .matching import RouteIndex
+from .schema import RcType
+from .segmentation import RouteSegments
+
+logger = logging.getLogger(__name__)
+
+# NAD83 / Georgia East (US survey feet), the CRS the curvature of the routes is computed in
+PROJECTED_CRS = "EPSG:2239"
+
+CURVE_COLUMNS = [column.key for column in CurveInventory.__table__.columns]
+
+
+@dataclass(frozen=True)
+class CachedRoute:
+    route_id: str
+    # Centerline in EPSG:4326, prepared for fast predicates (intersects, contains, ...)
+    geometry: LineString
+    # Centerline in PROJECTED_CRS, prepared as well
+    projected_geometry: LineString
+    # Curve inventory of the route, see `RouteCache.get_curves` for a copy callers can modify
+    curves: gpd.GeoDataFrame
+    # SHA-256 of the projected centerline (WKB), identifies the splines fitted to it
+    geometry_hash: str
+
+
+class RouteCache:
+    def __init__(self) -> None:
+        self._routes: dict[str, CachedRoute] = {}
+        self._splines: dict[tuple[str, int, float], RouteSpline] = {}
+        self._curvature_profiles: dict[str, CurvatureProfile] = {}
+        self._segments: dict[str, RouteSegments] = {}
+        self._route_index: RouteIndex | None = None
+        # Serializes loads, so that concurrent lookups of a missing route query the database once. Reentrant, as
+        # loading a curvature profile can load a spline, and loading segments a route.
+        self._lock = threading.RLock()
+
+    def get(self, route_id: str) -> CachedRoute:
+        """Get a route, loading it from the database if it is not cached."""
+        route = self._routes.get(route_id)
+        if route is not None:
+            return route
+
+        with self._lock:
+            route = self._routes.get(route_id)
+            if route is None:
+                route = self._routes[route_id] = self._load(route_id)
+        return route
+
+    def get_curves(self, route_id: str) -> gpd.GeoDataFrame:
+        return self.get(route_id).curves.copy()
+
+    def get_spline(self, route_id: str, spline_order: int = 3, smoothing_factor: float = 3) -> RouteSpline:
+        """
+        Get the spline fitted to the projected centerline of a route, fitting and persisting it if it never was.
+
+        Curvatures computed with it are in 1/ft, and points must be in PROJECTED_CRS.
+        """
+        route = self.get(route_id)
+        key = (route.geometry_hash, spline_order, float(smoothing_factor))
+        spline = self._splines.get(key)
+        if spline is not None:
+            return spline
+
+        with self._lock:
+            spline = self._splines.get(key)
+            if spline is None:
+                spline = self._splines[key] = self._load_spline(route, spline_order, float(smoothing_factor))
+        return spline
+
+    def get_curvature_profile(self, route_id: str) -> CurvatureProfile:
+        """Get the curvature profile of a route, computing and persisting it if it is missing or outdated."""
+        profile = self._curvature_profiles.get(route_id)
+        if profile is not None:
+            return profile
+
+        with self._lock:
+            profile = self._curvature_profiles.get(route_id)
+            if profile is None:
+                profile = self._curvature_profiles[route_id] = self._load_curvature_profile(self.get(route_id))
+        return profile
+
+    def update_curvature_profile(self, route_id: str) -> CurvatureProfile:
+        """Compute and persist the curvature profile of a route, e.g. when it is uploaded."""
+        with self._lock:
+            route = self.get(route_id)
+            profile = self._curvature_profiles[route_id] = self._compute_curvature_profile(route)
+        return profile
+
+    def get_segments(self, route_id: str) -> RouteSegments:
+        """Get the curves and tangents of a route, computing and persisting them if they are missing or outdated."""
+        segments = self._segments.get(route_id)
+        if segments is not None:
+            return segments
+
+        with self._lock:
+            segments = self._segments.get(route_id)
+            if segments is None:
+                segments = self._segments[route_id] = self._load_segments(self.get(route_id))
+        return segments
+
+    def update_segments(self, route_id: str) -> RouteSegments:
+        """Compute and persist the curves and tangents of a route, e.g. when it or its curves are uploaded."""
+        with self._lock:
+            route = self.get(route_id)
+            segments = self._segments[route_id] = self._compute_segments(route)
+        return segments
+
+    def get_route_index(self) -> RouteIndex:
+        """Get the spatial index of the projected centerlines of every route of the database."""
+        route_index = self._route_index
+        if route_index is not None:
+            return route_index
+
+        with self._lock:
+            if self._route_index is None:
+                routes = {route_id: self.get(route_id).projected_geometry for route_id in self._get_route_ids()}
+                self._route_index = RouteIndex(routes)
+                logger.info(f"Indexed {len(routes)} routes for route matching")
+            return self._route_index
+
+    def invalidate(self, route_id: str) -> None:
+        """Drop a route whose centerline or curves changed, it is loaded again on its next lookup."""
+        with self._lock:
+            self._route_index = None
+            route = self._routes.pop(route_id, None)
+            self._curvature_profiles.pop(route_id, None)
+            self._segments.pop(route_id, None)
+            if route is not None:
+                for key in [key for key in self._splines if key[0] == route.geometry_hash]:
+                    del self._splines[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._splines.clear()
+            self._curvature_profiles.clear()
+            self._segments.clear()
+            self._route_index = None
+
+    def warm_up(self) -> None:
+        """Load every route of the database."""
+        route_ids = self._get_route_ids()
+        for route_id in route_ids:
+            self.get(route_id)
+        logger.info(f"Loaded {len(route_ids)} routes into the route cache")
+
+    @staticmethod
+    def _get_route_ids() -> list[str]:
+        with get_db_session() as session:
+            return [route_id for (route_id,) in session.query(DissolvedRoute.dissolved_id)]
+
+    @staticmethod
+    def _load(route_id: str) -> CachedRoute:
+        with get_db_session() as session:
+            route = session.query(DissolvedRoute).filter(DissolvedRoute.dissolved_id == route_id).first()
+            if route is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Route {route_id} does not exist")
+
+            geometry = geoalchemy2.shape.to_shape(route.geometry)
+            curves = session.query(CurveInventory).filter(CurveInventory.dissolved_id == route_id).all()
+            curve_gdf = gpd.GeoDataFrame(
+                [
+                    {column: getattr(curve, column) for column in CURVE_COLUMNS if column != "geometry"}
+                    for curve in curves
+                ],
+                columns=[column for column in CURVE_COLUMNS if column != "geometry"],
+                geometry=[geoalchemy2.shape.to_shape(curve.geometry) for curve in curves],
+                crs="EPSG:4326",
+            )
+
+        projected_geometry = gpd.GeoSeries([geometry], crs="EPSG:4326").to_crs(PROJECTED_CRS).iloc[0]
+        geometry_hash = hashlib.sha256(shapely.to_wkb(projected_geometry)).hexdigest()
+        shapely.prepare(geometry)
+        shapely.prepare(projected_geometry)
+        return CachedRoute(
+            route_id=route_id,
+            geometry=geometry,
+            projected_geometry=projected_geometry,
+            curves=curve_gdf,
+            geometry_hash=geometry_hash,
+        )
+
+    @staticmethod
+    def _load_spline(route: CachedRoute, spline_order: int, smoothing_factor: float) -> RouteSpline:
+        key = {
+            "geometry_hash": route.geometry_hash,
+            "spline_order": spline_order,
+            "smoothing_factor": smoothing_factor,
+        }
+        with get_db_session() as session:
+            fit = session.query(RouteSplineFit).filter_by(**key).first()
+            if fit is not None:
+                coefficients = np.frombuffer(fit.coefficients, dtype="<f8").reshape(2, -1)
+                tck = (np.frombuffer(fit.knots, dtype="<f8"), list(coefficients), fit.degree)
+                return RouteSpline(route.projected_geometry, spline_order, smoothing_factor, tck=tck)
+
+            spline = RouteSpline(route.projected_geometry, spline_order, smoothing_factor)
+            knots, coefficients, degree = spline.spline_model
+            session.execute(
+                insert(RouteSplineFit)
+                .values(
+                    **key,
+                    dissolved_id=route.route_id,
+                    knots=np.asarray(knots, dtype="<f8").tobytes(),
+                    coefficients=np.asarray(coefficients, dtype="<f8").tobytes(),
+                    degree=degree,
+                    created_at=datetime.now(),
+                )
+                .on_conflict_do_nothing()
+            )
+            logger.info(f"Fitted a spline to route {route.route_id}")
+            return spline
+
+    def _load_curvature_profile(self, route: CachedRoute) -> CurvatureProfile:
+        with get_db_session() as session:
+            rows = (
+                session.query(RouteCurvatureProfile.lrs, RouteCurvatureProfile.curvature)
+                .filter_by(dissolved_id=route.route_id, geometry_hash=route.geometry_hash)
+                .order_by(RouteCurvatureProfile.bucket)
+                .all()
+            )
+        if rows:
+            lrs, curvature = np.array(rows, dtype=float).T
+            return CurvatureProfile(lrs=lrs, curvature=curvature)
+
+        # Routes uploaded before profiles were, or whose profile was computed on a previous version of the route
+        return self._compute_curvature_profile(route)
+
+    def _compute_curvature_profile(self, route: CachedRoute) -> CurvatureProfile:
+        spline = self.get_spline(route.route_id)
+        profile = CurvatureProfile.from_spline(spline, settings.CURVATURE_PROFILE_SPACING_FT)
+
+        with get_db_session() as session:
+            session.execute(delete(RouteCurvatureProfile).where(RouteCurvatureProfile.dissolved_id == route.route_id))
+            session.execute(
+                insert(RouteCurvatureProfile),
+                [
+                    {
+                        "dissolved_id": route.route_id,
+                        "bucket": bucket,
+                        "geometry_hash": route.geometry_hash,
+                        "lrs": lrs,
+                        "curvature": curvature,
+                        "radius": radius,
+                    }
+                    for bucket, lrs, curvature, radius in zip(
+                        profile.buckets.tolist(),
+                        profile.lrs.tolist(),
+                        profile.curvature.tolist(),
+                        profile.radii.tolist(),
+                        strict=True,
+                    )
+                ],
+            )
+        logger.info(f"Computed the curvature profile of route {route.route_id} ({len(profile.lrs)} points)")
+        return profile
+
+    def _load_segments(self, route: CachedRoute) -> RouteSegments:
+        with get_db_session() as session:
+            rows = (
+                session.query(
+                    RouteSegment.segment_type,
+                    RouteSegment.segment_id,
+                    RouteSegment.start_lrs,
+                    RouteSegment.end_lrs,
+                    RouteSegment.geometry,
+                )
+                .filter_by(dissolved_id=route.route_id, geometry_hash=route.geometry_hash)
+                # Curves, then tangents
+                .order_by(RouteSegment.segment_type, RouteSegment.segment_id)
+                .all()
+            )
+        if rows:
+            types, ids, start_lrs, end_lrs, geometries = zip(*rows, strict=True)
+            return RouteSegments(
+                types=np.array([RcType(segment_type) for segment_type in types], dtype=object),
+                ids=np.array(ids, dtype=int),
+                start_lrs=np.array(start_lrs, dtype=float),
+                end_lrs=np.array(end_lrs, dtype=float),
+                geometries=np.array([geoalchemy2.shape.to_shape(geometry) for geometry in geometries], dtype=object),
+            )
+
+        # Routes uploaded before segments were, whose segments were computed on a previous version of the route, or
+        # without curves
+        return self._compute_segments(route)
+
+    @staticmethod
+    def _compute_segments(route: CachedRoute) -> RouteSegments:
+        segments = RouteSegments.from_route(route.geometry, route.projected_geometry, route.curves)
+
+        with get_db_session() as session:
+            session.execute(delete(RouteSegment).where(RouteSegment.dissolved_id == route.route_id))
+            if len(segments.types) > 0:
+                session.execute(
+                    insert(RouteSegment),
+                    [
+                        {
+                            "dissolved_id": route.route_id,
+                            "segment_type": segment_type.value,
+                            "segment_id": segment_id,
+                            "geometry_hash": route.geometry_hash,
+                            "start_lrs": start_lrs,
+                            "end_lrs": end_lrs,
+                            "geometry": geoalchemy2.shape.from_shape(geometry, srid=4326),
+                        }
+                        for segment_type, segment_id, start_lrs, end_lrs, geometry in zip(
+                            segments.types,
+                            segments.ids.tolist(),
+                            segments.start_lrs.tolist(),
+                            segments.end_lrs.tolist(),
+                            segments.geometries,
+                            strict=True,
+                        )
+                    ],
+                )
+        logger.info(f"Computed the segments of route {route.route_id} ({len(segments.types)} curves and tangents)")
+        return segments
+
+
+route_cache = RouteCache()
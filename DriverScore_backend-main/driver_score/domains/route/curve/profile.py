@@ -0,0 +1,64 @@
+"""
+Curvature profile of a route: its curvature sampled at a fixed LRS spacing along its projected centerline.
+
+The curvature of a route only depends on its centerline and the parameters of its spline, so it is evaluated once, when
+the route is uploaded, and stored in the `route_curvature_profile` table. The curvature of any sample along the route
+is then interpolated from the profile, without evaluating the spline:
+
+    profile = route_cache.get_curvature_profile(route_id)
+    profile.curvatures_at_LRS(gps_lrs)
+
+In SQL, the curvature of LRS stored with the samples (`road_characteristic.gps_lrs`, in feet) is the one of the
+closest point of the profile:
+
+    JOIN route_curvature_profile AS profile
+    ON profile.dissolved_id = rc.dissolved_id AND profile.bucket = ROUND(rc.gps_lrs / <spacing_ft>)
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .service import RouteSpline
+
+
+@dataclass(frozen=True)
+class CurvatureProfile:
+    # (n,) increasing LRS along the projected centerline, in feet: every `spacing_ft`, and the end of the route
+    lrs: np.ndarray
+    # (n,) curvature of the route at these LRS, in 1/ft
+    curvature: np.ndarray
+
+    @classmethod
+    def from_spline(cls, spline: RouteSpline, spacing_ft: float) -> "CurvatureProfile":
+        """Sample the curvature of a spline fitted to a projected centerline every `spacing_ft` feet."""
+        if spacing_ft <= 0:
+            raise ValueError(f"Spacing of a curvature profile must be positive, found {spacing_ft}")
+
+        length = spline.route_geom.length
+        lrs = np.append(np.arange(0, length, spacing_ft), length)
+        return cls(lrs=lrs, curvature=spline.get_curvatures_at_LRS(lrs))
+
+    @property
+    def radii(self) -> np.ndarray:
+        """(n,) radius of the route at the LRS of the profile, in feet."""
+        return curvature_radii(self.curvature)
+
+    @property
+    def buckets(self) -> np.ndarray:
+        """(n,) index of every point of the profile, the key of its row in `route_curvature_profile`."""
+        return np.arange(len(self.lrs))
+
+    def curvatures_at_LRS(self, lrs: np.ndarray) -> np.ndarray:
+        """Linearly interpolate the curvature at every LRS of an array, in feet. LRS off the route get its ends."""
+        return np.interp(lrs, self.lrs, self.curvature)
+
+    def radii_at_LRS(self, lrs: np.ndarray) -> np.ndarray:
+        """Radius of the curvature at every LRS of an array, in feet."""
+        return curvature_radii(self.curvatures_at_LRS(lrs))
+
+
+def curvature_radii(curvature: np.ndarray) -> np.ndarray:
+    """Radius of every curvature, infinite where the route is straight (zero curvature, e.g. on straight centerlines)."""
+    curvature = np.asarray(curvature, dtype=float)
+    return np.divide(1, curvature, out=np.full_like(curvature, np.inf), where=curvature != 0)
@@ -3,12 +3,15 @@ from pathlib import Path
 
 import geopandas as gpd
 import numpy as np
+import shapely
 from scipy.interpolate import splev, splprep
 from shapely import wkb
 from shapely.geometry import LineString, Point
 
 from driver_score.settings import settings
 
+from ..geometry import resample
+
 
 class CurveService:
     def __init__(self):
@@ -26,7 +29,9 @@ class CurveService:
 
 # TODO: Merge with CurveService later. Use dissolved_id from __init__ of CurveService to query route_geom
 class RouteSpline:
-    def __init__(self, route_geom: LineString, spline_order: int = 3, smoothing_factor: float = 3) -> None:
+    def __init__(
+        self, route_geom: LineString, spline_order: int = 3, smoothing_factor: float = 3, tck: tuple | None = None
+    ) -> None:
         """
         IMPORTANT: coordinate reference system for the route_geom MUST BE IN FEET!!!
 
@@ -36,6 +41,7 @@ class RouteSpline:
             spline_order: order of the spline, default is 3.
             smoothing_factor: smothing factor, float or None.If s is None, will provide a default smoothing.
                             If 0, spline will interpolate through all data points. Default is None.
+            tck: spline fitted earlier to the same route with the same parameters (see `fit_spline`), to skip fitting.
         """
         self.route_geom = route_geom  # unit for the line string is assumed to be ft
         self.spline_order = spline_order
@@ -45,16 +51,11 @@ class RouteSpline:
         # densify the route
         # densified_route = self.densify_linestring(route_geom)
         densified_route = route_geom
-        self.spline_model = self.fit_spline(densified_route, spline_order, smoothing_factor)
+        self.spline_model = tck if tck is not None else self.fit_spline(densified_route, spline_order, smoothing_factor)
 
     def densify_linestring(self, line: LineString, interval=15):
         """Return a densified LineString with the max distance between points defined as interval"""
-        total_length = line.length
-        sample_location = np.arange(0, total_length, interval)
-        point_list = [line.interpolate(location) for location in sample_location]
-
-        # make linestring from list of points
-        return LineString(point_list)
+        return resample(line, interval)
 
     def fit_spline(self, line: LineString, spline_order: int = 3, smoothing_factor: float = 3):
         """Smooth a shapely LineString using scipy.interpolate.splprep methods.
@@ -85,8 +86,8 @@ class RouteSpline:
 
         return tck
 
-    def compute_curvature(self, t: float):
-        """Compute curvature of the spline at a given point t"""
+    def compute_curvature(self, t: float | np.ndarray):
+        """Compute curvature of the spline at a given point t, or at every point of an array of t"""
 
         # compute first and second derivative of the spline
         dx, dy = splev(t, self.spline_model, der=1)
@@ -118,6 +119,21 @@ class RouteSpline:
 
         return self.compute_curvature(lrs)
 
+    def get_curvatures_at_points(self, points: np.ndarray) -> np.ndarray:
+        """Compute curvature of the spline at every point of an array of points, in one evaluation"""
+        t = shapely.line_locate_point(self.route_geom, points, normalized=True)
+        return self.compute_curvature(t)
+
+    def get_curvatures_at_LRS(self, lrs: np.ndarray, normalized=False) -> np.ndarray:
+        """Compute curvature of the spline at every LRS of an array, in one evaluation"""
+        lrs = np.asarray(lrs, dtype=float)
+        if np.any(lrs < 0):
+            raise ValueError("LRS value should be greater than 0")
+        if np.any(lrs > (1 if normalized else self.route_geom.length)):
+            raise ValueError("LRS value should be less than the length of the route")
+
+        return self.compute_curvature(lrs if normalized else lrs / self.route_geom.length)
+
     def get_radius_at_point(self, point: Point):
         """Compute radius of the curvature at a given point"""
 
@@ -134,6 +150,14 @@ class RouteSpline:
 
         return radius
 
+    def get_radii_at_points(self, points: np.ndarray) -> np.ndarray:
+        """Compute radius of the curvature at every point of an array of points"""
+        return 1 / self.get_curvatures_at_points(points)
+
+    def get_radii_at_LRS(self, lrs: np.ndarray, normalized=False) -> np.ndarray:
+        """Compute radius of the curvature at every LRS of an array"""
+        return 1 / self.get_curvatures_at_LRS(lrs, normalized)
+
 
 if __name__ == "__main__":
     service = CurveService()
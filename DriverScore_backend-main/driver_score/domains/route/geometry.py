@@ -0,0 +1,58 @@
+"""
+Vectorized operations on route centerlines, for routes of statewide networks with hundreds of thousands of vertices.
+
+The points of a line are computed from its coordinate array in one NumPy expression, instead of one shapely object
+per vertex, and arrays of points are located along a line with a spatial index of its edges, instead of measuring
+their distance to every edge.
+"""
+
+import numpy as np
+import shapely
+from shapely import LineString
+
+from .aggregation import vertex_lrs
+
+
+def densify(line: LineString, num_points: int) -> LineString:
+    """
+    Interpolates num_points more points between 2 consecutive points along a line.
+
+    The points of every edge are at 1 / (num_points + 1), ..., num_points / (num_points + 1) of it, followed by the
+    last point of the line. The vertices of the line are not kept, except its last one. The line is flattened to 2D.
+    """
+    coordinates = shapely.get_coordinates(line)
+    fractions = np.arange(1, num_points + 1) / (num_points + 1)
+    edges = np.diff(coordinates, axis=0)
+    points = coordinates[:-1, None, :] + edges[:, None, :] * fractions[None, :, None]
+    return LineString(np.concatenate([points.reshape(-1, 2), coordinates[-1:]]))
+
+
+def resample(line: LineString, spacing: float) -> LineString:
+    """Points of a line every `spacing`, from its start, in the unit of its CRS."""
+    return LineString(shapely.line_interpolate_point(line, np.arange(0, line.length, spacing)))
+
+
+def locate_points(line: LineString, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    (n,) LRS of the n points of coordinates (x, y) along a line: the 2D distance along it to their closest point, like
+    `shapely.line_locate_point`.
+
+    `line_locate_point` measures the distance of every point to every edge of the line. Here, the closest edge of every
+    point is found with a spatial index of the edges, and the point is projected on that edge only.
+    """
+    coordinates = shapely.get_coordinates(line)
+    starts, vectors = coordinates[:-1], np.diff(coordinates, axis=0)
+    edges = shapely.linestrings(np.stack([starts, coordinates[1:]], axis=1))
+    points = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+
+    # Like line_locate_point, the first edge of the line among the closest ones
+    point_indices, edge_indices = shapely.STRtree(edges).query_nearest(shapely.points(points), all_matches=True)
+    closest_edges = np.full(len(points), len(edges))
+    np.minimum.at(closest_edges, point_indices, edge_indices)
+
+    starts, vectors = starts[closest_edges], vectors[closest_edges]
+    squared_lengths = np.einsum("ij,ij->i", vectors, vectors)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fractions = np.einsum("ij,ij->i", points - starts, vectors) / squared_lengths
+    fractions = np.clip(np.nan_to_num(fractions, nan=0.0), 0, 1)
+    return vertex_lrs(line)[closest_edges] + fractions * np.sqrt(squared_lengths)
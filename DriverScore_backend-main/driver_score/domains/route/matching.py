@@ -0,0 +1,68 @@
+"""
+Matching of runs to the routes they were driven on.
+
+Every GPS fix of a run is assigned to its nearest route within `settings.ROUTE_MATCH_TOLERANCE_FT`, and the run is
+matched to the route most of its fixes are assigned to. The nearest routes are found with a spatial index (STRtree)
+of the edges of every route, so that a fix is measured against the few edges around it rather than against every
+route:
+
+    route_index = route_cache.get_route_index()
+    route_index.match(gps_points_in_feet, tolerance=settings.ROUTE_MATCH_TOLERANCE_FT)
+
+The run is matched once, when it is ingested, and the result is stored in `run.dissolved_id`. The routes are in
+PROJECTED_CRS (feet), so that the tolerance is a distance.
+"""
+
+import numpy as np
+import shapely
+from shapely import LineString
+
+
+class RouteIndex:
+    def __init__(self, routes: dict[str, LineString]):
+        """
+        Parameters:
+            routes: Centerline of every route by ID, in the same projected CRS as the points to match.
+        """
+        self.route_ids = np.array(list(routes), dtype=object)
+
+        # Edges of the routes, from the consecutive vertices of the same route
+        coordinates, route_indices = shapely.get_coordinates(
+            np.array(list(routes.values()), dtype=object), return_index=True
+        )
+        same_route = route_indices[:-1] == route_indices[1:]
+        edges = shapely.linestrings(np.stack([coordinates[:-1][same_route], coordinates[1:][same_route]], axis=1))
+        self._edge_routes = route_indices[:-1][same_route]
+        self._tree = shapely.STRtree(edges)
+
+    def nearest_routes(self, points: np.ndarray, tolerance: float) -> np.ndarray:
+        """
+        (n,) ID of the nearest route of every point, or None for points farther than `tolerance` from every route.
+
+        Parameters:
+            points: (n,) shapely points, in the CRS of the routes.
+            tolerance: Maximum distance to a route, in the unit of this CRS.
+        """
+        nearest = np.full(len(points), None, dtype=object)
+        indices = self._nearest_route_indices(points, tolerance)
+        nearest[indices >= 0] = self.route_ids[indices[indices >= 0]]
+        return nearest
+
+    def match(self, points: np.ndarray, tolerance: float) -> str | None:
+        """
+        ID of the route most of the points are nearest to within `tolerance`, the first one in the order of the
+        routes on ties, or None if no point is within `tolerance` of a route.
+        """
+        indices = self._nearest_route_indices(points, tolerance)
+        counts = np.bincount(indices[indices >= 0], minlength=len(self.route_ids))
+        return str(self.route_ids[np.argmax(counts)]) if counts.any() else None
+
+    def _nearest_route_indices(self, points: np.ndarray, tolerance: float) -> np.ndarray:
+        """(n,) index of the nearest route of every point in `route_ids`, -1 if none is within `tolerance`."""
+        indices = np.full(len(points), -1)
+        if len(points) == 0 or len(self.route_ids) == 0:
+            return indices
+
+        point_indices, edge_indices = self._tree.query_nearest(points, max_distance=tolerance, all_matches=False)
+        indices[point_indices] = self._edge_routes[edge_indices]
+        return indices
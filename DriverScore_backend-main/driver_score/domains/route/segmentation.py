@@ -0,0 +1,118 @@
+"""
+Segmentation of a route into its curves and the tangents between consecutive curves, the segments the route based
+road characteristics are scored on.
+
+The segmentation of a route only depends on its centerline and its curve inventory, so it is computed when either is
+uploaded and stored in the `route_segment` table. Scoring a run along the route then only aggregates its samples over
+the LRS intervals of the stored segments (see `aggregation.py`):
+
+    segments = route_cache.get_segments(route_id)
+    starts, ends = segments.buffered_intervals(route.geometry, route.projected_geometry, settings.BUFFER_DISTANCE)
+    interval_means(gps_lrs, scores, starts, ends)
+
+In SQL, the samples of a segment are the ones whose LRS (`road_characteristic.gps_lrs`, in feet) is within its
+interval:
+
+    JOIN route_segment AS segment
+    ON segment.dissolved_id = rc.dissolved_id AND rc.gps_lrs BETWEEN segment.start_lrs AND segment.end_lrs
+"""
+
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import LineString
+
+from .aggregation import vertex_lrs
+from .geometry import densify, locate_points
+from .schema import RcType
+
+# Number of points interpolated along every edge of a route, the resolution the segments are drawn at
+POINTS_PER_EDGE = 5
+# In degrees (about 1 mm): the simplified geometries drop the points interpolated along the straight edges
+SIMPLIFY_TOLERANCE = 1e-8
+
+
+@dataclass(frozen=True)
+class RouteSegments:
+    # (m,) type of every segment: the curves, then the tangents, each in order along the route
+    types: np.ndarray
+    # (m,) number of every segment among the segments of its type, from 1
+    ids: np.ndarray
+    # (m,) LRS interval of every segment along the projected centerline, in feet, from its first to its last point
+    start_lrs: np.ndarray
+    end_lrs: np.ndarray
+    # (m,) simplified geometry of every segment, in EPSG:4326
+    geometries: np.ndarray
+
+    @classmethod
+    def from_route(
+        cls, geometry: LineString, projected_geometry: LineString, curves: gpd.GeoDataFrame
+    ) -> "RouteSegments":
+        """
+        Segment a route into its curves, from their PC to their PT, and the tangents from the PT of a curve to the PC
+        of the next one.
+
+        Segments are drawn with the points of the densified route between their ends, and segments shorter than the
+        spacing of these points are left out.
+
+        Args:
+            geometry (LineString): Centerline of the route, in EPSG:4326.
+            projected_geometry (LineString): The same centerline, projected to feet.
+            curves (gpd.GeoDataFrame): Curve inventory of the route, with the "pc_lrs" and "pt_lrs" of the curves in
+                degrees along `geometry`, in any order.
+        """
+        # Points of the densified route, with their LRS in degrees along it (like pc_lrs and pt_lrs)
+        route = densify(geometry, num_points=POINTS_PER_EDGE)
+        route_coords = shapely.get_coordinates(route)
+        route_lrs = vertex_lrs(route)
+
+        curves = curves.sort_values(by="pc_lrs")
+        n_curves = len(curves)
+        types = np.array([RcType.CURVE] * n_curves + [RcType.TANGENT] * max(n_curves - 1, 0), dtype=object)
+        pc_lrs, pt_lrs = curves["pc_lrs"].to_numpy(dtype=float), curves["pt_lrs"].to_numpy(dtype=float)
+        starts, ends = np.concatenate([pc_lrs, pt_lrs[:-1]]), np.concatenate([pt_lrs, pc_lrs[1:]])
+
+        # Points of the route along every segment
+        first_points = np.searchsorted(route_lrs, starts, side="left")
+        last_points = np.searchsorted(route_lrs, ends, side="right")
+        drawn = last_points - first_points >= 2
+        types, first_points, last_points = types[drawn], first_points[drawn], last_points[drawn]
+
+        counters = dict.fromkeys(RcType, 0)
+        ids = np.zeros(len(types), dtype=int)
+        for i, rc_type in enumerate(types):
+            counters[rc_type] += 1
+            ids[i] = counters[rc_type]
+
+        # The densified route cuts the corners of the route, so the ends of the segments are located on the route
+        # itself, then converted to feet
+        degrees, feet = vertex_lrs(geometry), vertex_lrs(projected_geometry)
+        segment_starts, segment_ends = np.split(
+            locate_points(geometry, *route_coords[np.concatenate([first_points, last_points - 1])].T), 2
+        )
+
+        geometries = np.empty(len(types), dtype=object)
+        geometries[:] = [
+            LineString(route_coords[first:last]) for first, last in zip(first_points, last_points, strict=True)
+        ]
+        return cls(
+            types=types,
+            ids=ids,
+            start_lrs=np.interp(segment_starts, degrees, feet),
+            end_lrs=np.interp(segment_ends, degrees, feet),
+            geometries=shapely.simplify(geometries, SIMPLIFY_TOLERANCE, preserve_topology=False),
+        )
+
+    def buffered_intervals(
+        self, geometry: LineString, projected_geometry: LineString, buffer_distance: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        LRS intervals of the segments along the projected centerline in feet, extended by `buffer_distance` degrees
+        along the route on both ends.
+        """
+        degrees, feet = vertex_lrs(geometry), vertex_lrs(projected_geometry)
+        starts = np.interp(self.start_lrs, feet, degrees) - buffer_distance
+        ends = np.interp(self.end_lrs, feet, degrees) + buffer_distance
+        return np.interp(starts, degrees, feet), np.interp(ends, degrees, feet)
@@ -1,18 +1,22 @@
 import io
 from pathlib import Path
 
-import geoalchemy2
 import geopandas as gpd
 import numpy as np
+import shapely
+from fastapi.concurrency import run_in_threadpool
 from pydantic_geojson import LineStringModel
-from shapely.geometry import LineString, Point
+from shapely.geometry import LineString
 
-from driver_score.core.database import db_engine, get_db_session
-from driver_score.core.models import CurveInventory, DissolvedRoute
+from driver_score.core.database import db_engine
 from driver_score.settings import settings
 
-from .curve.service import CurveService, RouteSpline
-from .schema import RcType, RouteBasedRCSchema
+from ..tile.cache import tile_cache
+from .aggregation import interval_means
+from .cache import PROJECTED_CRS, route_cache
+from .curve.service import CurveService
+from .geometry import locate_points
+from .schema import RouteBasedRCSchema
 
 # TODO: Move this one to app.py, specify the reason is that it supports BytesCollection interface
 # to construct a GeoDataFrame from .zip file of .shp and .shx file
@@ -39,6 +43,9 @@ class RouteService:
         This function retrieves a GeoDataFrame from the given BytesIO object using the _get_gdf_from_bytes_obj method.
         It then persists the GeoDataFrame to the "dissolved_route" table in the database using the to_postgis method.
 
+        Reading the route, persisting it and computing its curvature profile and segments (see `cache.py`) are
+        blocking, CPU-bound work, run in the thread pool rather than in the event loop.
+
         Example:
             >>> await persist_route_to_db(dissolved_route_obj)
         """
@@ -51,17 +58,38 @@ class RouteService:
                 gdf["dissolved_id"] = self.route_id
                 return gdf
 
-        route_gdf = _get_gdf_from_bytes_obj(dissolved_route_obj)[["geometry", "dissolved_id"]]
-        route_gdf.to_postgis("dissolved_route", db_engine, if_exists="append", index=False)
+        def _persist_route() -> None:
+            route_gdf = _get_gdf_from_bytes_obj(dissolved_route_obj)[["geometry", "dissolved_id"]]
+            route_gdf.to_postgis("dissolved_route", db_engine, if_exists="append", index=False)
+            route_cache.invalidate(self.route_id)
+            route_cache.update_curvature_profile(self.route_id)
+            route_cache.update_segments(self.route_id)
+            tile_cache.invalidate_route(self.route_id)
+
+        await run_in_threadpool(_persist_route)
 
     async def persist_curves_to_db(self, curves_bin: bytes) -> None:
+        """
+        Persist the curve inventory of a route, located along the route, and compute its segments.
+
+        Like `persist_route_to_db`, the work is run in the thread pool rather than in the event loop.
+        """
+        await run_in_threadpool(self._persist_curves, curves_bin)
+
+    def _persist_curves(self, curves_bin: bytes) -> None:
         curve_service = CurveService()
         curve_gdf = curve_service.get_gdf_from_geojson(io.BytesIO(curves_bin))
 
         route_id = curve_gdf["dissolved_id"].iloc[0]
-        route = await self.get_route(route_id)
-        curve_gdf["pc_lrs"] = curve_gdf.apply(lambda x: route.project(Point(x.c_pc_x, x.c_pc_y)), axis=1)
-        curve_gdf["pt_lrs"] = curve_gdf.apply(lambda x: route.project(Point(x.c_pt_x, x.c_pt_y)), axis=1)
+        route = route_cache.get(route_id).geometry
+        curve_gdf["pc_lrs"], curve_gdf["pt_lrs"] = np.split(
+            locate_points(
+                route,
+                np.concatenate([curve_gdf["c_pc_x"], curve_gdf["c_pt_x"]]),
+                np.concatenate([curve_gdf["c_pc_y"], curve_gdf["c_pt_y"]]),
+            ),
+            2,
+        )
 
         curve_gdf = curve_gdf[
             [
@@ -80,118 +108,74 @@ class RouteService:
             ]
         ]
         curve_gdf.to_postgis("curve_inventory", db_engine, if_exists="append", index=False)
+        route_cache.invalidate(route_id)
+        route_cache.update_segments(route_id)
+        tile_cache.invalidate_route(route_id)
 
     async def persist_route_based_RCs_to_fb(self, score_gdf: gpd.GeoDataFrame) -> None:
         pass
 
     async def get_route(self, route_id: str) -> LineString:
-        with get_db_session() as session:
-            route = session.query(DissolvedRoute).filter(DissolvedRoute.dissolved_id == route_id).first()
-            return geoalchemy2.shape.to_shape(route.geometry)
+        """Get the centerline of a route, in EPSG:4326 (see `cache.py`)."""
+        return route_cache.get(route_id).geometry
 
     # TODO: Make return consistent by always using pydantic schemas instead
     async def get_curves(self, route_id: str) -> gpd.GeoDataFrame:
-        with get_db_session() as session:
-            curves = session.query(CurveInventory).filter(CurveInventory.dissolved_id == route_id).all()
-            gdf = gpd.GeoDataFrame(
-                [{c.key: getattr(curve, c.key) for c in curve.__table__.columns} for curve in curves]
-            )
-            return gdf
+        return route_cache.get_curves(route_id)
 
     async def get_route_based_RCs(self, score_gdf: gpd.GeoDataFrame) -> list[RouteBasedRCSchema]:
-        def _interpolate_points(line: LineString, num_points: int) -> LineString:
-            """
-            Interpolates num_points more points between 2 consecutive points along a line.
-            """
-            distances = [i / (num_points + 1) for i in range(1, num_points + 1)]
-            interpolated_points = []
-            for i in range(len(line.coords) - 1):
-                segment = LineString([line.coords[i], line.coords[i + 1]])
-                segment_length = segment.length
-                segment_distances = [dist * segment_length for dist in distances]
-                segment_points = [segment.interpolate(dist) for dist in segment_distances]
-                interpolated_points.extend(segment_points)
-            interpolated_points.append(line.coords[-1])
-            return LineString(interpolated_points)
-
-        route = await self.get_route(self.route_id)
-        route = _interpolate_points(route, num_points=5)
-        route_points = [Point(coord) for coord in route.coords]
-
-        route_gdf = gpd.GeoDataFrame(geometry=route_points, crs="EPSG:4326")
-        route_gdf["lrs"] = [route.project(point) for point in route_points]
-
-        curve_gdf = await self.get_curves(self.route_id)
-        curve_gdf.sort_values(by="pc_lrs", inplace=True)
-
-        # Update score_gdf with their curvature
-        # TODO: Convert to feet as suggested in the curve service
-        spline_model = RouteSpline(LineString(route_gdf.geometry.tolist()))
-        score_gdf["curvature"] = score_gdf.geometry.apply(spline_model.get_curveature_at_point)
-
-        def _get_score_in_RC(curve_geo: LineString, score_gdf: gpd.GeoDataFrame) -> float:
-            """
-            Calculate the score within the buffer of a given LineString curve.
-
-            Args:
-                curve_geo (LineString): The LineString curve geometry.
-                score_gdf (gpd.GeoDataFrame): The GeoDataFrame containing the scores.
-
-            Returns:
-                float: The mean score within the buffered curve. If the mean score is NaN, it returns 0.
-            """
-            buffer_distance = settings.BUFFER_DISTANCE
-            buffered_curve_geo = curve_geo.buffer(buffer_distance)
-            indices = score_gdf.sindex.query(buffered_curve_geo)
-
-            if len(indices) == 0:
-                score_in_curve = 0
-            else:
-                scores = score_gdf.loc[indices, "score"]
-                score_in_curve = max(0, min(100, int(np.sum(scores) / len(scores))))
-
-            return score_in_curve
-
-        # Filter curves
-        curves, counter = [], 0
-        for row in curve_gdf.itertuples():
-            curve = route_gdf.loc[route_gdf["lrs"].between(row.pc_lrs, row.pt_lrs, inclusive="both"), "geometry"]
-            curve_geo = LineString(curve)
-            score_in_curve = _get_score_in_RC(curve_geo, score_gdf)
-            counter += 1
-
-            curve_rc = RouteBasedRCSchema(
-                type=RcType.CURVE,
-                id=counter,
-                score=score_in_curve,
-                geometry=LineStringModel(coordinates=[coord[:2] for coord in curve_geo.coords]),
+        """
+        Score the curves of the route and the tangents between consecutive curves.
+
+        The segments are computed when the route or its curves are uploaded (see `segmentation.py`). The score of a
+        segment is the mean score of the samples within `BUFFER_DISTANCE` of the route whose LRS is within the LRS
+        interval of the segment, extended by `BUFFER_DISTANCE` on both ends, or 0 without samples (see
+        `aggregation.py`). These are the samples within the buffer of the segment, as long as the route does not wind
+        back within `BUFFER_DISTANCE` of itself.
+
+        Args:
+            score_gdf (gpd.GeoDataFrame): Scores of a run, in EPSG:4326, with their "lrs" along the projected
+                centerline in feet (`road_characteristic.gps_lrs`) if known. Missing LRS are computed.
+
+        Returns:
+            list[RouteBasedRCSchema]: The curves, then the tangents, numbered from 1 in order along the route.
+        """
+        cached_route = route_cache.get(self.route_id)
+        segments = route_cache.get_segments(self.route_id)
+
+        # LRS of the scores in feet
+        score_lrs = score_gdf["lrs"].to_numpy(dtype=float) if "lrs" in score_gdf else np.full(len(score_gdf), np.nan)
+        missing_lrs = np.isnan(score_lrs)
+        if missing_lrs.any():
+            score_lrs[missing_lrs] = shapely.line_locate_point(
+                cached_route.projected_geometry, score_gdf.geometry[missing_lrs].to_crs(PROJECTED_CRS).to_numpy()
             )
-            curves.append(curve_rc)
-
-        # Filter tangents
-        curve_gdf["pc_lrs"] = curve_gdf["pc_lrs"].shift(periods=-1)
-        tangents, counter = [], 0
-        for row in curve_gdf.itertuples():
-            if row.pc_lrs is None:
-                continue
-
-            tangent = route_gdf.loc[route_gdf["lrs"].between(row.pt_lrs, row.pc_lrs, inclusive="both"), "geometry"]
-            if tangent.shape[0] in {0, 1}:
-                continue
-
-            tangent_geo = LineString(tangent)
-            score = _get_score_in_RC(tangent_geo, score_gdf)
-            counter += 1
-
-            tangent_rc = RouteBasedRCSchema(
-                type=RcType.TANGENT,
-                id=counter,
-                score=score,
-                geometry=LineStringModel(coordinates=[coord[:2] for coord in tangent_geo.coords]),
+        # Samples farther from the route than the buffer of its segments count in none of them
+        scores = score_gdf["score"].to_numpy(dtype=float, copy=True)
+        near_route = shapely.dwithin(cached_route.geometry, score_gdf.geometry.to_numpy(), settings.BUFFER_DISTANCE)
+        scores[~near_route] = np.nan
+
+        starts, ends = segments.buffered_intervals(
+            cached_route.geometry, cached_route.projected_geometry, settings.BUFFER_DISTANCE
+        )
+        mean_scores, counts = interval_means(score_lrs, scores, starts, ends)
+
+        return [
+            RouteBasedRCSchema(
+                type=rc_type,
+                id=segment_id,
+                score=max(0, min(100, int(mean_score))) if count > 0 else 0,
+                geometry=LineStringModel(type="LineString", coordinates=shapely.get_coordinates(geometry).tolist()),
             )
-            tangents.append(tangent_rc)
-
-        return [*curves, *tangents]
+            for rc_type, segment_id, geometry, mean_score, count in zip(
+                segments.types,
+                segments.ids.tolist(),
+                segments.geometries,
+                mean_scores.tolist(),
+                counts.tolist(),
+                strict=True,
+            )
+        ]
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ from .driver.api import router as driver_router
 from .route.api import router as route_router
 from .run.api import router as run_router
 from .summary.api import router as summary_router
+from .tile.api import router as tile_router
 
 v1_api_router = APIRouter(prefix=settings.API_V1_STR)
 v1_api_router.include_router(allgather_router, prefix="/allgather", tags=["AllGather"])
@@ -14,6 +15,7 @@ v1_api_router.include_router(driver_router, prefix="/drivers", tags=["Drivers"])
 v1_api_router.include_router(run_router, prefix="/runs", tags=["Runs"])
 v1_api_router.include_router(route_router, prefix="/routes", tags=["Routes"])
 v1_api_router.include_router(summary_router, prefix="/summary", tags=["Summary"])
+v1_api_router.include_router(tile_router, prefix="/tiles", tags=["Tiles"])
 
 # We can specify routers for /api/v2 here:
 # v2_api_router = APIRouter(prefix=settings.API_V2_STR)
@@ -0,0 +1,57 @@
+"""
+Backfill of the LRS and direction labels of the GPS samples of runs ingested before they were stored at ingestion.
+
+The read endpoints compute the labels of these runs in memory on every request, without writing them. The backfill
+stores them, one run per transaction, so that the by-direction endpoints only filter on the stored labels:
+
+    python -m driver_score.domains.run.backfill
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from driver_score.core.database import get_db_session
+from driver_score.core.models import GpsSample
+
+from .service import RunService
+
+logger = logging.getLogger(__name__)
+
+
+def get_runs_without_directions() -> list[str]:
+    with get_db_session() as session:
+        query = select(GpsSample.run_id).where(GpsSample.direction.is_(None)).distinct().order_by(GpsSample.run_id)
+        return session.execute(query).scalars().all()
+
+
+async def backfill_directions(run_ids: list[str]) -> int:
+    """
+    Compute and store the direction labels of the GPS samples of runs, each in its own transaction.
+
+    Returns:
+        int: The number of runs backfilled, runs that fail are logged and skipped.
+    """
+    backfilled = 0
+    for run_id in run_ids:
+        try:
+            with get_db_session() as session:
+                await RunService(run_id=run_id, session=session).persist_directions_to_db()
+        except Exception:
+            logger.exception(f"Could not backfill the directions of run {run_id}")
+            continue
+        backfilled += 1
+        logger.info(f"Backfilled the directions of run {run_id}")
+    return backfilled
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    run_ids = get_runs_without_directions()
+    backfilled = asyncio.run(backfill_directions(run_ids))
+    logger.info(f"Backfilled the directions of {backfilled} of {len(run_ids)} runs")
+
+
+if __name__ == "__main__":
+    main()
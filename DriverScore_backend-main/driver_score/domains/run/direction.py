@@ -0,0 +1,106 @@
+"""
+Segmentation of a GPS trajectory into driving directions along a route centerline.
+
+Every GPS sample is labelled "increasing", "decreasing" or "stationary" from the step that reaches it: stationary when
+it moved less than `STATIONARY_SPEED_MS`, otherwise increasing or decreasing with its linear reference (LRS) along the
+centerline. The first sample is stationary. Consecutive samples with the same label form a stretch, and stretches are
+numbered per label in order of appearance, e.g. "increasing 1", "stationary 2", "increasing 2".
+
+All the steps are computed on arrays: the LRS with `shapely.line_locate_point`, the distances with a single
+`Geod.inv` call and the stretches with a run-length encoding of the labels.
+"""
+
+import numpy as np
+import shapely
+from pyproj import Geod
+from shapely import LineString
+
+DIRECTIONS = np.array(["stationary", "increasing", "decreasing"])
+STATIONARY, INCREASING, DECREASING = range(len(DIRECTIONS))
+
+# Below this speed, a sample is considered stationary
+STATIONARY_SPEED_MS = 0.5
+
+_GEOD = Geod(ellps="WGS84")
+
+
+def linear_reference(centerline: LineString, points: np.ndarray) -> np.ndarray:
+    """Normalized LRS (0 at the start of the centerline, 1 at its end) of every point."""
+    return shapely.line_locate_point(centerline, points, normalized=True)
+
+
+def step_distances_m(longitude: np.ndarray, latitude: np.ndarray) -> np.ndarray:
+    """(n - 1,) geodesic distances between consecutive positions, in meters."""
+    _, _, distances = _GEOD.inv(longitude[:-1], latitude[:-1], longitude[1:], latitude[1:])
+    return np.asarray(distances)
+
+
+def direction_codes(lrs: np.ndarray, step_distances: np.ndarray, step_seconds: np.ndarray) -> np.ndarray:
+    """
+    Direction of every sample, as indices of `DIRECTIONS`.
+
+    Parameters:
+        lrs: (n,) LRS of the samples.
+        step_distances: (n - 1,) distances covered between consecutive samples, in meters.
+        step_seconds: (n - 1,) time elapsed between consecutive samples, in seconds.
+
+    Returns:
+        np.ndarray: (n,) direction codes.
+    """
+    codes = np.full(len(lrs), STATIONARY, dtype=np.int8)
+    codes[1:] = np.where(lrs[1:] > lrs[:-1], INCREASING, DECREASING)
+    codes[1:][step_distances <= STATIONARY_SPEED_MS * step_seconds] = STATIONARY
+    return codes
+
+
+def stretch_labels(codes: np.ndarray) -> np.ndarray:
+    """
+    Label of the stretch every sample belongs to, e.g. "increasing 2" for the second increasing stretch.
+
+    Parameters:
+        codes: (n,) direction codes, see `direction_codes`.
+
+    Returns:
+        np.ndarray: (n,) labels, as Python strings.
+    """
+    if len(codes) == 0:
+        return np.array([], dtype=object)
+
+    # Run-length encoding: the first sample of every stretch, and the stretch of every sample
+    is_start = np.empty(len(codes), dtype=bool)
+    is_start[0] = True
+    np.not_equal(codes[1:], codes[:-1], out=is_start[1:])
+    stretch_codes = codes[is_start]
+    stretch_index = np.cumsum(is_start) - 1
+
+    # Number of the stretch among the stretches with the same direction
+    stretch_numbers = np.cumsum(stretch_codes[:, None] == np.arange(len(DIRECTIONS)), axis=0)
+    stretch_numbers = stretch_numbers[np.arange(len(stretch_codes)), stretch_codes]
+
+    labels = np.array(
+        [f"{DIRECTIONS[code]} {number}" for code, number in zip(stretch_codes, stretch_numbers, strict=True)],
+        dtype=object,
+    )
+    return labels[stretch_index]
+
+
+def segment_directions(
+    centerline: LineString, points: np.ndarray, step_seconds: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Segment a trajectory into driving directions along a centerline.
+
+    Parameters:
+        centerline: The route centerline, in EPSG:4326.
+        points: (n,) shapely points of the trajectory, in EPSG:4326, sorted by time.
+        step_seconds: (n - 1,) time elapsed between consecutive points, 1 second by default.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The normalized LRS and the stretch label of every point.
+    """
+    lrs = linear_reference(centerline, points)
+    if step_seconds is None:
+        step_seconds = np.ones(max(len(points) - 1, 0))
+
+    step_distances = step_distances_m(shapely.get_x(points), shapely.get_y(points))
+    return lrs, stretch_labels(direction_codes(lrs, step_distances, step_seconds))
@@ -0,0 +1,73 @@
+"""
+Resampling of multichannel IMU signals onto GPS timestamps.
+
+All the channels of a run are held in a single (n_samples, n_channels) array and interpolated in one pass: the
+bracketing samples of every GPS timestamp are found once with a binary search and shared by all the channels.
+"""
+
+import numpy as np
+from scipy.signal import butter, sosfiltfilt
+
+# Order of the Butterworth anti-aliasing filter
+LOW_PASS_ORDER = 4
+
+
+def interpolate_channels(old_time: np.ndarray, values: np.ndarray, new_time: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolate every channel of a signal at new times.
+
+    This is equivalent to `interp1d(old_time, values, axis=0, bounds_error=False, fill_value=(first, last))` per
+    channel, first and last being the first and last samples: new times outside of the signal get its edge values.
+
+    Parameters:
+        old_time: (n_samples,) increasing sample times.
+        values: (n_samples, n_channels) samples.
+        new_time: (n_new_samples,) times to interpolate the signal at.
+
+    Returns:
+        np.ndarray: (n_new_samples, n_channels) interpolated samples.
+    """
+    if len(old_time) < 2:
+        raise ValueError(f"At least 2 samples are required to interpolate, found {len(old_time)}")
+
+    # Same bracketing as interp1d: the first sample at or after the new time, and the one before it
+    hi = np.clip(np.searchsorted(old_time, new_time), 1, len(old_time) - 1)
+    lo = hi - 1
+
+    x_lo = old_time[lo]
+    y_lo = values[lo]
+    slope = (values[hi] - y_lo) / (old_time[hi] - x_lo)[:, None]
+    resampled = slope * (new_time - x_lo)[:, None] + y_lo
+
+    resampled[new_time < old_time[0]] = values[0]
+    resampled[new_time > old_time[-1]] = values[-1]
+    return resampled
+
+
+def low_pass(values: np.ndarray, sample_rate_hz: float, cutoff_hz: float, order: int = LOW_PASS_ORDER) -> np.ndarray:
+    """
+    Zero-phase Butterworth low-pass filter of every channel of a signal, used to remove the frequencies that the
+    GPS sampling rate cannot represent before downsampling (anti-aliasing).
+
+    Parameters:
+        values: (n_samples, n_channels) samples, taken at a constant rate.
+        sample_rate_hz: Sampling rate of the signal.
+        cutoff_hz: Cutoff frequency, below the Nyquist frequency of the signal.
+        order: Order of the filter.
+
+    Returns:
+        np.ndarray: (n_samples, n_channels) filtered samples.
+    """
+    nyquist_hz = sample_rate_hz / 2
+    if not 0 < cutoff_hz < nyquist_hz:
+        raise ValueError(f"Cutoff frequency must be between 0 and {nyquist_hz} Hz, found {cutoff_hz} Hz")
+
+    sos = butter(order, cutoff_hz, btype="lowpass", fs=sample_rate_hz, output="sos")
+    # Short signals cannot be padded with as many samples as sosfiltfilt does by default
+    padlen = min(3 * (2 * len(sos) + 1), len(values) - 1)
+    return sosfiltfilt(sos, values, axis=0, padlen=padlen)
+
+
+def sample_rate_hz(time_ms: np.ndarray) -> float:
+    """Sampling rate of a signal from the median interval between its samples, robust to dropped samples."""
+    return 1000.0 / float(np.median(np.diff(time_ms)))
@@ -9,6 +9,8 @@ class RunSchema(OrmBaseModel):
     run_id: str
     driver_id: int
     start_time: datetime
+    # Route the run was matched to, None if it was not
+    dissolved_id: str | None = None
     # TODO: Add end_time later
     # end_timestamp: datetime
 
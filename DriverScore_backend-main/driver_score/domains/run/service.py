@@ -1,30 +1,39 @@
-import itertools
+import logging
 from datetime import datetime
 
 import geopandas as gpd
 import numpy as np
-import orjson
 import pandas as pd
-from pandas.api.types import is_datetime64_any_dtype
+import shapely
 from pydantic_geojson import LineStringModel
-from pyproj import Geod
-from scipy.interpolate import interp1d
 from shapely import LineString, Point
-from sqlalchemy import func, select
+from sqlalchemy import Float, bindparam, func, select, update
+from sqlalchemy.orm import Session
 
+from driver_score.core.bulk import replace_dataframe
+from driver_score.core.columnar import columns_to_models, read_columns, read_run_columns
 from driver_score.core.database import get_db_session
 from driver_score.core.models import GpsSample, ImuSample, RoadCharacteristic, Run, Score
-from driver_score.domains.route.curve.service import RouteSpline
+from driver_score.core.request_cache import invalidate_request_cache, request_cached
+from driver_score.settings import settings
 
 from ..allgather.schemas import GpsSampleSchema, ImuSampleSchema
+from ..route.cache import PROJECTED_CRS, route_cache
 from ..route.service import RouteService
+from .direction import segment_directions
+from .resampling import interpolate_channels, low_pass, sample_rate_hz
 from .schemas import DriverScoreOutSchema, DriverScorePropertiesSchema, RunBasedRCSchema, RunSchema
 
+logger = logging.getLogger(__name__)
+
 
 class RunService:
-    def __init__(self, run_id: str, route_id: str = "SR11"):
+    def __init__(self, run_id: str, route_id: str | None = None, session: Session | None = None):
         self.run_id = run_id
+        # Route the run is segmented and scored along, the one it was matched to if None (see `get_route_id`)
         self.route_id = route_id
+        # Optional session whose transaction all the queries of this service run in
+        self.session = session
 
     @staticmethod
     async def get_runs() -> list[RunSchema]:
@@ -32,8 +41,9 @@ class RunService:
             runs = session.query(Run).all()
             return [RunSchema.model_validate(run) for run in runs]
 
+    @request_cached(key=lambda self: self.run_id)
     async def get_run(self) -> RunSchema:
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             filters = [
                 Run.run_id == self.run_id if self.run_id is not None else True,
                 # TODO: self.run_id is None or Run.run_id == self.run_id
@@ -52,130 +62,270 @@ class RunService:
         Returns:
             None
         """
-        with get_db_session() as session:
+        with get_db_session(self.session) as session:
             run = Run(driver_id=driver_id, run_id=self.run_id, start_time=start_time)
             session.add(run)
+        RunService.invalidate_lookups()
+
+    async def get_route_id(self) -> str:
+        """
+        Get the route the run is segmented and scored along: the route it was matched to at ingestion, or the default
+        route for runs ingested before runs were matched or matched to none.
+        """
+        if self.route_id is None:
+            self.route_id = (await self.get_run()).dissolved_id or settings.DEFAULT_ROUTE_ID
+        return self.route_id
+
+    async def match_route(self, gps_gdf: gpd.GeoDataFrame) -> str | None:
+        """
+        Match the run to the route most of its GPS samples are nearest to (see `route/matching.py`) and persist it.
+
+        The run is then segmented and scored along this route, or along the default route if none is within
+        `settings.ROUTE_MATCH_TOLERANCE_FT` of the samples.
+
+        Parameters:
+            gps_gdf (gpd.GeoDataFrame): The GPS samples of the run, in EPSG:4326.
+
+        Returns:
+            str | None: The ID of the matched route, None if none matched.
+        """
+        points = gps_gdf.geometry.to_crs(PROJECTED_CRS).to_numpy()
+        route_id = route_cache.get_route_index().match(points, tolerance=settings.ROUTE_MATCH_TOLERANCE_FT)
+        if route_id is None:
+            logger.warning(f"Run {self.run_id} is not on any route, it is scored along {settings.DEFAULT_ROUTE_ID}")
+
+        with get_db_session(self.session) as session:
+            session.execute(update(Run).where(Run.run_id == self.run_id).values(dissolved_id=route_id))
+        RunService.invalidate_lookups()
+        self.route_id = route_id or settings.DEFAULT_ROUTE_ID
+        return route_id
+
+    @request_cached(key=lambda self, direction=None: (self.run_id, direction))
+    async def get_gps_columns(self, direction: str | None = None) -> dict[str, np.ndarray]:
+        """
+        Get the GPS samples of the run as columns (see `core/columnar.py`), sorted by timestamp.
+
+        Parameters:
+            direction (str | None): Only get the samples of this direction stretch, e.g. "increasing 2".
+
+        Returns:
+            dict[str, np.ndarray]: One array per field of GpsSampleSchema.
+        """
+        if direction is not None and (computed := await self._get_computed_directions()) is not None:
+            return self._take(await self.get_gps_columns(), computed == direction)
+
+        filters = [] if direction is None else [GpsSample.direction == direction]
+        with get_db_session(self.session) as session:
+            return read_run_columns(session, GpsSample, self.run_id, list(GpsSampleSchema.model_fields), filters)
 
     async def get_gps_samples(self) -> list[GpsSampleSchema]:
-        with get_db_session() as session:
-            gps_points = session.query(GpsSample).filter(GpsSample.run_id == self.run_id).all()
-            gps_points = [GpsSampleSchema.model_validate(gps_point) for gps_point in gps_points]
-            return gps_points
+        return columns_to_models(GpsSampleSchema, await self.get_gps_columns())
 
     async def get_gps_samples_by_direction(self) -> dict[str, list[GpsSampleSchema]]:
         """
-        Query the database for GPS samples linked to the current run ID and validate each sample using GpsSampleSchema.
+        Get the GPS samples of the longest increasing and decreasing stretches of the run.
+
+        Returns:
+            dict[str, list[GpsSampleSchema]]: The samples of the "increasing" and "decreasing" stretches.
+        """
+        return {
+            key: self._to_records(self._gps_geodataframe(await self.get_gps_columns(direction=direction)))
+            for key, direction in (await self._get_longest_stretches()).items()
+        }
+
+    @request_cached(key=lambda self, direction=None: (self.run_id, direction))
+    async def get_imu_columns(self, direction: str | None = None) -> dict[str, np.ndarray]:
+        """
+        Get the IMU samples of the run as columns, resampled onto the timestamps of its GPS samples.
+
+        The IMU channels are fetched as arrays and all of them are interpolated in one pass (see `resampling.py`).
+        When `settings.IMU_LOW_PASS_CUTOFF_HZ` is set, they are low-pass filtered first to avoid aliasing.
+
+        Parameters:
+            direction (str | None): Only resample onto the GPS samples of this direction stretch.
 
         Returns:
-            list[GpsSampleSchema]: A list of validated GPS samples.
+            dict[str, np.ndarray]: One array per field of ImuSampleSchema, one value per GPS sample.
         """
-        gps_points = await self.get_gps_samples()
-        gps_points_by_direction = await self._get_gps_schemas_with_direction(gps_points)
-        return gps_points_by_direction
+        channels = [name for name in ImuSampleSchema.model_fields if name != "timestamp"]
+        filters = [] if direction is None else [GpsSample.direction == direction]
+        computed = None if direction is None else await self._get_computed_directions()
+
+        with get_db_session(self.session) as session:
+            imu = read_run_columns(session, ImuSample, self.run_id, ["timestamp", *channels])
+            if computed is None:
+                gps_timestamps = read_run_columns(session, GpsSample, self.run_id, ["timestamp"], filters)["timestamp"]
+            else:
+                gps_timestamps = read_run_columns(session, GpsSample, self.run_id, ["timestamp"])["timestamp"]
+                gps_timestamps = gps_timestamps[computed == direction]
+
+        # Timestamps in milliseconds
+        imu_time = imu["timestamp"].view(np.int64) // 1000
+        imu_values = np.column_stack([imu[channel] for channel in channels])
+        gps_time = gps_timestamps.view(np.int64) // 1000
+        del imu
+
+        cutoff_hz = settings.IMU_LOW_PASS_CUTOFF_HZ
+        if cutoff_hz:
+            imu_values = low_pass(imu_values, sample_rate_hz=sample_rate_hz(imu_time), cutoff_hz=cutoff_hz)
+
+        resampled = interpolate_channels(imu_time, imu_values, gps_time)
+        return {"timestamp": gps_timestamps, **{channel: resampled[:, i] for i, channel in enumerate(channels)}}
 
     async def get_imu_samples(self) -> list[ImuSampleSchema]:
-        with get_db_session() as session:
-            # Get imu data and gps data first
-            imu_points = session.query(ImuSample).filter(ImuSample.run_id == self.run_id).all()
-            imu_points = [ImuSampleSchema.model_validate(imu_point).model_dump() for imu_point in imu_points]
-            imu_df = pd.DataFrame.from_records(imu_points, index="timestamp")
-
-            # Get all gps samples sorted by timestamp
-            gps_samples = await self.get_gps_samples()
-            gps_samples = sorted(gps_samples, key=lambda gps_sample: gps_sample.timestamp)
-            gps_timestamps = pd.Series([gps_sample.timestamp for gps_sample in gps_samples])
-
-            # Downsample imu data to gps timestamps
-            downsampled_imu_df = pd.DataFrame(index=gps_timestamps.values, columns=imu_df.columns)
-            for column in imu_df.columns:
-                resampled_data = self._interpolate_time_series(
-                    old_time=imu_df.index.values, data=imu_df[column], new_time=gps_timestamps
-                )
-                downsampled_imu_df[column] = resampled_data
-
-            # Convert back to list of ImuSampleSchema for response
-            downsampled_imu_points = [
-                ImuSampleSchema.model_validate({"timestamp": timestamp, **dict(downsampled_imu_point)})
-                for (timestamp, downsampled_imu_point) in zip(
-                    downsampled_imu_df.index.to_pydatetime(),
-                    downsampled_imu_df.to_dict("records"),
-                    strict=True,
-                )
-            ]
-            return downsampled_imu_points
+        """
+        Get the IMU samples of the run, resampled onto the timestamps of its GPS samples (see `get_imu_columns`).
+
+        Returns:
+            list[ImuSampleSchema]: One IMU sample per GPS sample, sorted by timestamp.
+        """
+        return columns_to_models(ImuSampleSchema, await self.get_imu_columns())
 
     async def get_imu_samples_by_direction(self) -> dict[str, list[ImuSampleSchema]]:
         """
-        Query the database for IMU samples linked to the current run ID and validate each sample using ImuSampleSchema.
+        Get the resampled IMU samples of the longest increasing and decreasing stretches of the run.
 
         Returns:
-            list[ImuSampleSchema]: A list of validated IMU samples.
+            dict[str, list[ImuSampleSchema]]: The samples of the "increasing" and "decreasing" stretches.
+        """
+        return {
+            key: self._to_records(pd.DataFrame(await self.get_imu_columns(direction=direction)).set_index("timestamp"))
+            for key, direction in (await self._get_longest_stretches()).items()
+        }
+
+    async def segment_gps_samples(self, gps_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
         """
-        downsampled_imu_samples = await self.get_imu_samples()
-        gps_samples = await self.get_gps_samples()
-        downsampled_imu_samples_by_direction = await self._get_imu_schemas_with_direction(
-            points=downsampled_imu_samples, gps_points=gps_samples
+        Compute the normalized LRS along the route and the direction stretch label of GPS samples.
+
+        They are stored with the samples at ingestion, so that the by-direction endpoints only filter on them.
+
+        Parameters:
+            gps_gdf (gpd.GeoDataFrame): The GPS samples of the run, indexed by timestamp and sorted.
+
+        Returns:
+            pd.DataFrame: The "lrs" and "direction" of every sample, indexed like gps_gdf.
+        """
+        route_id = await self.get_route_id()
+        centerline = await RouteService(route_id).get_route(route_id)
+        return self._compute_direction(gps_gdf, centerline=centerline)
+
+    async def persist_directions_to_db(self) -> None:
+        """
+        Compute and store the LRS and direction labels of the GPS samples of a run ingested without them.
+
+        Only called by the backfill of these runs (see `backfill.py`), the read endpoints compute the labels of such
+        runs in memory instead.
+        """
+        segments = await self.segment_gps_samples(self._gps_geodataframe(await self.get_gps_columns()))
+
+        gps_sample = GpsSample.__table__
+        with get_db_session(self.session) as session:
+            session.execute(
+                gps_sample.update()
+                .where(gps_sample.c.run_id == self.run_id, gps_sample.c.timestamp == bindparam("b_timestamp"))
+                .values(lrs=bindparam("b_lrs"), direction=bindparam("b_direction")),
+                [
+                    {"b_timestamp": timestamp, "b_lrs": lrs, "b_direction": direction}
+                    for timestamp, lrs, direction in zip(
+                        segments.index.to_pydatetime(), segments["lrs"].tolist(), segments["direction"], strict=True
+                    )
+                ],
+            )
+        RunService.invalidate_lookups()
+
+    @staticmethod
+    def invalidate_lookups() -> None:
+        """
+        Drop the cached lookups of the runs (run, samples and directions) from the current request scope, once any
+        of them is written, see `core/request_cache.py`.
+        """
+        invalidate_request_cache(
+            RunService.get_run,
+            RunService.get_gps_columns,
+            RunService.get_imu_columns,
+            RunService._get_longest_stretches,
+            RunService._get_directions,
         )
 
-        return downsampled_imu_samples_by_direction
+    @request_cached(key=lambda self: self.run_id)
+    async def _get_longest_stretches(self) -> dict[str, str]:
+        """
+        Get the labels of the longest increasing and decreasing stretches of the run, from the stored labels.
 
-    async def _get_gps_schemas_with_direction(
-        self, gps_points: list[GpsSampleSchema]
-    ) -> dict[str, list[GpsSampleSchema]]:
-        # TODO: Fix duplicate code
-        gps_df = pd.DataFrame.from_records([gps_point.model_dump() for gps_point in gps_points], index="timestamp")
-        geometry = gpd.points_from_xy(gps_df["longitude"], gps_df["latitude"])
-        gps_gdf = gpd.GeoDataFrame(gps_df, geometry=geometry, crs="EPSG:4326")
+        Returns:
+            dict[str, str]: The labels of the "increasing" and "decreasing" stretches.
+        """
+        increasing, decreasing = self._get_increasing_and_decreasing((await self._get_directions())[0])
+        return {"increasing": increasing, "decreasing": decreasing}
 
-        centerline = await RouteService(self.route_id).get_route(self.route_id)
-        gps_gdf["direction"] = self._compute_direction(gps_gdf, centerline=centerline)
+    @request_cached(key=lambda self: self.run_id)
+    async def _get_directions(self) -> tuple[dict[str, int], np.ndarray | None]:
+        """
+        Count the GPS samples of the run per direction label.
 
-        # We remove the "direction" attribute from each record
-        def _remove_key(samples: list[dict], key: str):
-            return [{k: v for k, v in sample.items() if k != key} for sample in samples]
+        Runs ingested before the labels were stored, and not backfilled yet (see `backfill.py`), get them computed in
+        memory: read endpoints do not write them.
 
-        tmp = {
-            k: _remove_key(g.to_dict(orient="records", index=True), key="direction")
-            for k, g in gps_gdf.reset_index().groupby("direction")
-        }
-        increasing, decreasing = self._get_increasing_and_decreasing(tmp)
-        return {"increasing": increasing[1], "decreasing": decreasing[1]}
-
-    async def _get_imu_schemas_with_direction(
-        self, points: list[ImuSampleSchema], gps_points: list[GpsSampleSchema]
-    ) -> dict[str, list[ImuSampleSchema]]:
-        # TODO: Fix duplicate code
-        # Get directions using GPS
-        gps_df = pd.DataFrame.from_records([gps_point.model_dump() for gps_point in gps_points], index="timestamp")
-        geometry = gpd.points_from_xy(gps_df["longitude"], gps_df["latitude"])
-        gps_gdf = gpd.GeoDataFrame(gps_df, geometry=geometry, crs="EPSG:4326")
+        Returns:
+            tuple[dict[str, int], np.ndarray | None]: The number of samples per label, and the computed label of every
+                GPS sample, sorted by timestamp, or None if the labels are stored.
+        """
+        query = (
+            select(GpsSample.direction, func.count())
+            .where(GpsSample.run_id == self.run_id)
+            .group_by(GpsSample.direction)
+        )
+        with get_db_session(self.session) as session:
+            sizes = dict(session.execute(query).all())
+        if None not in sizes:
+            return sizes, None
 
-        centerline = await RouteService(self.route_id).get_route(self.route_id)
+        gps_gdf = self._gps_geodataframe(await self.get_gps_columns())
+        directions = (await self.segment_gps_samples(gps_gdf))["direction"].to_numpy()
+        labels, counts = np.unique(directions, return_counts=True)
+        return dict(zip(labels.tolist(), counts.tolist(), strict=True)), directions
 
-        # Points
-        df = pd.DataFrame.from_records([imu_point.model_dump() for imu_point in points], index="timestamp")
-        df["direction"] = self._compute_direction(gps_gdf, centerline=centerline)
+    async def _get_computed_directions(self) -> np.ndarray | None:
+        """The direction labels computed in memory of a run without stored labels, None if they are stored."""
+        return (await self._get_directions())[1]
 
-        # We remove the "direction" attribute from each record
-        def _remove_key(samples: list[dict], key: str):
-            return [{k: v for k, v in sample.items() if k != key} for sample in samples]
+    @staticmethod
+    def _take(columns: dict[str, np.ndarray], mask: np.ndarray) -> dict[str, np.ndarray]:
+        return {name: values[mask] for name, values in columns.items()}
 
-        tmp = {
-            k: _remove_key(g.to_dict(orient="records", index=True), key="direction")
-            for k, g in df.reset_index().groupby("direction")
-        }
+    @staticmethod
+    def _gps_geodataframe(gps: dict[str, np.ndarray]) -> gpd.GeoDataFrame:
+        gps_df = pd.DataFrame(gps).set_index("timestamp")
+        geometry = gpd.points_from_xy(gps_df["longitude"], gps_df["latitude"])
+        return gpd.GeoDataFrame(gps_df, geometry=geometry, crs="EPSG:4326")
 
-        increasing, decreasing = self._get_increasing_and_decreasing(tmp)
-        return {"increasing": increasing[1], "decreasing": decreasing[1]}
+    @staticmethod
+    def _to_records(df: pd.DataFrame) -> list[dict]:
+        return df.reset_index().to_dict(orient="records")
 
-    async def get_scores(self) -> DriverScoreOutSchema:
-        with get_db_session() as session:
+    async def get_score_columns(self, direction: str | None = None) -> dict[str, np.ndarray]:
+        """
+        Get the scores of the run as columns, with the position and linear reference of their GPS samples.
+
+        Parameters:
+            direction (str | None): Only get the scores of the GPS samples of this direction stretch.
+
+        Returns:
+            dict[str, np.ndarray]: "timestamp", "longitude", "latitude", "score" and "lrs", sorted by timestamp.
+        """
+        if direction is not None and (computed := await self._get_computed_directions()) is not None:
+            # One row per GPS sample, in the order of the computed labels
+            return self._take(await self.get_score_columns(), computed == direction)
+
+        filters = [] if direction is None else [GpsSample.direction == direction]
+        with get_db_session(self.session) as session:
             query = (
                 select(
                     GpsSample.timestamp,
-                    func.ST_AsGeoJson(GpsSample.geometry).label("geometry"),
+                    func.ST_X(GpsSample.geometry, type_=Float).label("longitude"),
+                    func.ST_Y(GpsSample.geometry, type_=Float).label("latitude"),
                     Score.score,
-                    RoadCharacteristic.gps_lrs,
+                    RoadCharacteristic.gps_lrs.label("lrs"),
                 )
                 .select_from(GpsSample)
                 .outerjoin(Score, (GpsSample.run_id == Score.run_id) & (GpsSample.timestamp == Score.timestamp))
@@ -184,83 +334,55 @@ class RunService:
                     (GpsSample.run_id == RoadCharacteristic.run_id)
                     & (GpsSample.timestamp == RoadCharacteristic.timestamp),
                 )
-                .where(GpsSample.run_id == self.run_id)
+                .where(GpsSample.run_id == self.run_id, *filters)
+                .order_by(GpsSample.timestamp)
             )
+            return read_columns(session, query)
 
-            result = session.execute(query).all()
-            timestamps, geometries, scores, lrs = zip(*result, strict=False)
-            coordinates = [orjson.loads(geometry)["coordinates"] for geometry in geometries]
-
-            driver_id = (await self.get_run()).driver_id
+    async def get_scores(self) -> DriverScoreOutSchema:
+        score_gdf = self._score_geodataframe(await self.get_score_columns())
+        driver_id = (await self.get_run()).driver_id
 
-            # TODO: Investigate why lrs is None at the beginning and the end
-            return DriverScoreOutSchema(
-                geometry=LineStringModel(coordinates=coordinates),
-                properties=DriverScorePropertiesSchema(
-                    driver_id=driver_id, timestamps=timestamps, scores=scores, lrs=lrs
-                ),
-            )
+        # TODO: Investigate why lrs is None at the beginning and the end
+        return self._to_driver_score_schema(score_gdf, driver_id=driver_id)
 
     async def get_scores_by_direction(self) -> dict[str, DriverScoreOutSchema]:
-        scoresSchema = await self.get_scores()
-        timestamps = scoresSchema.properties.timestamps
-        scores = scoresSchema.properties.scores
-        lrs = scoresSchema.properties.lrs
-        coordinates = scoresSchema.geometry.coordinates
-
-        score_gdf = gpd.GeoDataFrame(
-            {
-                "timestamp": timestamps,
-                "geometry": [Point(coordinate) for coordinate in coordinates],
-                "score": scores,
-                "lrs": lrs,
-            },
-            crs="EPSG:4326",
-        ).set_index("timestamp")
-
+        scores_by_direction = await self._get_scores_by_direction()
         driver_id = (await self.get_run()).driver_id
-        score_gdf["driver_id"] = driver_id
-
-        gps_samples = itertools.chain.from_iterable((await self.get_gps_samples_by_direction()).values())
-        gps_samples = sorted(gps_samples, key=lambda gps_sample: gps_sample["timestamp"])
-        driver_scores_by_direction = await self._get_scores_schemas_with_direction(df=score_gdf, gps_points=gps_samples)
-        return driver_scores_by_direction
-
-    async def _get_scores_schemas_with_direction(
-        self, df: gpd.GeoDataFrame, gps_points: list[GpsSampleSchema]
-    ) -> dict[str, DriverScoreOutSchema]:
-        # TODO: Fix duplicate code
-        # Get directions using GPS
-        gps_df = pd.DataFrame.from_records(gps_points, index="timestamp")
-        geometry = gpd.points_from_xy(gps_df["longitude"], gps_df["latitude"])
-        gps_gdf = gpd.GeoDataFrame(gps_df, geometry=geometry, crs="EPSG:4326")
-
-        centerline = await RouteService(self.route_id).get_route(self.route_id)
-
-        # Score points
-        df["direction"] = self._compute_direction(gps_gdf, centerline=centerline)
-
-        # We remove the "direction" attribute from each record
-        def _remove_key(samples: list[dict], key: str):
-            return [{k: v for k, v in sample.items() if k != key} for sample in samples]
-
-        tmp = {
-            direction: _remove_key(samples.to_dict(orient="records", index=True), key="direction")
-            for direction, samples in df.reset_index().groupby("direction")
+        return {
+            direction: self._to_driver_score_schema(score_gdf, driver_id=driver_id)
+            for direction, score_gdf in scores_by_direction.items()
         }
 
-        def _samples_to_schema(samples: list[dict]) -> DriverScoreOutSchema:
-            driver_id = samples[0]["driver_id"]
-            timestamps = [sample["timestamp"] for sample in samples]
-            scores = [sample["score"] for sample in samples]
-            lrs = [sample["lrs"] for sample in samples]
+    async def _get_scores_by_direction(self) -> dict[str, gpd.GeoDataFrame]:
+        return {
+            key: self._score_geodataframe(await self.get_score_columns(direction=direction))
+            for key, direction in (await self._get_longest_stretches()).items()
+        }
 
-            sub_schema = DriverScorePropertiesSchema(driver_id=driver_id, timestamps=timestamps, scores=scores, lrs=lrs)
-            geometries = LineStringModel(coordinates=[sample["geometry"].coords[0] for sample in samples])
-            return DriverScoreOutSchema(properties=sub_schema, geometry=geometries)
+    @staticmethod
+    def _score_geodataframe(scores: dict[str, np.ndarray]) -> gpd.GeoDataFrame:
+        geometry = gpd.points_from_xy(scores["longitude"], scores["latitude"])
+        return gpd.GeoDataFrame(
+            {"score": scores["score"], "lrs": scores["lrs"]},
+            index=pd.Index(scores["timestamp"], name="timestamp"),
+            geometry=geometry,
+            crs="EPSG:4326",
+        )
 
-        increasing, decreasing = self._get_increasing_and_decreasing(tmp)
-        return {"increasing": _samples_to_schema(increasing[1]), "decreasing": _samples_to_schema(decreasing[1])}
+    @staticmethod
+    def _to_driver_score_schema(score_gdf: gpd.GeoDataFrame, driver_id: int) -> DriverScoreOutSchema:
+        # Missing linear references are None in the response, not NaN
+        lrs = score_gdf["lrs"].astype(object).where(score_gdf["lrs"].notna(), None)
+        return DriverScoreOutSchema(
+            geometry=LineStringModel(coordinates=shapely.get_coordinates(score_gdf.geometry.to_numpy()).tolist()),
+            properties=DriverScorePropertiesSchema(
+                driver_id=driver_id,
+                timestamps=score_gdf.index.tolist(),
+                scores=score_gdf["score"].tolist(),
+                lrs=lrs.tolist(),
+            ),
+        )
 
     async def get_run_based_RCs(self) -> list[RunBasedRCSchema]:
         """
@@ -270,23 +392,17 @@ class RunService:
         Args:
             run_id (str): _description_
         """
-        route_centerline = await RouteService(self.route_id).get_route(self.route_id)
-        route_spline = RouteSpline(route_geom=route_centerline)
-        # # TODO: Mock
-        # curve_gdf = gpd.read_file("data/SR11_curves.geojson", driver="GeoJSON")
-        # curve_gdf.set_crs(
-        #     epsg=4326, inplace=True
-        # )  # for some reason the crs is not being read from the GeoJSON, thus setting it manually
-        # curve_gdf.to_crs(2239, inplace=True)
+        run_based_RCs = await self._get_run_based_RC_frame()
+        return [RunBasedRCSchema(**record) for record in run_based_RCs.to_dict(orient="records")]
 
-        # route_gdf = gpd.read_file("data/SR11.shp")
-        # route_gdf.to_crs(
-        #     2239, inplace=True
-        # )  # converting crs to feet, this is important for the spline radius results to be in feet as well, curvature will be in 1/ft
-        # route_centerline = route_gdf.geometry[0]
-        # route_spline = RouteSpline(route_centerline)
+    async def _get_run_based_RC_frame(self) -> pd.DataFrame:
+        """Run-based RCs as the columns of the road_characteristic table, one row per scored sample."""
+        # The centerline and the profile are in feet, so are the LRS and the curvature (1/ft)
+        route_id = await self.get_route_id()
+        route_centerline = route_cache.get(route_id).projected_geometry
+        curvature_profile = route_cache.get_curvature_profile(route_id)
 
-        scores_by_direction = await RunService(self.run_id).get_scores_by_direction()
+        scores_by_direction = await self._get_scores_by_direction()
 
         def _get_curvature_closest_curve_to_point(point: Point, curve_gdf: gpd.GeoDataFrame) -> float:
             distances = curve_gdf.geometry.distance(point)
@@ -298,139 +414,60 @@ class RunService:
 
             return 1 / closest_row.c_radius
 
-        # Flatten scores_by_direction and convert to list of RunBasedRCSchema
-        run_based_RCs: list[RunBasedRCSchema] = []
-        for direction, scores in scores_by_direction.items():
-            timestamps = scores.properties.timestamps
-            coordinates = scores.geometry.coordinates
-            coordinates_in_feet = (
-                gpd.GeoDataFrame(geometry=[Point(c.lon, c.lat) for c in coordinates], crs="EPSG:4326")
-                .to_crs(2239)
-                .geometry
-            )
-
-            for timestamp, gps_sample in zip(timestamps, coordinates_in_feet, strict=True):
-                run_based_RC = RunBasedRCSchema(
-                    run_id=self.run_id,
-                    timestamp=timestamp,
-                    dissolved_id=self.route_id,
-                    gps_lrs=route_centerline.project(gps_sample),
-                    driving_direction=direction,
-                    curvature=route_spline.get_curveature_at_point(gps_sample),
+        # Flatten scores_by_direction
+        run_based_RCs: list[pd.DataFrame] = []
+        for direction, score_gdf in scores_by_direction.items():
+            coordinates_in_feet = score_gdf.geometry.to_crs(PROJECTED_CRS).to_numpy()
+            gps_lrs = shapely.line_locate_point(route_centerline, coordinates_in_feet)
+            run_based_RCs.append(
+                pd.DataFrame(
+                    {
+                        "run_id": self.run_id,
+                        "timestamp": score_gdf.index.to_numpy(),
+                        "dissolved_id": route_id,
+                        "gps_lrs": gps_lrs,
+                        "driving_direction": direction,
+                        "curvature": curvature_profile.curvatures_at_LRS(gps_lrs),
+                    }
                 )
-                run_based_RCs.append(run_based_RC)
+            )
 
-        return run_based_RCs
+        return pd.concat(run_based_RCs, ignore_index=True)
 
     async def persist_run_based_RCs_to_db(self):
-        """Persist run-based RCs to the road_chracteristics table."""
-        with get_db_session() as session:
-            run_based_RCs = await self.get_run_based_RCs()
-            session.add_all([RoadCharacteristic(**run_based_RC.model_dump()) for run_based_RC in run_based_RCs])
-
-    def _get_increasing_and_decreasing(self, tmp):
-        # TODO: Clean this complicated code
-        increasing = sorted(
-            [(direction, val) for direction, val in tmp.items() if direction.startswith("increasing")],
-            key=lambda x: len(x[1]),
-            reverse=True,
-        )[0]
-        decreasing = sorted(
-            [(direction, val) for direction, val in tmp.items() if direction.startswith("decreasing")],
-            key=lambda x: len(x[1]),
-            reverse=True,
-        )[0]
+        """
+        Persist run-based RCs to the road_chracteristics table.
 
+        The RCs of a run processed again replace all the ones stored, see `replace_dataframe`: samples outside the
+        stretches of the new pass have no RCs anymore.
+        """
+        run_based_RCs = await self._get_run_based_RC_frame()
+        with get_db_session(self.session) as session:
+            replace_dataframe(session.connection(), RoadCharacteristic.__table__, run_based_RCs, run_id=self.run_id)
+
+    def _get_increasing_and_decreasing(self, sizes: dict[str, int]) -> tuple[str, str]:
+        """Labels of the longest increasing and decreasing stretches, the first one in label order on ties."""
+        increasing = max(sorted(label for label in sizes if label.startswith("increasing")), key=sizes.get)
+        decreasing = max(sorted(label for label in sizes if label.startswith("decreasing")), key=sizes.get)
         return increasing, decreasing
 
-    def _compute_direction(self, gps_gdf: gpd.GeoDataFrame, centerline: LineString) -> pd.Series:
+    def _compute_direction(self, gps_gdf: gpd.GeoDataFrame, centerline: LineString) -> pd.DataFrame:
         """
-        Computes the direction of the trajectory based on consecutive LRS values.
+        Computes the direction of the trajectory based on consecutive LRS values (see `direction.py`).
 
         Parameters:
         - gps_gdf: A GeoDataFrame with the GPS points. The index is assumed to be a timestamp.
         - centerline: A LineString representing the roadway centerline
 
         Returns:
-        A Series of 'increasing', 'decreasing', or 'stationary' values.
-
-        """
-
-        def _compute_LRS(gdf: gpd.GeoDataFrame | gpd.GeoSeries, centerline: LineString):
-            """
-            Project data in GeoDataFrame on to a LineString to compute the linear reference distance for the data
-            """
-            return gdf.apply(lambda row: centerline.project(row.geometry, normalized=True), axis=1)
-
-        LRS_values = _compute_LRS(gps_gdf, centerline)
-        geod = Geod(ellps="WGS84")
-
-        # Default to stationary for the first point
-        directions = ["stationary 1"]
-        current_direction = "stationary"
-        count_by_direction = {"increasing": 1, "decreasing": 1, "stationary": 1}
-
-        for i in range(1, len(LRS_values)):
-            start_point = gps_gdf.geometry.iloc[i - 1]
-            end_point = gps_gdf.geometry.iloc[i]
-
-            if isinstance(gps_gdf.index, pd.DatetimeIndex):
-                # Calculate time difference between consecutive points in seconds
-                time_delta = (gps_gdf.index[i] - gps_gdf.index[i - 1]).total_seconds()
-            else:
-                time_delta = 1
-
-            # Calculate distance between consecutive points
-            _, _, distance = geod.inv(start_point.x, start_point.y, end_point.x, end_point.y)
-
-            # Dynamic threshold based on time difference
-            threshold = 0.5 * time_delta  # 0.5 meters/second * elapsed seconds
-
-            next_direction = ""
-            # Check for stationary condition
-            if distance <= threshold:
-                next_direction = "stationary"
-            elif LRS_values.iloc[i] > LRS_values.iloc[i - 1]:
-                next_direction = "increasing"
-            else:
-                next_direction = "decreasing"
-
-            if next_direction != current_direction:
-                count_by_direction[current_direction] += 1
-
-            current_direction = next_direction
-            counter = count_by_direction[current_direction]
-            directions.append(f"{current_direction} {counter}")
-
-        return pd.Series(directions, index=gps_gdf.index)
-
-    def _interpolate_time_series(self, old_time: pd.Series, data: pd.Series, new_time: pd.Series) -> np.ndarray:
-        """
-        Author: Lucas Yu
-        Interpolates time series data to align with a new time series.
-
-        Parameters:
-        old_time (pd.Series): Original time series (must be of datetime dtype).
-        data (pd.Series): Data series corresponding to the old_time series.
-        new_time (pd.Series): New time series to which data will be interpolated (must be of datetime dtype).
-
-        Returns:
-        np.ndarray: Interpolated data corresponding to the new_time series.
+        A DataFrame with the normalized "lrs" of the points and their "direction": 'increasing N', 'decreasing N', or
+        'stationary N' values, N numbering the stretches of a direction.
 
-        Note:
-        This function uses linear interpolation to fill in the data for the new_time series.
-        If new_time contains points outside the range of old_time, the function will use the first and last values of data to fill in these points.
         """
-        # Check if old_time and new_time are datetime dtype
-        if is_datetime64_any_dtype(old_time) and is_datetime64_any_dtype(new_time):
-            new_time = new_time.astype(np.int64) // 10**6
-            old_time = old_time.astype(np.int64) // 10**6
-
-        # If not datetime dtype, raise an error
-        else:
-            raise ValueError("Both old_time and new_time must be of datetime dtype.")
-
-        f = interp1d(old_time, data, bounds_error=False, fill_value=(data.iloc[0], data.iloc[-1]))
-        resampled_data = f(new_time)
+        step_seconds = None
+        if isinstance(gps_gdf.index, pd.DatetimeIndex):
+            # Time difference between consecutive points in seconds
+            step_seconds = np.diff(gps_gdf.index.as_unit("ns").asi8) / 1e9
 
-        return resampled_data
+        lrs, directions = segment_directions(centerline, gps_gdf.geometry.to_numpy(), step_seconds=step_seconds)
+        return pd.DataFrame({"lrs": lrs, "direction": directions}, index=gps_gdf.index)
@@ -0,0 +1,28 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from .enums import TileLayer
+from .service import TileService
+
+router = APIRouter(dependencies=[])
+logger = logging.getLogger(__name__)
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get("/{z}/{x}/{y}.mvt", response_class=Response)
+async def get_tile(
+    z: int,
+    x: int,
+    y: int,
+    layers: list[TileLayer] = Query(default=list(TileLayer)),
+    run_id: str | None = None,
+    driver_id: int | None = None,
+    route_id: str | None = None,
+):
+    if not TileService.tile_exists(z, x, y):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tile {z}/{x}/{y} does not exist")
+
+    service = TileService(z, x, y, run_id=run_id, driver_id=driver_id, route_id=route_id)
+    return Response(content=await service.get_tile(layers), media_type=MVT_MEDIA_TYPE)
@@ -0,0 +1,68 @@
+"""
+In-process cache of the vector tiles served by `/tiles/{z}/{x}/{y}.mvt`.
+
+Tiles are cached by coordinates, layers and filters, the least recently used ones are dropped beyond
+`settings.TILE_CACHE_SIZE` tiles. Tiles showing the samples of a run are invalidated when the run is processed again
+(see `allgather/jobs.py`), and tiles showing a route when the route or its curves are uploaded. The cache is per
+process, like the route cache: other API processes keep serving the previous tiles until they are dropped.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from driver_score.settings import settings
+
+from .enums import TileLayer
+
+
+@dataclass(frozen=True)
+class TileKey:
+    z: int
+    x: int
+    y: int
+    layers: tuple[TileLayer, ...]
+    run_id: str | None = None
+    driver_id: int | None = None
+    route_id: str | None = None
+
+
+class TileCache:
+    def __init__(self, max_size: int = settings.TILE_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._tiles: OrderedDict[TileKey, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: TileKey) -> bytes | None:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+            return tile
+
+    def put(self, key: TileKey, tile: bytes) -> None:
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_size:
+                self._tiles.popitem(last=False)
+
+    def invalidate_run(self, run_id: str) -> None:
+        """Drop the tiles that may show the samples of a run: the ones of the run and the ones not filtered by run."""
+        self._drop(lambda key: key.run_id in (None, run_id))
+
+    def invalidate_route(self, route_id: str) -> None:
+        """Drop the tiles that may show a route: the ones of the route and the ones not filtered by route."""
+        self._drop(lambda key: key.route_id in (None, route_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
+
+    def _drop(self, predicate) -> None:
+        with self._lock:
+            for key in [key for key in self._tiles if predicate(key)]:
+                del self._tiles[key]
+
+
+tile_cache = TileCache()
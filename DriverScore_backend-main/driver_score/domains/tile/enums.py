@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class TileLayer(str, Enum):
+    SCORES = "scores"
+    SEGMENTS = "segments"
+    CURVES = "curves"
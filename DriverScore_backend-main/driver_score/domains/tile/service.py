@@ -0,0 +1,212 @@
+"""
+Mapbox vector tiles of the scores, route segments and curves, encoded by PostGIS (`ST_AsMVT`).
+
+A tile only holds the features within its bounds, simplified to its resolution, so map payloads depend on the
+viewport rather than on the number of runs stored. Every layer is one query, using the spatial indexes of the tables:
+
+- scores: the mean score and number of the scored GPS samples in every pixel of the tile (`EXTENT` x `EXTENT`).
+- segments: the curves and tangents of the routes (see `route/segmentation.py`), with the mean score of the samples
+  of the selected runs within their LRS interval when the tile is filtered by run or driver.
+- curves: the curve inventory of the routes.
+
+Tiles are filtered by run, driver or route. The samples are the ones of the runs matching all the filters, and the
+segments and curves the ones of the filtered route, or of the routes of the selected runs when filtered by run or
+driver.
+"""
+
+from sqlalchemy import LargeBinary, func, literal, select, true
+from sqlalchemy.orm import Session
+
+from driver_score.core.database import get_db_session
+from driver_score.core.models import CurveInventory, GpsSample, RoadCharacteristic, RouteSegment, Run, Score
+from driver_score.settings import settings
+
+from .cache import TileKey, tile_cache
+from .enums import TileLayer
+
+# Resolution of the tiles, and margin around them (in tile units) for the features crossing their edges
+EXTENT = 4096
+BUFFER = 64
+# CRS of the tile envelopes (Web Mercator), and width of its world, in meters
+TILE_SRID = 3857
+WORLD_WIDTH = 2 * 20037508.342789244
+
+
+class TileService:
+    def __init__(
+        self,
+        z: int,
+        x: int,
+        y: int,
+        run_id: str | None = None,
+        driver_id: int | None = None,
+        route_id: str | None = None,
+        session: Session | None = None,
+    ):
+        self.z, self.x, self.y = z, x, y
+        self.run_id = run_id
+        self.driver_id = driver_id
+        self.route_id = route_id
+        self.session = session
+
+    @staticmethod
+    def tile_exists(z: int, x: int, y: int) -> bool:
+        return 0 <= z <= 30 and 0 <= x < 2**z and 0 <= y < 2**z
+
+    async def get_tile(self, layers: list[TileLayer]) -> bytes:
+        """
+        Get the tile with the given layers, from the tile cache if it was already encoded.
+
+        Returns:
+            bytes: The tile, in the Mapbox vector tile format (empty without features).
+        """
+        key = TileKey(
+            self.z,
+            self.x,
+            self.y,
+            layers=tuple(dict.fromkeys(layers)),
+            run_id=self.run_id,
+            driver_id=self.driver_id,
+            route_id=self.route_id,
+        )
+        tile = tile_cache.get(key)
+        if tile is not None:
+            return tile
+
+        queries = {
+            TileLayer.SCORES: self._scores_query,
+            TileLayer.SEGMENTS: self._segments_query,
+            TileLayer.CURVES: self._curves_query,
+        }
+        with get_db_session(self.session) as session:
+            # The layers of a tile are concatenated
+            tile = b"".join(bytes(session.execute(queries[layer]()).scalar() or b"") for layer in key.layers)
+
+        tile_cache.put(key, tile)
+        return tile
+
+    def _envelope(self):
+        return func.ST_TileEnvelope(self.z, self.x, self.y)
+
+    def _intersects_tile(self, geometry):
+        """Whether a geometry in EPSG:4326 is within the tile, with the spatial index of its column."""
+        margin = WORLD_WIDTH / 2**self.z * BUFFER / EXTENT
+        return func.ST_Intersects(geometry, func.ST_Transform(func.ST_Expand(self._envelope(), margin), 4326))
+
+    def _mvt_geometry(self, geometry):
+        """A geometry in EPSG:4326 in the coordinates of the tile, clipped to it."""
+        return func.ST_AsMVTGeom(
+            func.ST_Transform(func.ST_Force2D(geometry), TILE_SRID), self._envelope(), EXTENT, BUFFER, True
+        )
+
+    def _run_filters(self) -> list:
+        filters = []
+        if self.run_id is not None:
+            filters.append(Run.run_id == self.run_id)
+        if self.driver_id is not None:
+            filters.append(Run.driver_id == self.driver_id)
+        if self.route_id is not None:
+            filters.append(self._run_route() == self.route_id)
+        return filters
+
+    @staticmethod
+    def _run_route():
+        # Runs ingested before runs were matched to routes are scored along the default route (see RunService)
+        return func.coalesce(Run.dissolved_id, settings.DEFAULT_ROUTE_ID)
+
+    def _route_filter(self, route_id_column):
+        if self.route_id is not None:
+            return route_id_column == self.route_id
+        if self.run_id is None and self.driver_id is None:
+            return true()
+        return route_id_column.in_(select(self._run_route()).where(*self._run_filters()))
+
+    @staticmethod
+    def _encode(rows, layer: TileLayer):
+        """Query of the tile layer of the rows of a subquery with a "geom" column, rows without geometry excluded."""
+        features = select(rows).where(rows.c.geom.is_not(None)).subquery("features")
+        return select(func.ST_AsMVT(features.table_valued(), layer.value, EXTENT, "geom", type_=LargeBinary))
+
+    def _scores_query(self):
+        samples = (
+            select(self._mvt_geometry(GpsSample.geometry).label("geom"), Score.score)
+            .select_from(GpsSample)
+            .join(Score, (GpsSample.run_id == Score.run_id) & (GpsSample.timestamp == Score.timestamp))
+            .join(Run, GpsSample.run_id == Run.run_id)
+            .where(self._intersects_tile(GpsSample.geometry), *self._run_filters())
+            .subquery("samples")
+        )
+        # Samples in the same pixel of the tile are aggregated
+        pixels = (
+            select(
+                samples.c.geom,
+                func.avg(samples.c.score).label("score"),
+                func.count().label("samples"),
+            )
+            .group_by(samples.c.geom)
+            .subquery("pixels")
+        )
+        return self._encode(pixels, TileLayer.SCORES)
+
+    def _segments_query(self):
+        columns = [
+            self._mvt_geometry(RouteSegment.geometry).label("geom"),
+            RouteSegment.dissolved_id.label("route_id"),
+            RouteSegment.segment_type.label("type"),
+            RouteSegment.segment_id.label("id"),
+        ]
+        query = select(RouteSegment)
+
+        if self.run_id is not None or self.driver_id is not None:
+            # Scores of the selected runs, joined to the segments on the LRS of their samples along the route
+            segment_scores = (
+                select(
+                    RouteSegment.dissolved_id,
+                    RouteSegment.segment_type,
+                    RouteSegment.segment_id,
+                    func.avg(Score.score).label("score"),
+                    func.count().label("samples"),
+                )
+                .select_from(RoadCharacteristic)
+                .join(Run, RoadCharacteristic.run_id == Run.run_id)
+                .join(
+                    Score,
+                    (RoadCharacteristic.run_id == Score.run_id) & (RoadCharacteristic.timestamp == Score.timestamp),
+                )
+                .join(
+                    RouteSegment,
+                    (RouteSegment.dissolved_id == RoadCharacteristic.dissolved_id)
+                    & RoadCharacteristic.gps_lrs.between(RouteSegment.start_lrs, RouteSegment.end_lrs),
+                )
+                .where(*self._run_filters())
+                .group_by(RouteSegment.dissolved_id, RouteSegment.segment_type, RouteSegment.segment_id)
+                .subquery("segment_scores")
+            )
+            columns += [segment_scores.c.score, func.coalesce(segment_scores.c.samples, literal(0)).label("samples")]
+            query = query.outerjoin(
+                segment_scores,
+                (segment_scores.c.dissolved_id == RouteSegment.dissolved_id)
+                & (segment_scores.c.segment_type == RouteSegment.segment_type)
+                & (segment_scores.c.segment_id == RouteSegment.segment_id),
+            )
+
+        segments = (
+            query.with_only_columns(*columns)
+            .where(self._intersects_tile(RouteSegment.geometry), self._route_filter(RouteSegment.dissolved_id))
+            .subquery("segments")
+        )
+        return self._encode(segments, TileLayer.SEGMENTS)
+
+    def _curves_query(self):
+        curves = (
+            select(
+                self._mvt_geometry(CurveInventory.geometry).label("geom"),
+                CurveInventory.curve_id.label("id"),
+                CurveInventory.dissolved_id.label("route_id"),
+                CurveInventory.c_type.label("type"),
+                CurveInventory.c_radius.label("radius"),
+            )
+            .where(self._intersects_tile(CurveInventory.geometry), self._route_filter(CurveInventory.dissolved_id))
+            .subquery("curves")
+        )
+        return self._encode(curves, TileLayer.CURVES)
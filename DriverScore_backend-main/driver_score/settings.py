@@ -17,6 +17,11 @@ logging_level = os.environ["LOGGING_LEVEL"] if "LOGGING_LEVEL" in os.environ els
 
 DRIVER_SCORE_LOG_DIR = Path(tempfile.gettempdir()) / "driver-score"
 DRIVER_SCORE_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# Uploaded archives waiting to be processed by the upload workers. Every API instance sharing the
+# database must see the same folder (e.g. a shared volume) since any of them may pick up a job.
+DRIVER_SCORE_UPLOAD_DIR = Path(tempfile.gettempdir()) / "driver-score-uploads"
+DRIVER_SCORE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 log_file = DRIVER_SCORE_LOG_DIR / f"{datetime.now().strftime(settings.LOG_FORMAT)}.log"
 
 logging.basicConfig(
@@ -0,0 +1,101 @@
+import io
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+
+import pytest
+
+from driver_score.domains.allgather.archive import AllGatherArchive, UnsupportedArchiveError
+from driver_score.domains.allgather.parsers import read_location_csv
+
+TIMESTAMP = "2022_05_25_20_19_06_302"
+PREFIX = f"{TIMESTAMP}/42/nan"
+LOC_CSV = (
+    "timestamp_utc_local,timestamp_utc_gps,latitude_dd,longitude_dd,altitude_m,bearing_deg,accuracy_m,"
+    " speed_ms, speed_accuracy_ms\n"
+    "1653510000123,1653510000000,33.7756,-84.3963,300.5,90.0,4.0,12.5,0.5\n"
+)
+MEMBERS = {
+    f"{PREFIX}/acceleration/{TIMESTAMP}_acc.csv": b"local_timestamp_milliseconds\n1\n",
+    f"{PREFIX}/location/{TIMESTAMP}_loc.csv": LOC_CSV.encode(),
+    f"{PREFIX}/calibration/calibration.csv": b"a,b,x,y,z\n",
+}
+
+
+def _zip_archive(members: dict[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _tar_archive(members: dict[str, bytes], mode: str) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(f"./{name}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+class TestAllGatherArchive:
+    @pytest.mark.parametrize(
+        "make_archive",
+        [_zip_archive, lambda members: _tar_archive(members, "w:gz"), lambda members: _tar_archive(members, "w")],
+        ids=["zip", "tar.gz", "tar"],
+    )
+    def test_layout_and_member_streams(self, make_archive):
+        with AllGatherArchive(make_archive(MEMBERS)) as archive:
+            assert archive.timestamp_folder == TIMESTAMP
+            assert archive.driver_id_folder == "42"
+            assert set(archive.data_folders) == {"acceleration", "location", "calibration"}
+
+            location_csv = archive.data_folders["location"][0]
+            with archive.open_member(location_csv) as stream:
+                df = read_location_csv(stream)
+
+        assert df["latitude_dd"].iloc[0] == 33.7756
+
+    def test_tar_gz_is_decompressed_once(self):
+        members = {**MEMBERS, f"{PREFIX}/camera/video.mp4": bytes(range(256)) * 4096}
+        upload = _tar_archive(members, "w:gz")
+        compressed_size = len(upload.getvalue())
+        read_sizes = []
+        upload_read = upload.read
+        upload.read = lambda size=-1: read_sizes.append(len(data := upload_read(size))) or data
+
+        with AllGatherArchive(upload) as archive:
+            # In reverse order of the archive, every member is located before the previous one
+            for name, content in reversed(members.items()):
+                with archive.open_member(PurePosixPath(name)) as stream:
+                    assert stream.read() == content
+
+        # The header read to detect the archive type, then the compressed stream once
+        assert sum(read_sizes) <= compressed_size + 2048
+        assert upload.closed is False
+
+    def test_rejects_corrupted_tar_gz(self):
+        upload = io.BytesIO(_tar_archive(MEMBERS, "w:gz").getvalue()[:60])
+
+        with pytest.raises(tarfile.ReadError):
+            AllGatherArchive(upload)
+
+    def test_ignores_archiver_metadata(self):
+        members = {**MEMBERS, f"__MACOSX/{PREFIX}/location/._loc.csv": b"", f"{PREFIX}/location/.DS_Store": b""}
+
+        with AllGatherArchive(_zip_archive(members)) as archive:
+            assert archive.data_folders["location"] == [PurePosixPath(f"{PREFIX}/location/{TIMESTAMP}_loc.csv")]
+
+    def test_rejects_multiple_driver_folders(self):
+        members = {**MEMBERS, f"{TIMESTAMP}/43/nan/location/other.csv": b""}
+
+        with AllGatherArchive(_zip_archive(members)) as archive, pytest.raises(ValueError, match="single"):
+            archive.data_folders  # noqa: B018
+
+    def test_rejects_unsupported_file(self):
+        with pytest.raises(UnsupportedArchiveError):
+            AllGatherArchive(io.BytesIO(b"timestamp,latitude\n1,2\n"))
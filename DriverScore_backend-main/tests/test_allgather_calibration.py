@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial.transform import Rotation
+
+from driver_score.domains.allgather.constant import CALIBRATED_IMU_TRIADS
+from driver_score.domains.allgather.service import AllGatherService
+
+
+def _random_imu_df(n_samples: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = [column for triad in CALIBRATED_IMU_TRIADS for column in triad]
+    df = pd.DataFrame(rng.normal(size=(n_samples, len(columns))), columns=columns)
+    df["pitch_rad"] = rng.normal(size=n_samples)
+    return df
+
+
+class TestCalibrationTransform:
+    def test_matches_row_wise_rotation(self):
+        transform = Rotation.from_rotvec([0.1, -0.4, 0.25])
+        imu_df = _random_imu_df(500)
+
+        expected = imu_df.copy()
+        for triad in CALIBRATED_IMU_TRIADS:
+            expected[list(triad)] = [list(transform.apply(row)) for row in expected[list(triad)].to_numpy()]
+
+        calibrated = AllGatherService(run_id="test")._apply_calibration_transform(transform, imu_df.copy())
+
+        np.testing.assert_allclose(calibrated.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-12)
+
+    def test_leaves_other_columns_untouched(self):
+        transform = Rotation.from_rotvec([0.0, 0.0, np.pi / 2])
+        imu_df = _random_imu_df(10)
+
+        calibrated = AllGatherService(run_id="test")._apply_calibration_transform(transform, imu_df.copy())
+
+        pd.testing.assert_series_equal(calibrated["pitch_rad"], imu_df["pitch_rad"])
@@ -0,0 +1,89 @@
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial.transform import Rotation
+from sqlalchemy.dialects import postgresql
+
+from driver_score.domains.allgather.service import AllGatherService
+from driver_score.settings import settings
+
+ACC_HEADER = (
+    "local_timestamp_milliseconds,accel_x_mps2,accel_y_mps2,accel_z_mps2,angvelocity_x_radps,angvelocity_y_radps,"
+    "angvelocity_z_radps,rotation_x_sin_theta_by_2,rotation_y_sin_theta_by_2,rotation_z_sin_theta_by_2,yaw,pitch,roll"
+)
+
+
+class _RecordingCursor:
+    def __init__(self, copies: list[bytes]):
+        self.copies = copies
+
+    def copy_expert(self, statement, file, size):
+        data = b""
+        while chunk := file.read(size):
+            data += chunk
+        self.copies.append(data)
+
+    def close(self):
+        pass
+
+
+def _acc_csv(timestamps_ms) -> io.BytesIO:
+    rng = np.random.default_rng(0)
+    rows = [",".join([str(ts), *(f"{v:.4f}" for v in rng.normal(size=12))]) for ts in timestamps_ms]
+    return io.BytesIO("\n".join([ACC_HEADER, *rows]).encode())
+
+
+def _copy_phone_imu(acc_csv: io.BytesIO, chunk_rows: int, monkeypatch) -> tuple[int, pd.DataFrame, int]:
+    monkeypatch.setattr(settings, "IMU_CHUNK_ROWS", chunk_rows)
+    copies = []
+    connection = SimpleNamespace(
+        dialect=postgresql.dialect(), connection=SimpleNamespace(cursor=lambda: _RecordingCursor(copies))
+    )
+    transform = Rotation.from_rotvec([0.1, -0.4, 0.25])
+
+    n_samples = AllGatherService(run_id="run")._copy_phone_imu(connection, acc_csv, transform, file_id=None)
+
+    rows = pd.read_csv(io.BytesIO(b"".join(copies)), header=None)
+    return n_samples, rows, len(copies)
+
+
+class TestChunkedImuIngestion:
+    def test_chunks_write_the_same_samples(self, monkeypatch):
+        timestamps_ms = 1653510000000 + np.arange(25) * 10
+
+        n_samples, whole_rows, n_whole_copies = _copy_phone_imu(_acc_csv(timestamps_ms), 0, monkeypatch)
+        n_chunked_samples, chunked_rows, n_chunked_copies = _copy_phone_imu(_acc_csv(timestamps_ms), 10, monkeypatch)
+
+        assert n_samples == n_chunked_samples == 25
+        assert (n_whole_copies, n_chunked_copies) == (1, 3)
+        pd.testing.assert_frame_equal(whole_rows, chunked_rows)
+
+    def test_duplicate_timestamps_are_counted_across_chunks(self, monkeypatch):
+        # Every timestamp is repeated once and the repeats straddle the chunk boundaries
+        timestamps_ms = np.repeat(1653510000000 + np.arange(10) * 1000, 2)
+
+        with pytest.raises(ValueError, match="not present"):
+            _copy_phone_imu(_acc_csv(timestamps_ms), 3, monkeypatch)
+
+    def test_duplicate_timestamps_are_counted_across_distant_chunks(self, monkeypatch):
+        # The recording restarts from its first timestamp, whose repeats are chunks away from the originals
+        timestamps_ms = np.tile(1653510000000 + np.arange(10) * 1000, 2)
+
+        with pytest.raises(ValueError, match="not present"):
+            _copy_phone_imu(_acc_csv(timestamps_ms), 3, monkeypatch)
+
+    def test_chunks_count_the_same_duplicates(self, monkeypatch):
+        counts = []
+        monkeypatch.setattr(
+            AllGatherService, "_validate_timestamps", lambda self, n_samples, n_duplicates: counts.append(n_duplicates)
+        )
+        rng = np.random.default_rng(0)
+        timestamps_ms = 1653510000000 + rng.permutation(np.concatenate([np.arange(40), rng.integers(0, 40, 15)])) * 10
+
+        for chunk_rows in (0, 1, 4, 7):
+            _copy_phone_imu(_acc_csv(timestamps_ms), chunk_rows, monkeypatch)
+
+        assert counts == [15] * 4
@@ -0,0 +1,116 @@
+import io
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from driver_score.domains.allgather.parsers import (
+    ACCELERATION_CSV_DTYPES,
+    LOCATION_CSV_DTYPES,
+    epoch_ms_to_datetime,
+    iter_acceleration_csv,
+    read_acceleration_csv,
+    read_location_csv,
+)
+
+ACC_HEADER = (
+    "timestamp_nanosecond,sensor_timestamp_milliseconds,local_timestamp_milliseconds,"
+    "accel_x_mps2,accel_y_mps2,accel_z_mps2,angvelocity_x_radps,angvelocity_y_radps,angvelocity_z_radps,"
+    "rotation_x_sin_theta_by_2,rotation_y_sin_theta_by_2,rotation_z_sin_theta_by_2,rotation_cos_theta_by_2,"
+    "yaw,pitch,roll"
+)
+ACC_ROW = "1,2,1653510000123,0.1,0.2,9.8,0.01,0.02,0.03,0.1,0.2,0.3,0.9,1.0,0.5,0.25"
+
+LOC_HEADER = (
+    "timestamp_utc_local,timestamp_utc_gps,latitude_dd,longitude_dd,altitude_m,bearing_deg,accuracy_m,"
+    " speed_ms, speed_accuracy_ms"
+)
+LOC_ROW = "1653510000123,1653510000000,33.7756,-84.3963,300.5,90.0,4.0,12.5,0.5"
+
+
+class TestTypedCsvParsers:
+    @pytest.mark.parametrize("with_orientation", [False, True])
+    def test_read_acceleration_csv(self, with_orientation):
+        lines = ["orientation: portrait"] if with_orientation else []
+        lines += [ACC_HEADER, ACC_ROW, ACC_ROW]
+        df = read_acceleration_csv(io.BytesIO("\n".join(lines).encode()))
+
+        assert list(df.columns) == list(ACCELERATION_CSV_DTYPES)
+        assert {column: str(dtype) for column, dtype in df.dtypes.items()} == ACCELERATION_CSV_DTYPES
+        assert len(df) == 2
+
+    def test_iter_acceleration_csv_matches_whole_file(self):
+        rows = [ACC_ROW.replace("1653510000123", str(1653510000123 + i)) for i in range(7)]
+        source = "\n".join([ACC_HEADER, *rows]).encode()
+
+        chunks = list(iter_acceleration_csv(io.BytesIO(source), chunk_rows=3))
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), read_acceleration_csv(io.BytesIO(source)))
+
+    def test_read_location_csv_keeps_padded_column_names(self):
+        df = read_location_csv(io.BytesIO(f"{LOC_HEADER}\n{LOC_ROW}\n".encode()))
+
+        assert list(df.columns) == list(LOCATION_CSV_DTYPES)
+        assert df[" speed_ms"].iloc[0] == 12.5
+
+    def test_missing_column_is_reported(self):
+        with pytest.raises(ValueError, match="latitude_dd"):
+            read_location_csv(io.BytesIO(f"{LOC_HEADER.replace('latitude_dd', 'lat')}\n{LOC_ROW}".encode()))
+
+    def test_header_with_byte_order_mark_and_quotes(self):
+        header = LOC_HEADER.replace("timestamp_utc_gps", '"timestamp_utc,gps"').replace("latitude_dd", '"latitude_dd"')
+        df = read_location_csv(io.BytesIO(f"\ufeff{header}\n{LOC_ROW}\n".encode()))
+
+        assert list(df.columns) == list(LOCATION_CSV_DTYPES)
+        assert df["timestamp_utc_local"].iloc[0] == 1653510000123
+        assert df["latitude_dd"].iloc[0] == 33.7756
+
+    @pytest.mark.parametrize("timestamp", ["", "nan", "abc"])
+    def test_invalid_timestamps_are_reported_with_the_file(self, timestamp):
+        source = io.BytesIO(f"{LOC_HEADER}\n{LOC_ROW}\n{LOC_ROW.replace('1653510000123', timestamp, 1)}\n".encode())
+        source.name = "2022_05_25_20_19_06_302_loc.csv"
+
+        with pytest.raises(ValueError, match=r"2022_05_25_20_19_06_302_loc.csv: column timestamp_utc_local .* \[2\]"):
+            read_location_csv(source)
+
+    def test_invalid_timestamps_of_a_chunk_are_reported(self):
+        rows = [ACC_ROW] * 4 + [ACC_ROW.replace("1653510000123", "")]
+        source = io.BytesIO("\n".join([ACC_HEADER, *rows]).encode())
+        source.name = "acc.csv"
+
+        with pytest.raises(ValueError, match=r"acc.csv: .* \[5\]"):
+            list(iter_acceleration_csv(source, chunk_rows=2))
+
+    def test_pyarrow_engine(self):
+        pytest.importorskip("pyarrow")
+        source = "\n".join([ACC_HEADER, ACC_ROW, ACC_ROW]).encode()
+
+        pyarrow_df = read_acceleration_csv(io.BytesIO(source), engine="pyarrow")
+        c_df = read_acceleration_csv(io.BytesIO(source), engine="c")
+
+        pd.testing.assert_frame_equal(pyarrow_df, c_df)
+
+    def test_epoch_ms_to_datetime_matches_fromtimestamp(self):
+        epoch_ms = pd.Series([0, 1653510000123, 1667000000999, 1700000000001])
+
+        expected = [datetime.fromtimestamp(x / 1000.0) for x in epoch_ms]
+
+        assert list(epoch_ms_to_datetime(epoch_ms)) == expected
+
+    def test_epoch_ms_to_datetime_across_dst_change(self, monkeypatch):
+        monkeypatch.setenv("TZ", "America/New_York")
+        time.tzset()
+        try:
+            # 2022-11-06 01:00 EDT -> 01:00 EST happens at 06:00 UTC
+            dst_change_ms = 1667714400000
+            epoch_ms = pd.Series(dst_change_ms + np.arange(-7_200_000, 7_200_000, 450_001))
+
+            expected = [datetime.fromtimestamp(x / 1000.0) for x in epoch_ms]
+
+            assert list(epoch_ms_to_datetime(epoch_ms)) == expected
+        finally:
+            monkeypatch.undo()
+            time.tzset()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from benchmarks.archive_generator import GRAVITY_MS2, generate_archive
+from driver_score.domains.allgather.archive import AllGatherArchive
+from driver_score.domains.allgather.parsers import read_acceleration_csv, read_location_csv
+from driver_score.domains.allgather.service import AllGatherService
+
+
+class TestArchiveGenerator:
+    @pytest.mark.parametrize("archive_format", ["zip", "tar.gz"])
+    def test_generated_archive_is_ingestible(self, tmp_path, archive_format):
+        archive_path = generate_archive(
+            tmp_path, duration_s=20, imu_rate_hz=50, gps_rate_hz=2, archive_format=archive_format
+        )
+        service = AllGatherService(run_id="run")
+
+        with archive_path.open("rb") as fileobj, AllGatherArchive(fileobj) as archive:
+            data_folders = service._check_uploaded_folder_structure(archive, 42, archive_path.name)
+            with archive.open_member(data_folders["acceleration"][0]) as stream:
+                imu_df = service._reformat_phone_imu(read_acceleration_csv(stream), file_id=None)
+            with archive.open_member(data_folders["location"][0]) as stream:
+                gdf = service._reformat_phone_gps(read_location_csv(stream))
+            with archive.open_member(data_folders["calibration"][0]) as stream:
+                transform, _ = AllGatherService._reformat_phone_calib_data(stream)
+
+        assert archive.driver_id_folder == "42"
+        assert (len(imu_df), len(gdf)) == (1000, 40)
+
+        # Calibration removes the tilt of the phone: gravity ends up on the z axis
+        calibrated = service._apply_calibration_transform(transform, imu_df)
+        mean_acceleration = calibrated[["acceleration_x_ms2", "acceleration_y_ms2", "acceleration_z_ms2"]].mean()
+        assert mean_acceleration.iloc[2] == pytest.approx(GRAVITY_MS2, abs=0.05)
+        assert np.hypot(mean_acceleration.iloc[0], mean_acceleration.iloc[1]) < 0.3
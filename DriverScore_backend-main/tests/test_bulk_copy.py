@@ -0,0 +1,169 @@
+import asyncio
+import io
+from datetime import datetime
+from types import SimpleNamespace
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+from sqlalchemy.dialects import postgresql
+
+from driver_score.core.bulk import copy_dataframe, replace_dataframe
+from driver_score.core.models import GpsSample, ImuSample, Score
+from driver_score.domains.run.service import RunService
+
+
+class _RecordingCursor:
+    def __init__(self):
+        self.statement = None
+        self.data = b""
+
+    def copy_expert(self, statement, file, size):
+        self.statement = statement
+        while chunk := file.read(size):
+            self.data += chunk
+
+    def close(self):
+        pass
+
+
+def _fake_connection(cursor: _RecordingCursor, statements: list[str] | None = None):
+    return SimpleNamespace(
+        dialect=postgresql.dialect(),
+        connection=SimpleNamespace(cursor=lambda: cursor),
+        execute=lambda statement: statements.append(
+            str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        ),
+    )
+
+
+class _FakeTableConnection:
+    """Connection to a single table kept in memory, which runs the DELETE and COPY statements of `replace_dataframe`."""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, columns: list[str]):
+        self.rows = pd.DataFrame(columns=columns)
+        self.connection = SimpleNamespace(cursor=lambda: self)
+
+    def execute(self, statement):
+        # DELETE ... WHERE <column> = <value> AND ...
+        deleted = pd.Series(True, index=self.rows.index)
+        for name, value in statement.compile().params.items():
+            deleted &= self.rows[name.rsplit("_", 1)[0]] == value
+        self.rows = self.rows[~deleted]
+
+    def copy_expert(self, statement, file, size):
+        columns = statement.split("(")[1].split(")")[0].split(", ")
+        data = b""
+        while chunk := file.read(size):
+            data += chunk
+        copied = pd.read_csv(io.BytesIO(data), header=None, names=columns, parse_dates=["timestamp"])
+        self.rows = pd.concat([self.rows, copied], ignore_index=True) if len(self.rows) else copied
+
+    def close(self):
+        pass
+
+
+class TestCopyDataframe:
+    def test_streams_all_rows_in_chunks(self):
+        df = pd.DataFrame(
+            {
+                "run_id": "run",
+                "timestamp": pd.date_range("2022-05-25 20:19:06", periods=7, freq="10ms"),
+                "acceleration_x_ms2": [0.5, None, 1.0, 1.5, 2.0, 2.5, 3.0],
+            }
+        )
+        cursor = _RecordingCursor()
+
+        n_rows = copy_dataframe(_fake_connection(cursor), ImuSample.__table__, df, chunk_rows=3)
+
+        assert n_rows == 7
+        assert cursor.statement == (
+            "COPY imu_sample (run_id, timestamp, acceleration_x_ms2) FROM STDIN WITH (FORMAT csv)"
+        )
+        copied = pd.read_csv(io.BytesIO(cursor.data), header=None, names=list(df.columns), parse_dates=["timestamp"])
+        pd.testing.assert_frame_equal(copied, df)
+
+    def test_geometry_is_sent_as_ewkb(self):
+        gdf = gpd.GeoDataFrame(
+            {"run_id": ["run"], "timestamp": [datetime(2022, 5, 25)], "latitude": [33.7], "longitude": [-84.4]},
+            geometry=gpd.points_from_xy([-84.4], [33.7]),
+            crs=4326,
+        )
+        cursor = _RecordingCursor()
+
+        copy_dataframe(_fake_connection(cursor), GpsSample.__table__, gdf)
+
+        ewkb = cursor.data.decode().strip().split(",")[-1]
+        point = shapely.from_wkb(ewkb)
+        assert shapely.get_srid(point) == 4326
+        assert (point.x, point.y) == (-84.4, 33.7)
+        assert isinstance(gdf.geometry.iloc[0], shapely.Point)
+
+    def test_rejects_unknown_columns(self):
+        with pytest.raises(ValueError, match="inclination"):
+            copy_dataframe(
+                _fake_connection(_RecordingCursor()), ImuSample.__table__, pd.DataFrame({"inclination": [1]})
+            )
+
+
+class TestReplaceDataframe:
+    def test_deletes_the_rows_of_the_scope_then_copies(self):
+        df = pd.DataFrame(
+            {
+                "run_id": "run",
+                "timestamp": pd.date_range("2022-05-25 20:19:06", periods=3, freq="1s"),
+                "score": [80.0, None, 60.0],
+            }
+        )
+        cursor, statements = _RecordingCursor(), []
+
+        n_rows = replace_dataframe(_fake_connection(cursor, statements), Score.__table__, df, run_id="run")
+
+        assert n_rows == 3
+        assert statements == ["DELETE FROM score WHERE score.run_id = 'run'"]
+        assert cursor.statement == "COPY score (run_id, timestamp, score) FROM STDIN WITH (FORMAT csv)"
+        copied = pd.read_csv(io.BytesIO(cursor.data), header=None, names=list(df.columns), parse_dates=["timestamp"])
+        pd.testing.assert_frame_equal(copied, df)
+
+    def test_reprocessed_run_keeps_only_the_RCs_of_the_last_pass(self, monkeypatch):
+        connection = _FakeTableConnection(["run_id", "timestamp", "gps_lrs", "driving_direction"])
+        session = SimpleNamespace(connection=lambda: connection, flush=lambda: None)
+        timestamps = pd.date_range("2022-05-25 20:19:06", periods=6, freq="1s")
+
+        async def persist(run_id, stretch):
+            async def run_based_RCs(self):
+                return pd.DataFrame(
+                    {
+                        "run_id": run_id,
+                        "timestamp": timestamps[stretch],
+                        "gps_lrs": 10.0,
+                        "driving_direction": "increasing_0",
+                    }
+                )
+
+            monkeypatch.setattr(RunService, "_get_run_based_RC_frame", run_based_RCs)
+            await RunService(run_id=run_id, session=session).persist_run_based_RCs_to_db()
+
+        asyncio.run(persist("other", slice(0, 6)))
+        asyncio.run(persist("run", slice(0, 6)))
+        # Processed again, the longest stretch of the run is shorter
+        asyncio.run(persist("run", slice(2, 5)))
+
+        rows = connection.rows
+        assert rows.loc[rows["run_id"] == "run", "timestamp"].tolist() == timestamps[2:5].tolist()
+        assert (rows["run_id"] == "other").sum() == 6
+
+    def test_rejects_rows_outside_the_scope(self):
+        df = pd.DataFrame({"run_id": ["run", "other"], "timestamp": [datetime(2022, 5, 25)] * 2})
+
+        with pytest.raises(ValueError, match="run_id"):
+            replace_dataframe(_fake_connection(_RecordingCursor(), []), Score.__table__, df, run_id="run")
+
+    def test_rejects_a_missing_scope(self):
+        with pytest.raises(ValueError, match="scope"):
+            replace_dataframe(
+                _fake_connection(_RecordingCursor(), []), Score.__table__, pd.DataFrame({"run_id": ["run"]})
+            )
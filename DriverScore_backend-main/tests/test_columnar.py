@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, create_autospec
+
+import numpy as np
+from sqlalchemy import Float, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from driver_score.core.columnar import columns_to_models, read_columns, read_run_columns
+from driver_score.core.models import GpsSample, RoadCharacteristic
+from driver_score.domains.allgather.schemas import GpsSampleSchema
+
+
+def _fake_session(rows: list[tuple]) -> Session:
+    session = create_autospec(Session, instance=True)
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute.return_value = result
+    return session
+
+
+class TestColumnar:
+    def test_read_run_columns_selects_sorted_samples_of_the_run(self):
+        start = datetime(2022, 5, 25, 20, 19, 6, 302000)
+        rows = [(start + timedelta(seconds=i), 20.0 + i, None if i == 1 else 0.5) for i in range(3)]
+        session = _fake_session(rows)
+
+        columns = read_run_columns(session, GpsSample, "run", ["timestamp", "velocity", "vel_accuracy"])
+
+        statement = session.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "WHERE gps_sample.run_id = %(run_id_1)s ORDER BY gps_sample.timestamp" in sql
+        assert list(columns) == ["timestamp", "velocity", "vel_accuracy"]
+        assert columns["timestamp"].dtype == np.dtype("datetime64[us]")
+        assert columns["timestamp"].tolist() == [row[0] for row in rows]
+        np.testing.assert_array_equal(columns["velocity"], [20.0, 21.0, 22.0])
+        np.testing.assert_array_equal(columns["vel_accuracy"], [0.5, np.nan, 0.5])
+
+    def test_read_columns_names_columns_after_labels(self):
+        statement = select(
+            func.ST_X(GpsSample.geometry, type_=Float).label("longitude"),
+            RoadCharacteristic.driving_direction,
+            RoadCharacteristic.intersection,
+        )
+
+        columns = read_columns(_fake_session([(-84.39, "increasing", True), (None, None, None)]), statement)
+
+        np.testing.assert_array_equal(columns["longitude"], [-84.39, np.nan])
+        assert columns["driving_direction"].tolist() == ["increasing", None]
+        assert columns["intersection"].tolist() == [True, None]
+
+    def test_read_columns_of_no_rows(self):
+        columns = read_run_columns(_fake_session([]), GpsSample, "run", ["timestamp", "velocity"])
+
+        assert len(columns["timestamp"]) == len(columns["velocity"]) == 0
+        assert columns["velocity"].dtype == np.float64
+
+    def test_columns_to_models(self):
+        start = datetime(2022, 5, 25, 20, 19, 6)
+        fields = [name for name in GpsSampleSchema.model_fields if name != "timestamp"]
+        columns = {
+            "timestamp": np.array([start, start + timedelta(seconds=1)], dtype="datetime64[us]"),
+            **{name: np.array([1.0, 2.0]) for name in fields},
+        }
+
+        gps_samples = columns_to_models(GpsSampleSchema, columns)
+
+        assert [gps_sample.timestamp for gps_sample in gps_samples] == [start, start + timedelta(seconds=1)]
+        assert gps_samples[1] == GpsSampleSchema(timestamp=start + timedelta(seconds=1), **dict.fromkeys(fields, 2.0))
@@ -0,0 +1,27 @@
+from unittest.mock import create_autospec
+
+import pytest
+from sqlalchemy.orm import Session
+
+from driver_score.core.database import get_db_session
+
+
+class TestGetDbSession:
+    def test_outer_session_is_flushed_but_not_committed(self):
+        outer_session = create_autospec(Session, instance=True)
+
+        with get_db_session(outer_session) as session:
+            assert session is outer_session
+
+        outer_session.flush.assert_called_once()
+        outer_session.commit.assert_not_called()
+        outer_session.close.assert_not_called()
+
+    def test_outer_session_is_left_to_its_owner_on_error(self):
+        outer_session = create_autospec(Session, instance=True)
+
+        with pytest.raises(ValueError), get_db_session(outer_session):
+            raise ValueError("Invalid CSV")
+
+        outer_session.flush.assert_not_called()
+        outer_session.rollback.assert_not_called()
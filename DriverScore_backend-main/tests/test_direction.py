@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, create_autospec, patch
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from pyproj import Geod
+from shapely import LineString
+from sqlalchemy.orm import Session
+
+from driver_score.core.request_cache import request_scope
+from driver_score.domains.run import backfill, service
+from driver_score.domains.run.direction import segment_directions, stretch_labels
+from driver_score.domains.run.service import RunService
+
+CENTERLINE = LineString([(-84.40, 33.77), (-84.35, 33.80), (-84.30, 33.85)])
+
+
+def _reference_directions(gps_gdf: gpd.GeoDataFrame, centerline: LineString) -> list[str]:
+    # Point by point segmentation, as originally implemented in RunService._compute_direction
+    lrs = [centerline.project(point, normalized=True) for point in gps_gdf.geometry]
+    geod = Geod(ellps="WGS84")
+    directions = ["stationary 1"]
+    current_direction = "stationary"
+    count_by_direction = {"increasing": 1, "decreasing": 1, "stationary": 1}
+    for i in range(1, len(lrs)):
+        start_point, end_point = gps_gdf.geometry.iloc[i - 1], gps_gdf.geometry.iloc[i]
+        time_delta = (gps_gdf.index[i] - gps_gdf.index[i - 1]).total_seconds()
+        _, _, distance = geod.inv(start_point.x, start_point.y, end_point.x, end_point.y)
+        if distance <= 0.5 * time_delta:
+            next_direction = "stationary"
+        elif lrs[i] > lrs[i - 1]:
+            next_direction = "increasing"
+        else:
+            next_direction = "decreasing"
+        if next_direction != current_direction:
+            count_by_direction[current_direction] += 1
+        current_direction = next_direction
+        directions.append(f"{current_direction} {count_by_direction[current_direction]}")
+    return directions
+
+
+def _fake_session(*results: list[tuple]) -> Session:
+    session = create_autospec(Session, instance=True)
+    session.execute.side_effect = [MagicMock(all=MagicMock(return_value=rows)) for rows in results]
+    return session
+
+
+def _trajectory(seed: int) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(seed)
+    # Drive up the route, stop, drive back, stop and drive up again, with GPS noise and irregular sampling
+    fractions = np.concatenate(
+        [
+            np.linspace(0.0, 0.5, 200),
+            np.full(40, 0.5),
+            np.linspace(0.5, 0.2, 150),
+            np.full(20, 0.2),
+            np.linspace(0.2, 0.6, 100),
+        ]
+    )
+    points = CENTERLINE.interpolate(fractions, normalized=True)
+    longitude = np.array([point.x for point in points]) + rng.normal(scale=3e-6, size=len(points))
+    latitude = np.array([point.y for point in points]) + rng.normal(scale=3e-6, size=len(points))
+    seconds = np.cumsum(rng.choice([1.0, 1.0, 1.0, 2.0, 0.5], size=len(points)))
+    index = pd.DatetimeIndex([datetime(2022, 5, 25, 20) + timedelta(seconds=s) for s in seconds], name="timestamp")
+    return gpd.GeoDataFrame(index=index, geometry=gpd.points_from_xy(longitude, latitude), crs="EPSG:4326")
+
+
+class TestDirection:
+    def test_matches_point_by_point_segmentation(self):
+        for seed in range(3):
+            gps_gdf = _trajectory(seed)
+
+            segments = RunService(run_id="run")._compute_direction(gps_gdf, centerline=CENTERLINE)
+
+            assert segments.index.equals(gps_gdf.index)
+            assert segments["direction"].tolist() == _reference_directions(gps_gdf, CENTERLINE)
+            np.testing.assert_array_equal(
+                segments["lrs"], [CENTERLINE.project(point, normalized=True) for point in gps_gdf.geometry]
+            )
+
+    def test_stretches_are_numbered_per_direction(self):
+        codes = np.array([0, 0, 1, 1, 0, 2, 1, 1, 2, 0])
+
+        assert stretch_labels(codes).tolist() == [
+            "stationary 1",
+            "stationary 1",
+            "increasing 1",
+            "increasing 1",
+            "stationary 2",
+            "decreasing 1",
+            "increasing 2",
+            "increasing 2",
+            "decreasing 2",
+            "stationary 3",
+        ]
+
+    def test_short_trajectories(self):
+        points = gpd.points_from_xy([-84.40], [33.77]).to_numpy()
+
+        lrs, labels = segment_directions(CENTERLINE, points)
+
+        np.testing.assert_array_equal(lrs, [0.0])
+        assert labels.tolist() == ["stationary 1"]
+        assert segment_directions(CENTERLINE, points[:0])[1].tolist() == []
+
+    def test_longest_stretches_from_stored_labels(self):
+        sizes = [
+            ("decreasing 10", 9),
+            ("decreasing 2", 9),
+            ("increasing 1", 5),
+            ("increasing 2", 12),
+            ("stationary 1", 50),
+        ]
+        run_service = RunService(run_id="run", session=_fake_session(sizes))
+
+        stretches = asyncio.run(run_service._get_longest_stretches())
+
+        # Ties are broken in label order
+        assert stretches == {"increasing": "increasing 2", "decreasing": "decreasing 10"}
+
+    def test_labels_of_older_runs_are_computed_in_memory(self):
+        timestamps = np.array(["2022-05-25T20:00:00", "2022-05-25T20:00:01", "2022-05-25T20:00:02"], dtype="M8[us]")
+        gps = {"timestamp": timestamps, "longitude": np.array([-84.4, -84.39, -84.38]), "latitude": np.zeros(3)}
+        labels = pd.DataFrame(
+            {"lrs": [0.1, 0.2, 0.1], "direction": ["increasing 1", "increasing 1", "decreasing 1"]},
+            index=pd.DatetimeIndex(timestamps, name="timestamp"),
+        )
+        session = _fake_session([(None, 3)])
+        run_service = RunService(run_id="run", session=session)
+
+        with (
+            patch.object(service, "read_run_columns", MagicMock(return_value=gps)),
+            patch.object(RunService, "segment_gps_samples", AsyncMock(return_value=labels)),
+            patch.object(RunService, "persist_directions_to_db", AsyncMock()) as persist_directions_to_db,
+            request_scope(),
+        ):
+            stretches = asyncio.run(run_service._get_longest_stretches())
+            increasing = asyncio.run(run_service.get_gps_columns(direction="increasing 1"))
+
+        persist_directions_to_db.assert_not_awaited()
+        session.commit.assert_not_called()
+        assert stretches == {"increasing": "increasing 1", "decreasing": "decreasing 1"}
+        np.testing.assert_array_equal(increasing["timestamp"], timestamps[:2])
+        np.testing.assert_array_equal(increasing["longitude"], [-84.4, -84.39])
+
+    def test_backfill_of_older_runs(self):
+        backfilled = []
+
+        async def persist_directions_to_db(self):
+            if self.run_id == "broken":
+                raise ValueError("No route")
+            backfilled.append(self.run_id)
+
+        with (
+            patch.object(backfill, "get_db_session", MagicMock()),
+            patch.object(RunService, "persist_directions_to_db", persist_directions_to_db),
+        ):
+            count = asyncio.run(backfill.backfill_directions(["run1", "broken", "run2"]))
+
+        assert count == 2
+        assert backfilled == ["run1", "run2"]
@@ -1,6 +1,81 @@
+import numpy as np
+import pytest
+
+from driver_score.domains.model.service import DriverScoreModelService
+
+
+def _make_run(n_samples: int) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    rng = np.random.default_rng(0)
+    gps = {
+        "timestamp": np.arange(n_samples).astype("datetime64[s]").astype("datetime64[us]"),
+        "velocity": rng.uniform(0, 35, n_samples),
+    }
+    # Gravity on z, and horizontal accelerations from gentle to beyond the friction limits, so that every branch of
+    # the score is taken
+    imu = {
+        "acceleration_x_ms2": rng.normal(scale=4, size=n_samples),
+        "acceleration_y_ms2": rng.normal(scale=4, size=n_samples),
+        "acceleration_z_ms2": rng.normal(loc=9.81, scale=0.2, size=n_samples),
+    }
+    gps["velocity"][3:n_samples:37] = np.nan
+    imu["acceleration_z_ms2"][5:n_samples:41] = 0
+    return gps, imu
+
+
+def _reference_scores(gps: dict[str, np.ndarray], imu: dict[str, np.ndarray], window_length: int = 10) -> list:
+    # Sample by sample scoring, as originally implemented in DriverScoreModelService.calculate_scores
+    timestamps = gps["timestamp"].tolist()
+    velocities = gps["velocity"]
+    accelerations = np.column_stack([imu["acceleration_x_ms2"], imu["acceleration_y_ms2"], imu["acceleration_z_ms2"]])
+    scores = [None] * len(timestamps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(window_length, len(timestamps)):
+            score = DriverScoreModelService._calculate_score(vel=velocities[i - 10 : i], acc=accelerations[i - 10 : i])
+            scores[i] = (timestamps[i], score)
+    for i in range(window_length):
+        scores[i] = (timestamps[i], scores[window_length][1])
+    return scores
+
+
 class TestDriverScoreAlgo:
     def test_get_imu_samples(self):
         pass
 
     def test_get_gps_samples(self):
         pass
+
+    def test_scores_match_sample_by_sample_scoring(self):
+        gps, imu = _make_run(5000)
+
+        scores = DriverScoreModelService().calculate_scores(gps, imu)
+
+        reference = _reference_scores(gps, imu)
+        assert [score.timestamp for score in scores] == [timestamp for timestamp, _ in reference]
+        np.testing.assert_array_equal([score.score for score in scores], [score for _, score in reference])
+
+    def test_every_branch_is_scored(self):
+        gps, imu = _make_run(5000)
+        imu["acceleration_x_ms2"][100:200] *= 3
+
+        scores = DriverScoreModelService().calculate_score_columns(gps, imu)["score"]
+
+        finite_scores = scores[np.isfinite(scores)]
+        for low, high in [(50, 100), (25, 50), (0, 25)]:
+            assert np.any((finite_scores > low) & (finite_scores <= high))
+        assert np.any(finite_scores < 0) or np.any(finite_scores > 100)
+        # NaN velocity, and no vertical acceleration
+        assert np.isnan(scores[13])
+        assert not np.isfinite(scores[15])
+
+    def test_first_window_is_backfilled(self):
+        gps, imu = _make_run(30)
+
+        scores = DriverScoreModelService().calculate_score_columns(gps, imu)["score"]
+
+        assert (scores[:10] == scores[10]).all()
+
+    def test_runs_shorter_than_a_window(self):
+        gps, imu = _make_run(10)
+
+        with pytest.raises(ValueError):
+            DriverScoreModelService().calculate_scores(gps, imu)
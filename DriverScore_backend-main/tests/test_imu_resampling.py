@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, create_autospec
+
+import numpy as np
+import pytest
+from scipy.interpolate import interp1d
+from sqlalchemy.orm import Session
+
+from driver_score.domains.allgather.schemas import ImuSampleSchema
+from driver_score.domains.run.resampling import interpolate_channels, low_pass
+from driver_score.domains.run.service import RunService
+
+
+def _fake_session(imu_rows: list[tuple], gps_timestamps: list[datetime]) -> Session:
+    session = create_autospec(Session, instance=True)
+    imu_result, gps_result = MagicMock(), MagicMock()
+    imu_result.all.return_value = imu_rows
+    gps_result.all.return_value = [(timestamp,) for timestamp in gps_timestamps]
+    session.execute.side_effect = [imu_result, gps_result]
+    return session
+
+
+class TestImuResampling:
+    def test_interpolate_channels_matches_interp1d(self):
+        rng = np.random.default_rng(0)
+        old_time = np.cumsum(rng.integers(5, 15, size=200))
+        values = rng.normal(size=(200, 3))
+        # Exact sample times, times in between and times outside of the signal on both sides
+        new_time = np.concatenate([[old_time[0] - 50], old_time[::7], old_time[:-1] + 3, [old_time[-1] + 50]])
+
+        expected = np.column_stack(
+            [
+                interp1d(old_time, values[:, i], bounds_error=False, fill_value=(values[0, i], values[-1, i]))(new_time)
+                for i in range(values.shape[1])
+            ]
+        )
+
+        np.testing.assert_allclose(interpolate_channels(old_time, values, new_time), expected, rtol=1e-12, atol=1e-12)
+
+    def test_low_pass_removes_high_frequencies(self):
+        t_s = np.arange(0, 60, 0.01)
+        slow = np.sin(2 * np.pi * 0.1 * t_s)
+        fast = np.sin(2 * np.pi * 10 * t_s)
+
+        filtered = low_pass(np.column_stack([slow + fast, slow]), sample_rate_hz=100, cutoff_hz=0.5)
+
+        # Away from the edges, where the filter has transients
+        middle = slice(1000, -1000)
+        np.testing.assert_allclose(filtered[middle, 0], slow[middle], atol=0.01)
+        np.testing.assert_allclose(filtered[middle, 1], slow[middle], atol=0.01)
+
+    def test_low_pass_rejects_cutoff_above_nyquist(self):
+        with pytest.raises(ValueError, match="Cutoff"):
+            low_pass(np.zeros((100, 1)), sample_rate_hz=1, cutoff_hz=0.5)
+
+    def test_get_imu_samples_resamples_onto_gps_timestamps(self):
+        start = datetime(2022, 5, 25, 20, 19, 6)
+        channels = [name for name in ImuSampleSchema.model_fields if name != "timestamp"]
+        imu_rows = [
+            (start + timedelta(milliseconds=10 * i), *(float(i + c) for c in range(len(channels)))) for i in range(500)
+        ]
+        gps_timestamps = [start + timedelta(milliseconds=1005 * i) for i in range(6)]
+
+        run_service = RunService(run_id="run", session=_fake_session(imu_rows, gps_timestamps))
+        imu_samples = asyncio.run(run_service.get_imu_samples())
+
+        assert [sample.timestamp for sample in imu_samples] == gps_timestamps
+        # Samples are linear in time: 1 per 10 ms, the last GPS timestamp is after the last IMU sample
+        assert [sample.acceleration_x_ms2 for sample in imu_samples] == [0.0, 100.5, 201.0, 301.5, 402.0, 499.0]
+        assert imu_samples[1].roll_rad == 100.5 + channels.index("roll_rad")
@@ -0,0 +1,71 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from driver_score.core.partitions import add_months, extend_monthly_partitions
+
+
+def _connection(existing: list[str], default_months: list[date]) -> MagicMock:
+    """Connection of a table with the given partitions, and rows of the given months in its DEFAULT partition."""
+    statements = []
+
+    def execute(statement, parameters=None):
+        sql = str(statement)
+        statements.append(sql)
+        result = MagicMock()
+        if "pg_inherits" in sql:
+            result.scalars.return_value = iter(existing)
+        elif "date_trunc" in sql:
+            result.scalars.return_value.all.return_value = default_months
+        return result
+
+    connection = MagicMock(execute=MagicMock(side_effect=execute))
+    connection.statements = statements
+    return connection
+
+
+class TestMonthlyPartitions:
+    @pytest.mark.parametrize(
+        "month, months, expected",
+        [
+            (date(2026, 10, 18), 0, date(2026, 10, 1)),
+            (date(2026, 11, 1), 2, date(2027, 1, 1)),
+            (date(2026, 1, 5), -1, date(2025, 12, 1)),
+        ],
+    )
+    def test_add_months(self, month, months, expected):
+        assert add_months(month, months) == expected
+
+    def test_missing_partitions_are_created_ahead(self):
+        connection = _connection(["imu_sample_y2026m10", "imu_sample_default"], default_months=[])
+
+        created = extend_monthly_partitions(connection, "imu_sample", months_ahead=2, today=date(2026, 10, 18))
+
+        assert created == ["imu_sample_y2026m11", "imu_sample_y2026m12"]
+        assert not any("DETACH" in sql or "ATTACH" in sql for sql in connection.statements)
+        assert (
+            "CREATE TABLE imu_sample_y2026m12 PARTITION OF imu_sample FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+            in connection.statements
+        )
+
+    def test_rows_of_the_default_partition_are_moved_to_new_partitions(self):
+        connection = _connection(["gps_sample_default"], default_months=[date(2026, 3, 1)])
+
+        created = extend_monthly_partitions(connection, "gps_sample", months_ahead=0, today=date(2026, 10, 18))
+
+        assert created == ["gps_sample_y2026m03", "gps_sample_y2026m10"]
+        ddl = [
+            sql.split(" WHERE")[0]
+            for sql in connection.statements
+            if "pg_inherits" not in sql and "date_trunc" not in sql
+        ]
+        assert ddl == [
+            "ALTER TABLE gps_sample DETACH PARTITION gps_sample_default",
+            "CREATE TABLE gps_sample_y2026m03 PARTITION OF gps_sample FOR VALUES FROM ('2026-03-01') TO ('2026-04-01')",
+            "CREATE TABLE gps_sample_y2026m10 PARTITION OF gps_sample FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')",
+            "INSERT INTO gps_sample SELECT * FROM gps_sample_default",
+            "DELETE FROM gps_sample_default",
+            "ALTER TABLE gps_sample ATTACH PARTITION gps_sample_default DEFAULT",
+        ]
+        assert "\"timestamp\" >= '2026-03-01' AND \"timestamp\" < '2026-04-01'" in connection.statements[-2]
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import create_autospec
+
+import geopandas as gpd
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from driver_score.app import cache_request_lookups
+from driver_score.core.database import db_engine
+from driver_score.core.request_cache import current_scope, invalidate_request_cache, request_cached, request_scope
+from driver_score.domains.run import service as run_service
+from driver_score.domains.run.service import RunService
+
+
+class _Lookups:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.n_loads = 0
+
+    @request_cached(key=lambda self, direction=None: (self.run_id, direction))
+    async def load(self, direction: str | None = None) -> tuple[str, str | None]:
+        self.n_loads += 1
+        return self.run_id, direction
+
+
+def _run_query() -> None:
+    # What SQLAlchemy does before sending a statement
+    db_engine.dispatch.before_cursor_execute(None, None, "SELECT 1", {}, None, False)
+
+
+class TestRequestCache:
+    def test_lookups_are_loaded_once_per_scope_and_key(self):
+        lookups = _Lookups(run_id="run")
+
+        async def lookup_all():
+            return [await lookups.load(), await lookups.load(), await lookups.load(direction="increasing 1")]
+
+        with request_scope():
+            assert asyncio.run(lookup_all()) == [("run", None), ("run", None), ("run", "increasing 1")]
+            assert lookups.n_loads == 2
+            # Another instance looking up the same data shares the cache
+            assert asyncio.run(_Lookups(run_id="run").load()) == ("run", None)
+            assert lookups.n_loads == 2
+
+        with request_scope():
+            asyncio.run(lookups.load())
+        assert lookups.n_loads == 3
+
+    def test_lookups_outside_of_a_scope_are_not_cached(self):
+        lookups = _Lookups(run_id="run")
+
+        asyncio.run(lookups.load())
+        asyncio.run(lookups.load())
+
+        assert lookups.n_loads == 2
+        assert current_scope() is None
+
+    def test_invalidated_lookups_are_loaded_again(self):
+        lookups = _Lookups(run_id="run")
+
+        with request_scope():
+            asyncio.run(lookups.load())
+            asyncio.run(lookups.load(direction="increasing 1"))
+            invalidate_request_cache(_Lookups.load)
+            asyncio.run(lookups.load())
+            asyncio.run(lookups.load(direction="increasing 1"))
+
+        assert lookups.n_loads == 4
+        # Outside of a scope, there is nothing to invalidate
+        invalidate_request_cache(_Lookups.load)
+
+    def test_run_read_after_it_is_written(self, monkeypatch):
+        run = SimpleNamespace(run_id="run", driver_id=42, start_time=datetime(2022, 5, 25), dissolved_id=None)
+        session = create_autospec(Session, instance=True)
+        session.query.return_value.filter.return_value.first.return_value = run
+        session.execute.side_effect = lambda statement: setattr(
+            run, "dissolved_id", statement.compile().params["dissolved_id"]
+        )
+        monkeypatch.setattr(
+            run_service,
+            "route_cache",
+            SimpleNamespace(get_route_index=lambda: SimpleNamespace(match=lambda points, tolerance: "SR11")),
+        )
+        gps_gdf = gpd.GeoDataFrame(geometry=gpd.points_from_xy([-84.4], [33.77]), crs="EPSG:4326")
+
+        async def match_route():
+            before = await RunService(run_id="run", session=session).get_run()
+            await RunService(run_id="run", session=session).match_route(gps_gdf)
+            return before, await RunService(run_id="run", session=session).get_run()
+
+        with request_scope():
+            before, after = asyncio.run(match_route())
+
+        assert before.dissolved_id is None
+        assert after.dissolved_id == "SR11"
+
+    def test_queries_are_counted_per_scope(self):
+        _run_query()
+
+        with request_scope() as scope:
+            _run_query()
+            with request_scope() as nested_scope:
+                _run_query()
+            _run_query()
+
+        assert (scope.query_count, nested_scope.query_count) == (2, 1)
+
+    def test_responses_report_the_query_count(self):
+        async def call_next(request: Request) -> Response:
+            _run_query()
+            _run_query()
+            return Response()
+
+        request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+        response = asyncio.run(cache_request_lookups(request, call_next))
+
+        assert response.headers["X-Query-Count"] == "2"
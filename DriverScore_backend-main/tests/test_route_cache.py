@@ -0,0 +1,261 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import shapely
+from fastapi import HTTPException
+from geoalchemy2.shape import from_shape
+from shapely import LineString
+
+from driver_score.core.models import RouteSegment
+from driver_score.domains.route import cache
+from driver_score.domains.route.cache import RouteCache
+from driver_score.domains.route.curve.profile import CurvatureProfile
+from driver_score.domains.route.curve.service import RouteSpline
+from driver_score.domains.route.schema import RcType
+
+ROUTES = {
+    "SR11": LineString([(-84.40, 33.77), (-84.38, 33.775), (-84.37, 33.78), (-84.36, 33.79), (-84.35, 33.80)]),
+    "SR190": LineString([(-84.50, 33.70), (-84.45, 33.72)]),
+}
+CURVE = SimpleNamespace(
+    curve_id=1,
+    dissolved_id="SR11",
+    c_type="curve",
+    c_radius=500.0,
+    c_devangle=10.0,
+    c_length=100.0,
+    c_pc_x=-84.39,
+    c_pc_y=33.775,
+    c_pt_x=-84.38,
+    c_pt_y=33.78,
+    pc_lrs=0.01,
+    pt_lrs=0.02,
+    geometry=from_shape(LineString([(-84.39, 33.775), (-84.38, 33.78)]), srid=4326),
+)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    queries = []
+    spline_fits = []
+    profile_rows = []
+    segment_rows = []
+
+    def query(*entities):
+        queries.append(entities)
+        result = MagicMock()
+        ordered_rows = _segments if getattr(entities[0], "class_", None) is RouteSegment else _profile
+        result.filter_by.side_effect = lambda **key: MagicMock(
+            first=lambda: _spline_fit(**key),
+            order_by=lambda *_: MagicMock(all=lambda: ordered_rows(**key)),
+        )
+        # Routes, looked up by ID, and curves of the route
+        result.filter.side_effect = lambda criterion: MagicMock(
+            first=lambda: _route(criterion.right.value), all=lambda: [CURVE]
+        )
+        result.__iter__.side_effect = lambda: iter([(route_id,) for route_id in ROUTES])
+        return result
+
+    def _spline_fit(**key):
+        return next((fit for fit in spline_fits if key.items() <= fit.__dict__.items()), None)
+
+    def _profile(**key):
+        rows = [row for row in profile_rows if key.items() <= row.items()]
+        return [(row["lrs"], row["curvature"]) for row in sorted(rows, key=lambda row: row["bucket"])]
+
+    def _segments(**key):
+        rows = [row for row in segment_rows if key.items() <= row.items()]
+        return [
+            (row["segment_type"], row["segment_id"], row["start_lrs"], row["end_lrs"], row["geometry"])
+            for row in sorted(rows, key=lambda row: (row["segment_type"], row["segment_id"]))
+        ]
+
+    def execute(statement, parameters=None):
+        rows = {"route_curvature_profile": profile_rows, "route_segment": segment_rows}.get(statement.table.name)
+        if rows is not None:
+            if statement.is_delete:
+                rows.clear()
+            else:
+                rows.extend(parameters)
+        else:
+            spline_fits.append(SimpleNamespace(**statement.compile().params))
+
+    def _route(route_id):
+        return SimpleNamespace(geometry=from_shape(ROUTES[route_id], srid=4326)) if route_id in ROUTES else None
+
+    @contextmanager
+    def get_db_session():
+        yield SimpleNamespace(query=query, execute=execute)
+
+    monkeypatch.setattr(cache, "get_db_session", get_db_session)
+    return SimpleNamespace(
+        queries=queries, spline_fits=spline_fits, profile_rows=profile_rows, segment_rows=segment_rows
+    )
+
+
+class TestRouteCache:
+    def test_routes_are_loaded_once(self, fake_db):
+        route_cache = RouteCache()
+
+        route = route_cache.get("SR11")
+
+        assert route_cache.get("SR11") is route
+        assert len(fake_db.queries) == 2
+        assert route.geometry.equals(ROUTES["SR11"])
+        # Projected to US feet
+        assert route.projected_geometry.length == pytest.approx(route.geometry.length * 364_000, rel=0.2)
+        assert route.curves["c_radius"].tolist() == [500.0]
+        assert route.curves.geometry.iloc[0].equals(LineString([(-84.39, 33.775), (-84.38, 33.78)]))
+
+    def test_invalidated_routes_are_loaded_again(self, fake_db):
+        route_cache = RouteCache()
+        route = route_cache.get("SR11")
+
+        route_cache.invalidate("SR11")
+
+        assert route_cache.get("SR11") is not route
+        assert len(fake_db.queries) == 4
+
+    def test_curves_are_copied(self, fake_db):
+        route_cache = RouteCache()
+
+        route_cache.get_curves("SR11").sort_values(by="pc_lrs", inplace=True, ascending=False)
+        curves = route_cache.get_curves("SR11")
+        curves["pc_lrs"] = curves["pc_lrs"].shift(periods=-1)
+
+        assert route_cache.get("SR11").curves["pc_lrs"].tolist() == [0.01]
+
+    def test_warm_up_loads_every_route(self, fake_db):
+        route_cache = RouteCache()
+
+        route_cache.warm_up()
+        n_queries = len(fake_db.queries)
+
+        assert route_cache.get("SR190").geometry.equals(ROUTES["SR190"])
+        assert route_cache.get("SR11").geometry.equals(ROUTES["SR11"])
+        assert len(fake_db.queries) == n_queries == 1 + 2 * len(ROUTES)
+
+    def test_missing_route(self, fake_db):
+        with pytest.raises(HTTPException) as exc_info:
+            RouteCache().get("SR0")
+
+        assert exc_info.value.status_code == 404
+
+    def test_splines_are_fitted_once_and_persisted(self, fake_db, monkeypatch):
+        route_cache = RouteCache()
+
+        spline = route_cache.get_spline("SR11")
+
+        assert route_cache.get_spline("SR11") is spline
+        assert len(fake_db.spline_fits) == 1
+        assert fake_db.spline_fits[0].dissolved_id == "SR11"
+
+        # Another process loads the persisted fit instead of fitting the route again
+        monkeypatch.setattr(RouteSpline, "fit_spline", MagicMock(side_effect=AssertionError("Fitted again")))
+        loaded_spline = RouteCache().get_spline("SR11")
+
+        np.testing.assert_array_equal(loaded_spline.spline_model[0], spline.spline_model[0])
+        np.testing.assert_array_equal(loaded_spline.spline_model[1], spline.spline_model[1])
+        assert loaded_spline.spline_model[2] == spline.spline_model[2]
+        lrs = np.linspace(0, 1, 7)
+        np.testing.assert_array_equal(
+            loaded_spline.get_curvatures_at_LRS(lrs, normalized=True),
+            spline.get_curvatures_at_LRS(lrs, normalized=True),
+        )
+
+    def test_splines_of_invalidated_routes_are_dropped(self, fake_db):
+        route_cache = RouteCache()
+        spline = route_cache.get_spline("SR11")
+
+        route_cache.invalidate("SR11")
+
+        # The route did not change, its persisted fit is loaded again
+        assert route_cache.get_spline("SR11") is not spline
+        assert len(fake_db.spline_fits) == 1
+
+    def test_curvature_profiles_are_computed_once_and_persisted(self, fake_db):
+        route_cache = RouteCache()
+
+        profile = route_cache.get_curvature_profile("SR11")
+
+        assert route_cache.get_curvature_profile("SR11") is profile
+        assert len(fake_db.profile_rows) == len(profile.lrs)
+        assert [row["bucket"] for row in fake_db.profile_rows] == list(range(len(profile.lrs)))
+        assert profile.lrs[-1] == pytest.approx(route_cache.get("SR11").projected_geometry.length)
+
+        # Another process loads the persisted profile instead of evaluating the spline
+        loaded_profile = RouteCache().get_curvature_profile("SR11")
+
+        np.testing.assert_array_equal(loaded_profile.lrs, profile.lrs)
+        np.testing.assert_array_equal(loaded_profile.curvature, profile.curvature)
+
+    def test_outdated_curvature_profiles_are_computed_again(self, fake_db):
+        route_cache = RouteCache()
+        route_cache.get_curvature_profile("SR11")
+        for row in fake_db.profile_rows:
+            row["geometry_hash"] = "previous version of the route"
+
+        profile = RouteCache().get_curvature_profile("SR11")
+
+        assert len(fake_db.profile_rows) == len(profile.lrs)
+        assert {row["geometry_hash"] for row in fake_db.profile_rows} == {route_cache.get("SR11").geometry_hash}
+
+    def test_profiles_of_straight_routes_have_infinite_radii(self, fake_db, monkeypatch):
+        def straight_profile(spline, spacing_ft):
+            lrs = np.linspace(0, spline.route_geom.length, 10)
+            return CurvatureProfile(lrs=lrs, curvature=np.zeros_like(lrs))
+
+        monkeypatch.setattr(CurvatureProfile, "from_spline", straight_profile)
+
+        RouteCache().get_curvature_profile("SR11")
+
+        assert len(fake_db.profile_rows) == 10
+        assert all(row["radius"] == np.inf for row in fake_db.profile_rows)
+
+    def test_segments_are_computed_at_upload_and_persisted(self, fake_db):
+        route_cache = RouteCache()
+
+        segments = route_cache.update_segments("SR11")
+
+        assert route_cache.get_segments("SR11") is segments
+        assert segments.types.tolist() == [RcType.CURVE]
+        assert [(row["segment_type"], row["segment_id"]) for row in fake_db.segment_rows] == [("curve", 1)]
+
+        # Another process loads the persisted segments instead of computing them
+        loaded_segments = RouteCache().get_segments("SR11")
+
+        assert loaded_segments.types.tolist() == [RcType.CURVE]
+        np.testing.assert_array_equal(loaded_segments.ids, segments.ids)
+        np.testing.assert_array_equal(loaded_segments.start_lrs, segments.start_lrs)
+        np.testing.assert_array_equal(loaded_segments.end_lrs, segments.end_lrs)
+        assert loaded_segments.geometries[0].equals(segments.geometries[0])
+
+    def test_segments_of_invalidated_routes_are_computed_again(self, fake_db):
+        route_cache = RouteCache()
+        segments = route_cache.get_segments("SR11")
+        for row in fake_db.segment_rows:
+            row["geometry_hash"] = "previous version of the route"
+
+        route_cache.invalidate("SR11")
+
+        assert route_cache.get_segments("SR11") is not segments
+        assert {row["geometry_hash"] for row in fake_db.segment_rows} == {route_cache.get("SR11").geometry_hash}
+
+    def test_route_index_of_every_route(self, fake_db):
+        route_cache = RouteCache()
+
+        route_index = route_cache.get_route_index()
+
+        assert route_cache.get_route_index() is route_index
+        assert sorted(route_index.route_ids) == sorted(ROUTES)
+        # In feet, like the projected centerlines
+        start = shapely.points(shapely.get_coordinates(route_cache.get("SR190").projected_geometry)[:1])
+        assert route_index.nearest_routes(start, tolerance=10).tolist() == ["SR190"]
+
+        # Rebuilt with the uploaded version of a route
+        route_cache.invalidate("SR11")
+
+        assert route_cache.get_route_index() is not route_index
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from shapely import LineString, Point
+
+from driver_score.domains.route.geometry import densify, locate_points, resample
+
+ROUTE = LineString(
+    [(-84.40, 33.77, 0), (-84.38, 33.775, 0), (-84.38, 33.775, 0), (-84.36, 33.79, 0), (-84.35, 33.80, 0)]
+)
+
+
+def _densify_point_by_point(line: LineString, num_points: int) -> LineString:
+    # RouteService._interpolate_points, before it was vectorized
+    distances = [i / (num_points + 1) for i in range(1, num_points + 1)]
+    interpolated_points = []
+    for i in range(len(line.coords) - 1):
+        segment = LineString([line.coords[i], line.coords[i + 1]])
+        segment_length = segment.length
+        segment_distances = [dist * segment_length for dist in distances]
+        segment_points = [segment.interpolate(dist) for dist in segment_distances]
+        interpolated_points.extend(segment_points)
+    interpolated_points.append(line.coords[-1])
+    return LineString(interpolated_points)
+
+
+class TestDensify:
+    @pytest.mark.parametrize("num_points", [1, 5])
+    def test_same_points_as_point_by_point_densification(self, num_points):
+        densified = densify(ROUTE, num_points)
+
+        reference = np.asarray(_densify_point_by_point(ROUTE, num_points).coords)[:, :2]
+        # Including the repeated vertex
+        assert len(densified.coords) == (len(ROUTE.coords) - 1) * num_points + 1
+        np.testing.assert_allclose(np.asarray(densified.coords), reference, rtol=1e-12)
+
+
+class TestResample:
+    def test_points_at_fixed_spacing(self):
+        line = LineString([(0, 0), (10, 0), (10, 5)])
+
+        resampled = resample(line, 4)
+
+        assert list(resampled.coords) == [(0, 0), (4, 0), (8, 0), (10, 2)]
+
+
+class TestLocatePoints:
+    def test_same_LRS_as_projecting_every_point(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.uniform(-84.41, -84.34, 100), rng.uniform(33.76, 33.81, 100)
+
+        lrs = locate_points(ROUTE, x, y)
+
+        reference = [ROUTE.project(Point(x_i, y_i)) for x_i, y_i in zip(x, y, strict=True)]
+        np.testing.assert_allclose(lrs, reference, rtol=1e-12, atol=1e-15)
+
+    def test_points_off_the_ends_and_on_vertices(self):
+        line = LineString([(0, 0), (10, 0), (10, 10)])
+
+        lrs = locate_points(line, np.array([-5, 15, 10, 12, 10]), np.array([-1, 20, 0, 0, 5]))
+
+        np.testing.assert_array_equal(lrs, [0, 20, 10, 10, 15])
@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, create_autospec, patch
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely import LineString
+from sqlalchemy.orm import Session
+
+from driver_score.domains.route.matching import RouteIndex
+from driver_score.domains.run import service
+from driver_score.domains.run.schemas import RunSchema
+from driver_score.domains.run.service import RunService
+from driver_score.settings import settings
+
+# Two parallel routes 1000 ft apart and a crossing one, in feet
+ROUTES = {
+    "SR11": LineString([(0, 0), (5000, 0), (10000, 0)]),
+    "SR190": LineString([(0, 1000), (10000, 1000)]),
+    "SR3": LineString([(8000, -3000), (8000, 3000)]),
+}
+
+
+def _points(x, y) -> np.ndarray:
+    return shapely.points(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+
+
+class TestRouteIndex:
+    def test_nearest_route_within_tolerance(self):
+        route_index = RouteIndex(ROUTES)
+
+        nearest = route_index.nearest_routes(_points([100, 2000, 7990, 3000, 3000], [20, 950, 500, 500, -200]), 100)
+
+        assert nearest.tolist() == ["SR11", "SR190", "SR3", None, None]
+
+    def test_run_matched_to_most_of_its_fixes(self):
+        route_index = RouteIndex(ROUTES)
+        rng = np.random.default_rng(0)
+        # Along SR11, crossing SR3, with a few fixes off the routes
+        x = np.linspace(0, 10000, 500)
+        y = rng.normal(scale=20, size=500)
+        y[:10] = 500
+
+        assert route_index.match(_points(x, y), tolerance=100) == "SR11"
+        assert route_index.match(_points(x, y + 1000), tolerance=100) == "SR190"
+
+    def test_runs_far_from_every_route_are_not_matched(self):
+        assert RouteIndex(ROUTES).match(_points([3000, 4000], [500, 500]), tolerance=100) is None
+        assert RouteIndex(ROUTES).match(_points([], []), tolerance=100) is None
+        assert RouteIndex({}).match(_points([0], [0]), tolerance=100) is None
+
+
+@pytest.fixture
+def route_cache(monkeypatch):
+    fake_cache = SimpleNamespace(get_route_index=lambda: RouteIndex(ROUTES))
+    monkeypatch.setattr(service, "route_cache", fake_cache)
+    return fake_cache
+
+
+def _gps_gdf(x, y) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(geometry=gpd.points_from_xy(x, y), crs=service.PROJECTED_CRS).to_crs("EPSG:4326")
+
+
+class TestRunRoute:
+    def test_matched_route_is_persisted_and_used(self, route_cache):
+        session = create_autospec(Session, instance=True)
+        run_service = RunService(run_id="run", session=session)
+
+        route_id = asyncio.run(run_service.match_route(_gps_gdf(np.linspace(0, 9000, 50), np.full(50, 990))))
+
+        assert route_id == "SR190"
+        assert asyncio.run(run_service.get_route_id()) == "SR190"
+        statement = session.execute.call_args.args[0]
+        assert statement.table.name == "run"
+        assert statement.compile().params["dissolved_id"] == "SR190"
+
+    def test_unmatched_runs_use_the_default_route(self, route_cache):
+        session = create_autospec(Session, instance=True)
+        run_service = RunService(run_id="run", session=session)
+
+        assert asyncio.run(run_service.match_route(_gps_gdf([3000, 4000], [500, 500]))) is None
+        assert asyncio.run(run_service.get_route_id()) == settings.DEFAULT_ROUTE_ID
+
+    @pytest.mark.parametrize("dissolved_id, route_id", [("SR190", "SR190"), (None, settings.DEFAULT_ROUTE_ID)])
+    def test_route_of_stored_runs(self, dissolved_id, route_id):
+        run = RunSchema(run_id="run", driver_id=1, start_time="2022-05-25T20:19:06", dissolved_id=dissolved_id)
+
+        with patch.object(RunService, "get_run", AsyncMock(return_value=run)):
+            assert asyncio.run(RunService(run_id="run").get_route_id()) == route_id
+            assert asyncio.run(RunService(run_id="run", route_id="SR3").get_route_id()) == "SR3"
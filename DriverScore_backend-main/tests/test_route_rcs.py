@@ -0,0 +1,257 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely import LineString, Point
+
+from driver_score.domains.route import service
+from driver_score.domains.route.aggregation import interval_means
+from driver_score.domains.route.cache import PROJECTED_CRS
+from driver_score.domains.route.curve.service import CurveService
+from driver_score.domains.route.schema import RcType
+from driver_score.domains.route.segmentation import RouteSegments
+from driver_score.domains.route.service import RouteService
+from driver_score.settings import settings
+
+ROUTE = LineString(
+    [(-84.40, 33.77, 0), (-84.38, 33.775, 0), (-84.37, 33.78, 0), (-84.36, 33.79, 0), (-84.35, 33.80, 0)]
+)
+# Normalized LRS of the PC and PT of the curves
+CURVES = [(0.05, 0.12), (0.30, 0.42), (0.50, 0.62), (0.70, 0.90)]
+
+
+def _projected(geometry):
+    return gpd.GeoSeries([geometry], crs="EPSG:4326").to_crs(PROJECTED_CRS).iloc[0]
+
+
+def _fake_route_cache(route: LineString, curve_fractions: list[tuple[float, float]]) -> SimpleNamespace:
+    """Route cache of a single route, whose curves are given by the normalized LRS of their PC and PT."""
+    projected_route = _projected(route)
+    curves = []
+    for pc, pt in curve_fractions:
+        pc_point, pt_point = route.interpolate(pc, normalized=True), route.interpolate(pt, normalized=True)
+        curves.append(
+            {
+                "c_pc_x": pc_point.x,
+                "c_pc_y": pc_point.y,
+                "c_pt_x": pt_point.x,
+                "c_pt_y": pt_point.y,
+                "pc_lrs": route.project(pc_point),
+                "pt_lrs": route.project(pt_point),
+            }
+        )
+    # Not sorted, like the curve inventory
+    curve_gdf = gpd.GeoDataFrame(curves[::-1], geometry=[Point(0, 0)] * len(curves), crs="EPSG:4326")
+
+    cached_route = SimpleNamespace(geometry=route, projected_geometry=projected_route)
+    return SimpleNamespace(
+        get=lambda route_id: cached_route,
+        get_curves=lambda route_id: curve_gdf.copy(),
+        get_segments=lambda route_id: RouteSegments.from_route(route, projected_route, curve_gdf),
+    )
+
+
+@pytest.fixture
+def route_cache(monkeypatch):
+    fake_cache = _fake_route_cache(ROUTE, CURVES)
+    monkeypatch.setattr(service, "route_cache", fake_cache)
+    return fake_cache
+
+
+def _score_gdf(n_samples: int, with_lrs: bool) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(0)
+    fractions = rng.uniform(0, 1, n_samples)
+    # Away from the ends of the segments, where the buffers of the previous implementation and the LRS intervals differ
+    boundaries = np.array(CURVES).ravel()
+    fractions = fractions[np.min(np.abs(fractions[:, None] - boundaries), axis=1) > 0.01]
+    points = [ROUTE.interpolate(fraction, normalized=True) for fraction in fractions]
+    score_gdf = gpd.GeoDataFrame(
+        {"score": rng.uniform(0, 100, len(points))}, geometry=[Point(p.x, p.y) for p in points], crs="EPSG:4326"
+    )
+    if with_lrs:
+        score_gdf["lrs"] = shapely.line_locate_point(
+            _projected(ROUTE), score_gdf.geometry.to_crs(PROJECTED_CRS).to_numpy()
+        )
+    return score_gdf
+
+
+def _reference_RCs(score_gdf: gpd.GeoDataFrame, curve_gdf: gpd.GeoDataFrame, route: LineString = ROUTE) -> list[tuple]:
+    # Buffer and spatial index scoring, as originally implemented in RouteService.get_route_based_RCs
+    coords = list(route.coords)
+    points = []
+    for i in range(len(coords) - 1):
+        segment = LineString([coords[i], coords[i + 1]])
+        points.extend(segment.interpolate(j / 6 * segment.length) for j in range(1, 6))
+    points.append(Point(coords[-1]))
+    route = LineString(points)
+    route_gdf = gpd.GeoDataFrame(geometry=[Point(coord) for coord in route.coords], crs="EPSG:4326")
+    route_gdf["lrs"] = [route.project(point) for point in route_gdf.geometry]
+
+    def _score(geometry):
+        # The original query had no predicate, and also counted the samples within the bounding box of the buffer
+        indices = score_gdf.sindex.query(geometry.buffer(settings.BUFFER_DISTANCE), predicate="intersects")
+        if len(indices) == 0:
+            return 0
+        scores = score_gdf.loc[indices, "score"]
+        return max(0, min(100, int(np.sum(scores) / len(scores))))
+
+    curve_gdf = curve_gdf.sort_values(by="pc_lrs")
+    RCs = []
+    for i, row in enumerate(curve_gdf.itertuples(), start=1):
+        curve = LineString(route_gdf.loc[route_gdf["lrs"].between(row.pc_lrs, row.pt_lrs), "geometry"])
+        RCs.append((RcType.CURVE, i, _score(curve), [coord[:2] for coord in curve.coords]))
+    counter = 0
+    for pt_lrs, next_pc_lrs in zip(curve_gdf["pt_lrs"][:-1], curve_gdf["pc_lrs"][1:], strict=True):
+        tangent = route_gdf.loc[route_gdf["lrs"].between(pt_lrs, next_pc_lrs), "geometry"]
+        if tangent.shape[0] in {0, 1}:
+            continue
+        counter += 1
+        tangent = LineString(tangent)
+        RCs.append((RcType.TANGENT, counter, _score(tangent), [coord[:2] for coord in tangent.coords]))
+    return RCs
+
+
+class TestRouteBasedRCs:
+    @pytest.mark.parametrize("with_lrs", [True, False])
+    def test_same_RCs_as_spatial_scoring(self, route_cache, with_lrs):
+        score_gdf = _score_gdf(2000, with_lrs=with_lrs)
+
+        RCs = asyncio.run(RouteService("SR11").get_route_based_RCs(score_gdf))
+
+        reference = _reference_RCs(score_gdf, route_cache.get_curves("SR11"))
+        assert [(RC.type, RC.id, RC.score) for RC in RCs] == [RC[:3] for RC in reference]
+        for RC, (_, _, _, coordinates) in zip(RCs, reference, strict=True):
+            # Simplified: the points interpolated along the straight edges of the route are left out
+            geometry = LineString([(coordinate.lon, coordinate.lat) for coordinate in RC.geometry.coordinates])
+            assert len(geometry.coords) <= len(coordinates)
+            np.testing.assert_allclose(geometry.coords[0], coordinates[0], rtol=1e-12)
+            np.testing.assert_allclose(geometry.coords[-1], coordinates[-1], rtol=1e-12)
+            assert geometry.hausdorff_distance(LineString(coordinates)) < 1e-9
+
+    def test_segments_without_samples_score_0(self, route_cache):
+        score_gdf = _score_gdf(2000, with_lrs=True)
+        score_gdf = score_gdf[score_gdf["lrs"] < route_cache.get("SR11").projected_geometry.length / 2]
+
+        RCs = asyncio.run(RouteService("SR11").get_route_based_RCs(score_gdf.reset_index(drop=True)))
+
+        assert RCs[3].type == RcType.CURVE
+        assert RCs[3].score == 0
+
+
+class TestRouteBasedRCsOffRoute:
+    def test_same_RCs_as_spatial_scoring_along_a_hairpin(self, monkeypatch):
+        # Hairpin: the route goes east, turns, and comes back west 5 buffer distances north of itself
+        buffer_distance = settings.BUFFER_DISTANCE
+        gap = 5 * buffer_distance
+        x = np.linspace(-84.40, -84.35, 51)
+        route = LineString(
+            np.concatenate(
+                [np.column_stack([x, np.full_like(x, 33.77)]), np.column_stack([x[::-1], np.full_like(x, 33.77 + gap)])]
+            )
+        )
+        curve_ends = [
+            ((-84.395, 33.77), (-84.39, 33.77)),
+            ((-84.37, 33.77), (-84.36, 33.77)),
+            # Around the turn
+            ((-84.352, 33.77), (-84.352, 33.77 + gap)),
+            ((-84.36, 33.77 + gap), (-84.37, 33.77 + gap)),
+            ((-84.39, 33.77 + gap), (-84.395, 33.77 + gap)),
+        ]
+        curves = [
+            (route.project(Point(pc), normalized=True), route.project(Point(pt), normalized=True))
+            for pc, pt in curve_ends
+        ]
+        fake_cache = _fake_route_cache(route, curves)
+        monkeypatch.setattr(service, "route_cache", fake_cache)
+
+        rng = np.random.default_rng(0)
+        fractions = rng.uniform(0, 1, 3000)
+        fractions = fractions[np.min(np.abs(fractions[:, None] - np.array(curves).ravel()), axis=1) > 0.01]
+        points = shapely.get_coordinates(shapely.line_interpolate_point(route, fractions, normalized=True))
+        # Samples along the legs are moved up to 2 buffer distances off the route, away from the limit of the buffers
+        offsets = rng.uniform(-2, 2, len(points)) * buffer_distance
+        offsets[(points[:, 0] > -84.355) | (np.abs(np.abs(offsets) - buffer_distance) < 0.1 * buffer_distance)] = 0
+        points[:, 1] += offsets
+        # And some far off the route, along the first leg
+        far_points = np.column_stack([rng.uniform(-84.40, -84.36, 50), np.full(50, 33.77 - 10 * buffer_distance)])
+        score_gdf = gpd.GeoDataFrame(
+            {"score": rng.uniform(0, 100, len(points) + len(far_points))},
+            geometry=shapely.points(np.concatenate([points, far_points])),
+            crs="EPSG:4326",
+        )
+        assert (np.abs(offsets) > buffer_distance).sum() > 100
+
+        RCs = asyncio.run(RouteService("hairpin").get_route_based_RCs(score_gdf))
+
+        reference = _reference_RCs(score_gdf, fake_cache.get_curves("hairpin"), route)
+        assert [(RC.type, RC.id) for RC in RCs] == [(RcType.CURVE, i) for i in range(1, 6)] + [
+            (RcType.TANGENT, i) for i in range(1, 5)
+        ]
+        assert [(RC.type, RC.id, RC.score) for RC in RCs] == [RC[:3] for RC in reference]
+
+
+class TestCurveUpload:
+    def test_curves_are_located_and_segmented_off_the_event_loop(self, route_cache, monkeypatch):
+        threads = {}
+        curves = route_cache.get_curves("SR11")
+        curve_gdf = curves.drop(columns=["pc_lrs", "pt_lrs"]).assign(
+            dissolved_id="SR11", c_type="curve", c_radius=500.0, c_devangle=10.0, c_length=100.0
+        )
+
+        def read_curves(self, curves_geojson):
+            threads["read"] = threading.current_thread()
+            return curve_gdf
+
+        def to_postgis(gdf, name, con, **kwargs):
+            threads["persist"] = threading.current_thread()
+            np.testing.assert_allclose(gdf[["pc_lrs", "pt_lrs"]], curves[["pc_lrs", "pt_lrs"]], atol=1e-9)
+
+        monkeypatch.setattr(CurveService, "get_gdf_from_geojson", read_curves)
+        monkeypatch.setattr(gpd.GeoDataFrame, "to_postgis", to_postgis)
+        route_cache.invalidate = lambda route_id: None
+        route_cache.update_segments = lambda route_id: threads.setdefault("segments", threading.current_thread())
+
+        async def upload():
+            threads["event_loop"] = threading.current_thread()
+            await RouteService("SR11").persist_curves_to_db(b"{}")
+
+        asyncio.run(upload())
+
+        assert {threads["read"], threads["persist"], threads["segments"]} == {threads["read"]}
+        assert threads["read"] is not threads["event_loop"]
+
+
+class TestRouteSegments:
+    def test_curves_then_tangents(self, route_cache):
+        segments = route_cache.get_segments("SR11")
+
+        # The tangent between the 2nd and 3rd curves is shorter than the spacing of the route points
+        assert segments.types.tolist() == [RcType.CURVE] * 4 + [RcType.TANGENT] * 2
+        assert segments.ids.tolist() == [1, 2, 3, 4, 1, 2]
+        assert (segments.start_lrs < segments.end_lrs).all()
+        # Tangents are between the curves they connect
+        assert (segments.start_lrs[4:] > segments.end_lrs[[0, 2]]).all()
+        assert (segments.end_lrs[4:] < segments.start_lrs[[1, 3]]).all()
+
+    def test_route_without_curves(self, route_cache):
+        curves = route_cache.get_curves("SR11").iloc[:0]
+
+        segments = RouteSegments.from_route(ROUTE, route_cache.get("SR11").projected_geometry, curves)
+
+        assert len(segments.types) == len(segments.ids) == len(segments.start_lrs) == len(segments.geometries) == 0
+
+
+class TestIntervalMeans:
+    def test_means_of_overlapping_intervals(self):
+        lrs = np.array([5.0, 1.0, 3.0, 3.0, np.nan, 8.0])
+        values = np.array([50.0, 10.0, 30.0, 40.0, 100.0, np.nan])
+
+        means, counts = interval_means(lrs, values, np.array([0.0, 3.0, 6.0, 4.0]), np.array([3.0, 5.0, 9.0, 2.0]))
+
+        np.testing.assert_array_equal(counts, [3, 3, 0, 0])
+        np.testing.assert_allclose(means[:2], [80 / 3, 40.0])
+        assert np.isnan(means[2:]).all()
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import shapely
+from shapely import LineString
+
+from driver_score.domains.route.curve.profile import CurvatureProfile
+from driver_score.domains.route.curve.service import RouteSpline
+
+RADIUS_FT = 2000.0
+
+
+def _arc_route() -> LineString:
+    # A tangent, then a quarter circle, then a tangent, in feet
+    angles = np.linspace(0, np.pi / 2, 60)
+    arc = np.column_stack([RADIUS_FT * np.sin(angles), RADIUS_FT * (1 - np.cos(angles))])
+    tangent_in = np.column_stack([np.linspace(-3000, -50, 60), np.zeros(60)])
+    tangent_out = np.column_stack([np.full(60, RADIUS_FT), np.linspace(RADIUS_FT + 50, RADIUS_FT + 3000, 60)])
+    return LineString(np.vstack([tangent_in, arc, tangent_out]))
+
+
+class TestRouteSpline:
+    def test_batched_curvatures_match_point_by_point(self):
+        route = _arc_route()
+        spline = RouteSpline(route)
+        rng = np.random.default_rng(0)
+        points = shapely.points(rng.uniform([-3000, -100], [2100, 5000], size=(50, 2)))
+
+        np.testing.assert_allclose(
+            spline.get_curvatures_at_points(points),
+            [spline.get_curveature_at_point(point) for point in points],
+            rtol=1e-12,
+        )
+        np.testing.assert_allclose(
+            spline.get_radii_at_points(points), [spline.get_radius_at_point(point) for point in points], rtol=1e-12
+        )
+
+        lrs = np.linspace(0, route.length, 40)
+        np.testing.assert_allclose(
+            spline.get_curvatures_at_LRS(lrs), [spline.get_curvature_at_LRS(value) for value in lrs], rtol=1e-12
+        )
+        np.testing.assert_allclose(
+            spline.get_radii_at_LRS(lrs / route.length, normalized=True),
+            [spline.get_radius_at_LRS(value, normalized=True) for value in lrs / route.length],
+            rtol=1e-12,
+        )
+
+    def test_radius_of_a_curve(self):
+        route = _arc_route()
+        spline = RouteSpline(route)
+
+        # Middle of the quarter circle
+        middle = shapely.Point(RADIUS_FT * np.sin(np.pi / 4), RADIUS_FT * (1 - np.cos(np.pi / 4)))
+        assert spline.get_radii_at_points(np.array([middle]))[0] == pytest.approx(RADIUS_FT, rel=0.05)
+
+    def test_LRS_out_of_the_route(self):
+        spline = RouteSpline(_arc_route())
+
+        with pytest.raises(ValueError):
+            spline.get_curvatures_at_LRS(np.array([0.5, -1.0]), normalized=True)
+        with pytest.raises(ValueError):
+            spline.get_curvatures_at_LRS(np.array([0.5, 1.5]), normalized=True)
+
+    def test_spline_fitted_earlier(self):
+        route = _arc_route()
+        spline = RouteSpline(route)
+
+        assert RouteSpline(route, tck=spline.spline_model).spline_model is spline.spline_model
+
+
+class TestCurvatureProfile:
+    def test_profile_matches_spline(self):
+        route = _arc_route()
+        spline = RouteSpline(route)
+        profile = CurvatureProfile.from_spline(spline, spacing_ft=5)
+
+        assert profile.lrs[0] == 0
+        assert profile.lrs[-1] == route.length
+        assert np.all(np.diff(profile.lrs) <= 5)
+        # At the points of the profile, and interpolated between them
+        np.testing.assert_array_equal(profile.curvatures_at_LRS(profile.lrs), spline.get_curvatures_at_LRS(profile.lrs))
+        lrs = np.random.default_rng(0).uniform(0, route.length, 200)
+        np.testing.assert_allclose(
+            profile.curvatures_at_LRS(lrs), spline.get_curvatures_at_LRS(lrs), atol=0.01 / RADIUS_FT
+        )
+        np.testing.assert_allclose(profile.radii_at_LRS(lrs), 1 / profile.curvatures_at_LRS(lrs))
+
+    def test_straight_route(self):
+        x = np.linspace(0, 3000, 20)
+        profile = CurvatureProfile.from_spline(RouteSpline(LineString(np.column_stack([x, x]))), spacing_ft=10)
+
+        np.testing.assert_array_equal(profile.curvature, 0)
+        assert np.all(np.isposinf(profile.radii))
+        assert np.all(np.isposinf(profile.radii_at_LRS(np.array([0, 100, 2000]))))
+
+    def test_invalid_spacing(self):
+        with pytest.raises(ValueError):
+            CurvatureProfile.from_spline(RouteSpline(_arc_route()), spacing_ft=0)
@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import MagicMock, create_autospec
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from driver_score.domains.tile import service
+from driver_score.domains.tile.cache import TileCache, TileKey
+from driver_score.domains.tile.enums import TileLayer
+from driver_score.domains.tile.service import TileService
+from driver_score.settings import settings
+
+
+def _key(run_id=None, route_id=None, layers=tuple(TileLayer)) -> TileKey:
+    return TileKey(12, 1100, 1600, layers=layers, run_id=run_id, route_id=route_id)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class TestTileCache:
+    def test_least_recently_used_tiles_are_dropped(self):
+        cache = TileCache(max_size=2)
+        cache.put(_key("run1"), b"1")
+        cache.put(_key("run2"), b"2")
+        assert cache.get(_key("run1")) == b"1"
+
+        cache.put(_key("run3"), b"3")
+
+        assert cache.get(_key("run2")) is None
+        assert cache.get(_key("run1")) == b"1"
+        assert cache.get(_key("run3")) == b"3"
+
+    def test_invalidated_run(self):
+        cache = TileCache()
+        for key in (_key(), _key("run1"), _key("run2"), _key(route_id="SR11")):
+            cache.put(key, b"tile")
+
+        cache.invalidate_run("run1")
+
+        assert cache.get(_key("run1")) is None
+        # Tiles not filtered by run may show the samples of the run
+        assert cache.get(_key()) is None
+        assert cache.get(_key(route_id="SR11")) is None
+        assert cache.get(_key("run2")) == b"tile"
+
+    def test_invalidated_route(self):
+        cache = TileCache()
+        for key in (_key(), _key("run1"), _key(route_id="SR11"), _key(route_id="SR190")):
+            cache.put(key, b"tile")
+
+        cache.invalidate_route("SR11")
+
+        assert cache.get(_key(route_id="SR11")) is None
+        assert cache.get(_key()) is None
+        assert cache.get(_key("run1")) is None
+        assert cache.get(_key(route_id="SR190")) == b"tile"
+
+
+@pytest.fixture
+def tile_cache(monkeypatch):
+    cache = TileCache()
+    monkeypatch.setattr(service, "tile_cache", cache)
+    return cache
+
+
+def _session(*tiles) -> Session:
+    session = create_autospec(Session, instance=True)
+    session.execute.side_effect = [MagicMock(scalar=MagicMock(return_value=tile)) for tile in tiles]
+    return session
+
+
+class TestTileService:
+    def test_layers_are_concatenated_and_cached(self, tile_cache):
+        # psycopg2 returns bytea as memoryview, and NULL for layers without features
+        session = _session(memoryview(b"scores"), None, b"curves")
+        tile_service = TileService(12, 1100, 1600, run_id="run1", session=session)
+
+        tile = asyncio.run(tile_service.get_tile(list(TileLayer)))
+
+        assert tile == b"scorescurves"
+        assert [_sql(call.args[0]).count("ST_AsMVT(") for call in session.execute.call_args_list] == [1, 1, 1]
+        assert asyncio.run(tile_service.get_tile(list(TileLayer))) == tile
+        assert session.execute.call_count == 3
+
+    def test_only_requested_layers_are_queried(self, tile_cache):
+        session = _session(b"curves")
+
+        tile = asyncio.run(TileService(12, 1100, 1600, session=session).get_tile([TileLayer.CURVES]))
+
+        assert tile == b"curves"
+        sql = _sql(session.execute.call_args.args[0])
+        assert "ST_AsMVT(features, 'curves', 4096, 'geom')" in sql
+        assert "ST_TileEnvelope(12, 1100, 1600)" in sql
+
+    def test_samples_filtered_by_run_driver_and_route(self):
+        sql = _sql(TileService(12, 1100, 1600, run_id="run1", driver_id=7, route_id="SR11")._scores_query())
+
+        assert "run.run_id = 'run1'" in sql
+        assert "run.driver_id = 7" in sql
+        assert f"coalesce(run.dissolved_id, '{settings.DEFAULT_ROUTE_ID}') = 'SR11'" in sql
+        assert "ST_Intersects(gps_sample.geometry" in sql
+
+    def test_segments_of_the_routes_of_the_selected_runs(self):
+        scored = _sql(TileService(12, 1100, 1600, driver_id=7)._segments_query())
+        unscored = _sql(TileService(12, 1100, 1600)._segments_query())
+
+        assert "route_segment.dissolved_id IN (SELECT coalesce(run.dissolved_id" in scored
+        assert "road_characteristic.gps_lrs BETWEEN route_segment.start_lrs AND route_segment.end_lrs" in scored
+        # Without run or driver, every route is shown, without scores
+        assert "road_characteristic" not in unscored
+        assert "route_segment.dissolved_id IN" not in unscored
+
+    @pytest.mark.parametrize("z, x, y, exists", [(0, 0, 0, True), (3, 7, 7, True), (3, 8, 0, False), (-1, 0, 0, False)])
+    def test_tile_exists(self, z, x, y, exists):
+        assert TileService.tile_exists(z, x, y) is exists
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import io
+import threading
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import create_autospec
+
+import pytest
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from driver_score.core.models import UploadJob
+from driver_score.domains.allgather import jobs
+from driver_score.domains.allgather import service as allgather_service
+from driver_score.domains.allgather.api import get_upload_job, upload
+from driver_score.domains.allgather.constant import UploadJobStatus, UploadStage
+from driver_score.domains.allgather.jobs import (
+    DuplicateUploadError,
+    UploadJobService,
+    UploadJobWorkerPool,
+    process_upload_job,
+)
+from driver_score.domains.allgather.schemas import UploadJobSchema
+from driver_score.domains.allgather.service import AllGatherService
+
+
+def _job(archive_path) -> UploadJobSchema:
+    return UploadJobSchema(
+        run_id="run",
+        file_name="upload.zip",
+        archive_path=str(archive_path),
+        status=UploadJobStatus.RUNNING,
+        created_at=datetime(2022, 5, 25),
+    )
+
+
+def _zip_upload() -> UploadFile:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("2022_05_25_20_19_06_302/42/nan/location/loc.csv", b"timestamp_utc_local\n1\n")
+    buffer.seek(0)
+    return UploadFile(buffer, filename="upload.zip")
+
+
+@pytest.fixture
+def recorded_outcomes(monkeypatch):
+    outcomes = []
+    monkeypatch.setattr(UploadJobService, "succeed", lambda self: outcomes.append(("succeeded", None)) or True)
+    monkeypatch.setattr(UploadJobService, "fail", lambda self, error: outcomes.append(("failed", error)) or True)
+    monkeypatch.setattr(UploadJobService, "_beat", lambda self: True)
+    return outcomes
+
+
+class TestUploadJobs:
+    def test_failed_pipeline_is_recorded_and_archive_deleted(self, tmp_path, monkeypatch, recorded_outcomes):
+        async def failing_pipeline(job, job_service):
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid folder structure")
+
+        monkeypatch.setattr(jobs, "run_upload_pipeline", failing_pipeline)
+        archive_path = tmp_path / "run"
+        archive_path.write_bytes(b"PK")
+
+        process_upload_job(_job(archive_path))
+
+        assert recorded_outcomes == [("failed", "Invalid folder structure")]
+        assert not archive_path.exists()
+
+    def test_archive_of_a_job_claimed_by_another_worker_is_kept(self, tmp_path, monkeypatch):
+        async def pipeline(job, job_service):
+            pass
+
+        monkeypatch.setattr(jobs, "run_upload_pipeline", pipeline)
+        monkeypatch.setattr(UploadJobService, "_beat", lambda self: True)
+        # The job was claimed again after this worker was considered stale
+        monkeypatch.setattr(UploadJobService, "succeed", lambda self: False)
+        archive_path = tmp_path / "run"
+        archive_path.write_bytes(b"PK")
+
+        process_upload_job(_job(archive_path))
+
+        assert archive_path.exists()
+
+    def test_heartbeat_while_a_stage_runs(self, monkeypatch):
+        beats = []
+        three_beats = threading.Event()
+
+        def beat(self):
+            beats.append(self.claim_token)
+            if len(beats) == 3:
+                three_beats.set()
+            return True
+
+        monkeypatch.setattr(UploadJobService, "_beat", beat)
+
+        with UploadJobService(run_id="run", claim_token="token").heartbeat(interval=0.01):
+            assert three_beats.wait(timeout=5)
+        n_beats = len(beats)
+
+        assert set(beats) == {"token"}
+        assert len(beats) == n_beats
+
+    def test_heartbeat_stops_once_claimed_by_another_worker(self, monkeypatch):
+        beats = []
+        monkeypatch.setattr(UploadJobService, "_beat", lambda self: beats.append(1) and False)
+
+        with UploadJobService(run_id="run", claim_token="token").heartbeat(interval=0.01):
+            threading.Event().wait(0.1)
+
+        assert len(beats) == 1
+
+    def test_jobs_of_stopped_workers_are_queued_again_before_their_next_stage(self, tmp_path, monkeypatch):
+        in_ingest, release = threading.Event(), threading.Event()
+        stages, requeued = [], []
+        archive_path = tmp_path / "run"
+        archive_path.write_bytes(b"PK")
+        claimed = [_job(archive_path).model_copy(update={"claim_token": "token"})]
+
+        async def pipeline(job, job_service):
+            for stage in UploadStage:
+                with job_service.stage(stage):
+                    stages.append(stage)
+                    in_ingest.set()
+                    release.wait(timeout=5)
+
+        monkeypatch.setattr(
+            UploadJobService, "claim_next_job", staticmethod(lambda: claimed.pop() if claimed else None)
+        )
+        monkeypatch.setattr(UploadJobService, "requeue", lambda self: requeued.append(self.claim_token) or True)
+        monkeypatch.setattr(UploadJobService, "_record_stage", lambda self, stage, progress: None)
+        monkeypatch.setattr(UploadJobService, "_beat", lambda self: True)
+        monkeypatch.setattr(jobs, "run_upload_pipeline", pipeline)
+
+        pool = UploadJobWorkerPool(n_workers=1, poll_interval=0.01)
+        pool.start()
+        assert in_ingest.wait(timeout=5)
+        threads = pool._threads
+        pool.stop(timeout=0.01)
+
+        # The worker is still inside a stage, its job is not queued again while it may commit the run
+        assert requeued == []
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert stages == [UploadStage.INGEST]
+        assert requeued == ["token"]
+        assert archive_path.exists()
+
+    def test_stage_records_duration_and_failure(self, monkeypatch):
+        recorded = []
+        monkeypatch.setattr(UploadJobService, "_record_stage", lambda self, stage, progress: recorded.append(progress))
+        job_service = UploadJobService(run_id="run")
+
+        with job_service.stage(UploadStage.INGEST):
+            pass
+        with pytest.raises(ValueError), job_service.stage(UploadStage.SCORE):
+            raise ValueError("Scoring failed")
+
+        assert [progress.status for progress in recorded] == [
+            UploadJobStatus.RUNNING,
+            UploadJobStatus.SUCCEEDED,
+            UploadJobStatus.RUNNING,
+            UploadJobStatus.FAILED,
+        ]
+        assert recorded[1].duration_seconds >= 0
+
+    def test_status_endpoint(self, tmp_path, monkeypatch):
+        async def get_job(self):
+            return _job(tmp_path / self.run_id) if self.run_id == "run" else None
+
+        monkeypatch.setattr(UploadJobService, "get_job", get_job)
+
+        job = asyncio.run(get_upload_job(run_id="run"))
+        assert job.status == UploadJobStatus.RUNNING
+        assert "archive_path" not in job.model_dump()
+
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(get_upload_job(run_id="other"))
+        assert e.value.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_spooled_upload_is_hashed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(allgather_service, "DRIVER_SCORE_UPLOAD_DIR", tmp_path)
+        file = _zip_upload()
+        content = file.file.getvalue()
+
+        archive_path, content_digest = asyncio.run(AllGatherService(run_id="run").spool_uploaded_archive(file))
+
+        assert archive_path.read_bytes() == content
+        assert content_digest == hashlib.sha256(content).hexdigest()
+
+    def test_duplicate_upload_is_rejected_before_queueing(self, tmp_path, monkeypatch):
+        async def find_duplicate_upload(self, content_digest):
+            return "previous-run"
+
+        async def enqueue(self, **kwargs):
+            raise AssertionError("A duplicate upload must not be queued")
+
+        monkeypatch.setattr(allgather_service, "DRIVER_SCORE_UPLOAD_DIR", tmp_path)
+        monkeypatch.setattr(AllGatherService, "find_duplicate_upload", find_duplicate_upload)
+        monkeypatch.setattr(UploadJobService, "enqueue", enqueue)
+
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(upload(_zip_upload()))
+
+        assert e.value.status_code == status.HTTP_409_CONFLICT
+        assert e.value.detail["run_id"] == "previous-run"
+        assert list(tmp_path.iterdir()) == []
+
+    def test_concurrent_duplicate_upload_is_rejected_when_queued(self, tmp_path, monkeypatch):
+        async def find_duplicate_upload(self, content_digest):
+            return None
+
+        async def enqueue(self, **kwargs):
+            # Another upload of the same file was queued after the duplicate check
+            raise DuplicateUploadError("concurrent-run")
+
+        monkeypatch.setattr(allgather_service, "DRIVER_SCORE_UPLOAD_DIR", tmp_path)
+        monkeypatch.setattr(AllGatherService, "find_duplicate_upload", find_duplicate_upload)
+        monkeypatch.setattr(UploadJobService, "enqueue", enqueue)
+
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(upload(_zip_upload()))
+
+        assert e.value.status_code == status.HTTP_409_CONFLICT
+        assert e.value.detail["run_id"] == "concurrent-run"
+        assert list(tmp_path.iterdir()) == []
+
+
+def _fake_db_session(monkeypatch, flush_error: Exception | None = None, ingested_run_id: str | None = None) -> Session:
+    session = create_autospec(Session, instance=True)
+    if flush_error is not None:
+        session.flush.side_effect = flush_error
+    session.execute.return_value.scalar.return_value = ingested_run_id
+
+    @contextmanager
+    def get_db_session(existing_session=None):
+        yield session
+
+    monkeypatch.setattr(jobs, "get_db_session", get_db_session)
+    return session
+
+
+class TestEnqueueDuplicates:
+    def test_job_of_the_same_file_in_progress_conflicts(self, tmp_path, monkeypatch):
+        async def find_duplicate_upload(self, content_digest):
+            return "concurrent-run"
+
+        _fake_db_session(monkeypatch, flush_error=IntegrityError("INSERT", {}, Exception("duplicate key")))
+        monkeypatch.setattr(AllGatherService, "find_duplicate_upload", find_duplicate_upload)
+
+        with pytest.raises(DuplicateUploadError) as e:
+            asyncio.run(UploadJobService(run_id="run").enqueue("upload.zip", tmp_path / "run", "digest"))
+
+        assert e.value.run_id == "concurrent-run"
+
+    def test_file_ingested_since_the_duplicate_check(self, tmp_path, monkeypatch):
+        _fake_db_session(monkeypatch, ingested_run_id="ingested-run")
+
+        with pytest.raises(DuplicateUploadError) as e:
+            asyncio.run(UploadJobService(run_id="run").enqueue("upload.zip", tmp_path / "run", "digest"))
+
+        assert e.value.run_id == "ingested-run"
+
+    def test_digests_of_jobs_in_progress_are_unique(self):
+        (index,) = (index for index in UploadJob.__table__.indexes if index.unique)
+
+        assert str(CreateIndex(index).compile(dialect=postgresql.dialect())) == (
+            "CREATE UNIQUE INDEX ux_upload_job_content_digest_in_progress ON upload_job (content_digest) "
+            "WHERE status IN ('queued', 'running')"
+        )